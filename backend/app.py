@@ -1,11 +1,18 @@
 """CellQuest Backend API - Flask application with Socket.IO."""
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
+import cProfile
+import json
+import os
+import threading
 import time
 
 from config import config
-from model_service import model_service
+from engines import create_engine
+from jobs import job_manager
+import metrics
+from model_service import VersionConflict, model_service
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -21,6 +28,69 @@ socketio = SocketIO(
     async_mode=app.config['SOCKETIO_ASYNC_MODE']
 )
 
+# Background job progress/completion goes only to the submitting client
+job_manager.on_event = lambda event, payload, room: socketio.emit(event, payload, to=room)
+
+# Result cache counters are read from the cache itself at scrape time
+for _field, _type in (('hits', 'counter'), ('misses', 'counter'), ('evictions', 'counter'),
+                      ('entries', 'gauge'), ('bytes', 'gauge')):
+    metrics.registry.register(metrics.CallbackMetric(
+        f'cellquest_result_cache_{_field}' + ('_total' if _type == 'counter' else ''),
+        f'Simulation result cache {_field}',
+        _type,
+        lambda field=_field: {(): model_service.result_cache.stats()[field]}
+    ))
+metrics.active_socket_simulations.set(0)
+
+# Only one request can be profiled at a time
+_profile_lock = threading.Lock()
+
+
+# ==================== Instrumentation ====================
+
+@app.before_request
+def start_request_metrics():
+    """Start the request timer and, if requested, the profiler."""
+    g.request_started = time.perf_counter()
+    if (app.config['PROFILING_ENABLED'] and request.headers.get('X-Profile') == '1'
+            and _profile_lock.acquire(blocking=False)):
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+@app.after_request
+def finish_request_metrics(response):
+    """Record latency and payload sizes; attach the profile dump if any."""
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    elapsed = time.perf_counter() - g.get('request_started', time.perf_counter())
+    metrics.http_request_seconds.observe(elapsed, request.method, route, str(response.status_code))
+    metrics.http_request_bytes.inc(request.content_length or 0, request.method, route)
+    if not response.is_streamed:
+        metrics.http_response_bytes.inc(
+            response.calculate_content_length() or 0, request.method, route
+        )
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _profile_lock.release()
+        os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+        slug = ''.join(c if c.isalnum() else '_' for c in route.strip('/'))
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method}-{slug}"
+        path = os.path.join(app.config['PROFILE_DIR'], f'{name}.prof')
+        profiler.dump_stats(path)
+        response.headers['X-Profile-Path'] = path
+    return response
+
+
+@app.teardown_request
+def release_profiler(error=None):
+    """Stop a profiler left running by a request that raised."""
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _profile_lock.release()
+
 
 # ==================== REST API Routes ====================
 
@@ -30,13 +100,63 @@ def health_check():
     return jsonify({'status': 'healthy', 'service': 'CellQuest API'})
 
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Metrics in the Prometheus text exposition format."""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Simulation result cache hit/miss counters."""
+    return jsonify({'success': True, 'result_cache': model_service.result_cache.stats()})
+
+
 @app.route('/api/models', methods=['POST'])
 def create_model():
     """Create a new biological network model."""
     try:
-        data = request.json
+        data = _json_body()
         result = model_service.create_model(data)
         return jsonify(result), 201
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/models', methods=['GET'])
+def list_models():
+    """List recently updated models, optionally filtered by ?owner=."""
+    try:
+        limit = request.args.get('limit', 100, type=int)
+        models = model_service.list_models(request.args.get('owner'), limit)
+        return jsonify({'success': True, 'models': models})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/models/bulk', methods=['POST'])
+def bulk_import_models():
+    """Import many models from NDJSON or a gzip'd archive; streams NDJSON results."""
+    try:
+        result = model_service.bulk_import(request.stream)
+        return Response(
+            stream_with_context(_ndjson(result['records'])),
+            mimetype='application/x-ndjson'
+        )
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/models/import', methods=['POST'])
+def import_model():
+    """Import a Cell Collective model with its regulation rules."""
+    try:
+        result = model_service.import_model(_json_body())
+        return jsonify(result), 201
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -53,15 +173,45 @@ def get_model(model_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/models/<model_id>/versions/<int:version>', methods=['GET'])
+def get_model_version(model_id, version):
+    """Get one immutable version of a model."""
+    try:
+        model = model_service.get_model_version(model_id, version)
+        if model:
+            return jsonify({'success': True, 'model': model})
+        return jsonify({'success': False, 'error': 'Model version not found'}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/api/models/<model_id>', methods=['PUT'])
 def update_model(model_id):
     """Update existing model."""
     try:
-        updates = request.json
+        updates = _json_body()
         result = model_service.update_model(model_id, updates)
         if result['success']:
             return jsonify(result)
         return jsonify(result), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/models/<model_id>', methods=['PATCH'])
+def patch_model(model_id):
+    """Apply node and edge operations to a model (409 if it has moved on)."""
+    try:
+        result = model_service.patch_model(model_id, _json_body())
+        if result['success']:
+            return jsonify(result)
+        return jsonify(result), 404
+    except VersionConflict as e:
+        return jsonify({'success': False, 'error': str(e), 'version': e.version}), 409
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -80,22 +230,131 @@ def delete_model(model_id):
 
 @app.route('/api/models/<model_id>/simulate', methods=['POST'])
 def simulate_model(model_id):
-    """Run simulation on model."""
+    """Run simulation on model.
+
+    Streams NDJSON (one record per block of steps plus a summary trailer)
+    when ``params['stream']`` is true or the client accepts only
+    ``application/x-ndjson``. The trailer's attractor fields match the
+    non-streamed response, except that 'reached_attractor' is null when
+    a cycle was not confirmed within the steps and ``params['confirm_cycle']``
+    is not set; its 'steps_taken' and 'final_state' describe the
+    streamed steps, which may run past the first repeated state.
+    """
     try:
-        params = request.json
+        params = _json_body()
+        if params.get('stream') or request.accept_mimetypes.best == 'application/x-ndjson':
+            result = model_service.simulate_stream(model_id, params)
+            if result['success']:
+                return Response(
+                    stream_with_context(_ndjson(result['records'])),
+                    mimetype='application/x-ndjson'
+                )
+            return jsonify(result), 404
+
         result = model_service.simulate(model_id, params)
         if result['success']:
             return jsonify(result)
         return jsonify(result), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/models/<model_id>/simulate/batch', methods=['POST'])
+def simulate_model_batch(model_id):
+    """Run a batch of simulations over many initial conditions."""
+    try:
+        params = _json_body()
+        result = model_service.simulate_batch(model_id, params)
+        if result['success']:
+            return jsonify(result)
+        return jsonify(result), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/models/<model_id>/perturbation-screen', methods=['POST'])
+def perturbation_screen(model_id):
+    """Knock out / over-express nodes and diff the outcome against wild type."""
+    try:
+        params = _json_body(optional=True)
+        result = model_service.perturbation_screen(model_id, params)
+        if result['success']:
+            return jsonify(result)
+        return jsonify(result), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/models/<model_id>/sweep', methods=['POST'])
+def sweep_model(model_id):
+    """Dose-response sweep of one or two external inputs' activity levels."""
+    try:
+        params = _json_body(optional=True)
+        result = model_service.sweep(model_id, params)
+        if result['success']:
+            return jsonify(result)
+        return jsonify(result), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/models/<model_id>/attractors', methods=['GET'])
+def model_attractors(model_id):
+    """Enumerate all attractors and basin sizes of a small model.
+
+    Query params:
+        inputs: External node values as ``id:0|1`` pairs, comma-separated
+        socket_id: Socket.IO sid of the caller, which then receives
+            ``attractors_progress`` events
+    """
+    try:
+        socket_id = request.args.get('socket_id')
+        inputs = {}
+        for pair in filter(None, request.args.get('inputs', '').split(',')):
+            node_id, _, value = pair.partition(':')
+            inputs[node_id] = int(value)
+
+        def report_progress(phase, done, total):
+            socketio.emit('attractors_progress', {
+                'model_id': model_id,
+                'phase': phase,
+                'done': done,
+                'total': total
+            }, to=socket_id)
+
+        result = model_service.attractors(model_id, {'inputs': inputs},
+                                          report_progress if socket_id else None)
+        if result['success']:
+            return jsonify(result)
+        return jsonify(result), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
 @app.route('/api/models/<model_id>/analyze', methods=['GET'])
 def analyze_model(model_id):
-    """Analyze model network structure."""
+    """Analyze model network structure.
+
+    Query params:
+        max_loop_length: Longest feedback loop to report
+        max_loops: Maximum number of feedback loops to report
+    """
     try:
-        result = model_service.analyze(model_id)
+        params = {
+            'max_loop_length': request.args.get('max_loop_length', type=int),
+            'max_loops': request.args.get('max_loops', type=int)
+        }
+        result = model_service.analyze(model_id, params)
         if result['success']:
             return jsonify(result)
         return jsonify(result), 404
@@ -103,6 +362,77 @@ def analyze_model(model_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Run a simulate, analyze or attractors call as a background job.
+
+    Body:
+        {'kind': 'simulate' | 'analyze' | 'attractors' | 'sweep', 'model_id': str,
+         'params': dict,
+         'socket_id': str}  # optional; this Socket.IO sid gets job_progress
+                            # and job_complete events
+    """
+    try:
+        data = _json_body()
+        model = model_service.get_model(data.get('model_id'))
+        if not model:
+            return jsonify({'success': False, 'error': 'Model not found'}), 404
+        job = job_manager.submit(data.get('kind'), model, data.get('params') or {},
+                                 data.get('socket_id'))
+        return jsonify({'success': True, 'job': job}), 202
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get job status, progress and (once completed) result."""
+    try:
+        job = job_manager.get(job_id)
+        if job:
+            return jsonify({'success': True, 'job': job})
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running job."""
+    try:
+        job = job_manager.cancel(job_id)
+        if job:
+            return jsonify({'success': True, 'job': job})
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def _json_body(optional: bool = False) -> dict:
+    """The request body as a JSON object ({} if absent and ``optional``).
+
+    Raises:
+        ValueError: If the body is missing, not JSON or not an object
+    """
+    if optional and not request.get_data(cache=True):
+        return {}
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be a JSON object')
+    return data
+
+
+def _ndjson(records):
+    """Serialize records as NDJSON lines; a failure becomes an error record."""
+    try:
+        for record in records:
+            yield json.dumps(record, separators=(',', ':')) + '\n'
+    except Exception as e:
+        yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+
+
 # ==================== WebSocket Events ====================
 
 @socketio.on('connect')
@@ -128,10 +458,15 @@ def handle_simulation(data):
             'params': {
                 'steps': int,
                 'initial_conditions': dict,
-                'step_delay': float  # seconds between steps
+                'step_delay': float,  # seconds between steps
+                'update_scheme': 'synchronous' | 'asynchronous',
+                'engine': 'bitset' | 'incremental' | 'python' | 'numpy',
+                'async_mode': 'random_order' | 'random_node',
+                'seed': int
             }
         }
     """
+    metrics.active_socket_simulations.inc()
     try:
         model_id = data['model_id']
         params = data['params']
@@ -142,31 +477,38 @@ def handle_simulation(data):
             emit('simulation_error', {'error': 'Model not found'})
             return
 
+        # Compile network once for the whole run
+        network = model_service.get_network(model)
+        engine = create_engine(network, params)
+
         # Initialize state
         state = model_service._initialize_state(
             model,
             params.get('initial_conditions', {})
         )
+        engine.reset(network.state_vector(state))
 
         # Emit initial state
         emit('simulation_step', {
             'step': 0,
-            'state': state
+            'state': network.state_dict(engine.vector())
         })
 
         # Run simulation step-by-step
         steps = params.get('steps', 100)
         step_delay = params.get('step_delay', 0.5)
+        seen = {engine.packed(): 0}  # packed state -> first step it occurred
+        cycle_start = None
+        cycle_period = None
 
         for step in range(1, steps + 1):
             time.sleep(step_delay)  # Delay for visualization
 
             # Update state
-            state = model_service._update_state(
-                model,
-                state,
-                params.get('update_scheme', 'synchronous')
-            )
+            engine.step()
+            metrics.simulation_steps.inc(1, engine.name)
+            metrics.nodes_evaluated.inc(engine.nodes_evaluated, engine.name)
+            state = network.state_dict(engine.vector())
 
             # Emit current state
             emit('simulation_step', {
@@ -174,17 +516,33 @@ def handle_simulation(data):
                 'state': state
             })
 
-            # Check for attractor
-            # (simplified - in production would track full timeline)
+            # Check for attractor: a repeated state (synchronous) or a
+            # fixed point (asynchronous)
+            if not engine.deterministic:
+                if engine.is_fixed_point():
+                    cycle_start, cycle_period = step, 1
+                    break
+                continue
+            packed = engine.packed()
+            cycle_start = seen.get(packed)
+            if cycle_start is not None:
+                cycle_period = step - cycle_start
+                break
+            seen[packed] = step
 
         # Emit completion
         emit('simulation_complete', {
             'success': True,
-            'final_state': state
+            'final_state': state,
+            'reached_attractor': cycle_start is not None,
+            'transient_length': cycle_start,
+            'cycle_period': cycle_period
         })
 
     except Exception as e:
         emit('simulation_error', {'error': str(e)})
+    finally:
+        metrics.active_socket_simulations.dec()
 
 
 @socketio.on('stop_simulation')
@@ -0,0 +1,154 @@
+"""Batched synchronous simulation of many initial conditions at once."""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import Config
+from network import CompiledNetwork
+
+
+def step_states(network: CompiledNetwork, states: np.ndarray) -> np.ndarray:
+    """Advance a (runs x nodes) ``uint8`` state matrix by one synchronous step.
+
+    Args:
+        network: Compiled network shared by every run
+        states: Current states, one row per run
+
+    Returns:
+        New state matrix with the same shape
+    """
+    if network.rules is not None:
+        return step_rules(network, states)
+    return step_matrix(*network.sparse_matrices(), states)
+
+
+def step_rules(network: CompiledNetwork, states: np.ndarray) -> np.ndarray:
+    """Synchronous step of a rule-based network over a state matrix.
+
+    Nodes with a truth table are updated for every run at once by
+    gathering their inputs into a table index; the remaining nodes fall
+    back to evaluating their rule run by run on packed states.
+    """
+    tables = network.truth_tables(Config.TRUTH_TABLE_MAX_INPUTS)
+    following = states.copy()
+    fallback = []
+    for i in network.update_order:
+        table = tables[i]
+        if table is None:
+            fallback.append(i)
+            continue
+        inputs = list(network.rule_inputs[i])
+        weights = np.left_shift(1, np.arange(len(inputs), dtype=np.int64))
+        lookup = np.frombuffer(table, dtype=np.uint8)
+        following[:, i] = lookup[states[:, inputs].astype(np.int64) @ weights]
+
+    if fallback:
+        for row, packed in zip(following, (network.pack(r.tolist()) for r in states)):
+            for i in fallback:
+                row[i] = 1 if network.rules[i](packed) else 0
+    return following
+
+
+def step_matrix(activation, inhibition, update_mask: np.ndarray, states: np.ndarray) -> np.ndarray:
+    """Synchronous step kernel over explicit CSR matrices.
+
+    Split out from :func:`step_states` so worker processes can run it
+    without a ``CompiledNetwork``.
+    """
+    transposed = states.T
+    on = ((activation @ transposed > 0) & (inhibition @ transposed == 0)).T
+    return np.where(update_mask, on, states).astype(np.uint8)
+
+
+def run_batch(network: CompiledNetwork, initial_states: np.ndarray, steps: int,
+              forced_nodes: Optional[np.ndarray] = None,
+              forced_values: Optional[np.ndarray] = None) -> Dict:
+    """Simulate every row of ``initial_states`` until it revisits a state.
+
+    All runs are stepped together; a run leaves the active set as soon
+    as its trajectory repeats a state, so finished runs cost nothing.
+
+    Args:
+        network: Compiled network shared by every run
+        initial_states: (runs x nodes) matrix of 0/1 initial states
+        steps: Maximum number of steps per run
+        forced_nodes: Optional per-run node index held at a fixed value
+            for the whole run (-1 for none), e.g. a knockout
+        forced_values: Per-run value (0 or 1) of the forced node
+
+    Returns:
+        Dictionary with per-run ``final_states`` (matrix), ``steps_taken``,
+        ``attractor_ids`` (-1 if no attractor was reached) and the list of
+        distinct ``attractors`` as lists of packed state rows
+    """
+    states = np.array(initial_states, dtype=np.uint8, copy=True)
+    runs = states.shape[0]
+    if forced_nodes is not None:
+        forced_nodes = np.asarray(forced_nodes, dtype=np.int64)
+        forced_values = np.asarray(forced_values, dtype=np.uint8)
+        _apply_forced(states, forced_nodes, forced_values)
+    final_states = states.copy()
+    steps_taken = np.zeros(runs, dtype=np.int64)
+    attractor_ids = np.full(runs, -1, dtype=np.int64)
+
+    packed = np.packbits(states, axis=1)
+    histories: List[List[bytes]] = [[packed[r].tobytes()] for r in range(runs)]
+    seen: List[Dict[bytes, int]] = [{history[0]: 0} for history in histories]
+
+    attractors: List[List[bytes]] = []
+    attractor_index: Dict[tuple, int] = {}
+
+    active = np.arange(runs)
+    current = states
+    for step in range(1, steps + 1):
+        if active.size == 0:
+            break
+        current = step_states(network, current)
+        if forced_nodes is not None:
+            _apply_forced(current, forced_nodes[active], forced_values[active])
+        packed = np.packbits(current, axis=1)
+
+        keep = np.ones(active.size, dtype=bool)
+        for row, run in enumerate(active):
+            key = packed[row].tobytes()
+            first = seen[run].get(key)
+            if first is None:
+                seen[run][key] = step
+                histories[run].append(key)
+                continue
+
+            # Trajectory repeated: the states since ``first`` form the cycle.
+            # Key it by its full canonical rotation: with forced nodes, runs
+            # follow different dynamics, so cycles may share states.
+            cycle = histories[run][first:]
+            start = cycle.index(min(cycle))
+            canonical = tuple(cycle[start:] + cycle[:start])
+            if canonical not in attractor_index:
+                attractor_index[canonical] = len(attractors)
+                attractors.append(list(canonical))
+            attractor_ids[run] = attractor_index[canonical]
+            keep[row] = False
+
+        steps_taken[active] = step
+        final_states[active] = current
+        active = active[keep]
+        current = current[keep]
+
+    return {
+        'final_states': final_states,
+        'steps_taken': steps_taken,
+        'attractor_ids': attractor_ids,
+        'attractors': attractors,
+    }
+
+
+def _apply_forced(states: np.ndarray, nodes: np.ndarray, values: np.ndarray) -> None:
+    """Overwrite each row's forced node (where one is set) in place."""
+    rows = np.flatnonzero(nodes >= 0)
+    states[rows, nodes[rows]] = values[rows]
+
+
+def unpack_state(network: CompiledNetwork, packed: bytes) -> List[int]:
+    """Unpack a state row produced by ``np.packbits`` into a 0/1 list."""
+    bits = np.unpackbits(np.frombuffer(packed, dtype=np.uint8), count=network.size)
+    return bits.tolist()
@@ -0,0 +1,6 @@
+"""Benchmarks for the CellQuest simulation backend.
+
+Run from the ``backend`` directory, e.g. ``python -m benchmarks.bench_memory``;
+``python -m benchmarks.suite`` runs the regression suite against
+``baseline.json``.
+"""
@@ -0,0 +1,60 @@
+"""Full vs dirty-set incremental synchronous evaluation on sparse networks.
+
+Steps each engine a fixed number of times (no attractor cut-off) and
+reports throughput and total node evaluations.
+
+Usage:
+    python -m benchmarks.bench_incremental [--nodes 10000] [--steps 200]
+"""
+import argparse
+import time
+
+from benchmarks.synthetic import random_network
+from engines import BitsetEngine, IncrementalEngine, PythonEngine
+from network import CompiledNetwork
+
+
+def run(engine_class, network, initial, steps):
+    """Return (seconds, total nodes evaluated, final packed state)."""
+    engine = engine_class(network)
+    engine.reset(initial)
+    evaluated = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        engine.step()
+        evaluated += engine.nodes_evaluated
+    return time.perf_counter() - start, evaluated, engine.packed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=10000)
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f'{args.nodes} nodes, {args.steps} steps')
+    for mean_in_degree in (1.0, 1.5, 2.0):
+        model = random_network(
+            args.nodes,
+            mean_in_degree=mean_in_degree,
+            inhibition_ratio=0.2,
+            seed=args.seed
+        )
+        model.update(id='bench', version=1)
+        network = CompiledNetwork(model)
+        initial = network.state_vector({n['id']: n['state'] for n in model['nodes']})
+
+        print(f'  mean in-degree {mean_in_degree}:')
+        reference = None
+        for engine_class in (PythonEngine, BitsetEngine, IncrementalEngine):
+            seconds, evaluated, final = run(engine_class, network, initial, args.steps)
+            if reference is None:
+                reference = final
+            assert final == reference, f'{engine_class.name} diverged'
+            print(f'    {engine_class.name:12s} {args.steps / seconds:10,.0f} steps/s'
+                  f' {evaluated:14,d} nodes evaluated')
+
+
+if __name__ == '__main__':
+    main()
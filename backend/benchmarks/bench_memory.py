@@ -0,0 +1,62 @@
+"""Compare timeline memory: dict-per-step vs bit-packed ints.
+
+Usage:
+    python -m benchmarks.bench_memory [--nodes 1000] [--steps 500]
+"""
+import argparse
+import tracemalloc
+
+from benchmarks.synthetic import random_network
+from engines import BitsetEngine
+from network import CompiledNetwork
+
+
+def measure(build) -> int:
+    """Return bytes still allocated by ``build()`` once it returns."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=1000)
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    model = random_network(args.nodes, seed=args.seed)
+    model.update(id='bench', version=1)
+    network = CompiledNetwork(model)
+    initial = network.state_vector({n['id']: n['state'] for n in model['nodes']})
+
+    def run(record):
+        # Step a fixed number of times (no attractor cut-off) so both
+        # representations hold exactly ``steps + 1`` states.
+        engine = BitsetEngine(network)
+        engine.reset(initial)
+        timeline = [record(engine)]
+        for _ in range(args.steps):
+            engine.step()
+            timeline.append(record(engine))
+        return timeline
+
+    packed_bytes = measure(lambda: run(lambda engine: engine.packed()))
+    dict_bytes = measure(
+        lambda: run(lambda engine: network.state_dict(engine.vector()))
+    )
+
+    states = args.steps + 1
+    print(f'{args.nodes} nodes, {states} states')
+    print(f'  dict timeline:   {dict_bytes / 1e6:10.2f} MB ({dict_bytes / states:,.0f} B/state)')
+    print(f'  packed timeline: {packed_bytes / 1e6:10.2f} MB ({packed_bytes / states:,.0f} B/state)')
+    print(f'  ratio:           {dict_bytes / max(packed_bytes, 1):10.1f}x')
+
+
+if __name__ == '__main__':
+    main()
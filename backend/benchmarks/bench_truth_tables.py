@@ -0,0 +1,86 @@
+"""Rule evaluation vs truth-table lookup for low in-degree rule nodes.
+
+Steps a rule-based network with ``RuleEngine`` with tables disabled and
+with tables for nodes reading at most k inputs, for several k, and
+reports steps per second. The batch kernel (``step_states``) is timed
+the same way.
+
+Usage:
+    python -m benchmarks.bench_truth_tables [--nodes 2000] [--steps 300]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from batch import step_states
+from benchmarks.synthetic import random_rule_network
+from config import Config
+from network import CompiledNetwork
+from rule_engine import RuleEngine, import_cell_collective
+
+
+def run(network, initial, steps, table_inputs):
+    """Return (steps per second, final packed state)."""
+    engine = RuleEngine(network, table_inputs=table_inputs)
+    network.truth_tables(table_inputs)  # build outside the timed loop
+    engine.reset(initial)
+    start = time.perf_counter()
+    for _ in range(steps):
+        engine.step()
+    return steps / (time.perf_counter() - start), engine.packed()
+
+
+def run_batch(network, states, steps, table_inputs):
+    """Return batch steps per second with tables up to ``table_inputs`` inputs."""
+    Config.TRUTH_TABLE_MAX_INPUTS = table_inputs
+    network.truth_tables(table_inputs)
+    start = time.perf_counter()
+    for _ in range(steps):
+        states = step_states(network, states)
+    return steps / (time.perf_counter() - start), states
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=2000)
+    parser.add_argument('--steps', type=int, default=300)
+    parser.add_argument('--runs', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    model = import_cell_collective(random_rule_network(args.nodes, seed=args.seed))
+    model.update(id='bench', version=1)
+    network = CompiledNetwork(model)
+    initial = network.state_vector({n['id']: n['state'] for n in model['nodes']})
+    degrees = [len(network.rule_inputs[i]) for i in network.update_order]
+
+    print(f'{args.nodes} nodes, {args.steps} steps, '
+          f'mean rule inputs {sum(degrees) / max(1, len(degrees)):.1f}')
+    print('  single run (RuleEngine):')
+    reference = None
+    for k in (0, 2, 4, 6, 8):
+        rate, final = run(network, initial, args.steps, k)
+        if reference is None:
+            reference = final
+        assert final == reference, f'tables up to {k} inputs diverged'
+        covered = sum(d <= k for d in degrees) if k else 0
+        label = 'no tables' if k == 0 else f'k <= {k}'
+        print(f'    {label:10s} {rate:10,.0f} steps/s  {covered:6d}/{len(degrees)} nodes tabled')
+
+    rng = np.random.default_rng(args.seed)
+    states = rng.integers(0, 2, size=(args.runs, network.size), dtype=np.uint8)
+    batch_steps = max(1, args.steps // 30)
+    print(f'  batch of {args.runs} runs (step_states):')
+    reference = None
+    for k in (0, 6):
+        rate, final = run_batch(network, states, batch_steps, k)
+        if reference is None:
+            reference = final
+        assert np.array_equal(final, reference), f'batch tables up to {k} inputs diverged'
+        label = 'no tables' if k == 0 else f'k <= {k}'
+        print(f'    {label:10s} {rate:10,.1f} steps/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""Benchmark suite: time and memory of the simulation service and API.
+
+Runs every case on seeded synthetic networks of each size, writes the
+results as JSON and optionally compares them against a stored baseline
+(``benchmarks/baseline.json``). Exits with status 1 when a case is
+slower than the baseline by more than ``--threshold``.
+
+Usage:
+    python -m benchmarks.suite [--sizes 10,100,1000,10000] [--repeats 3]
+        [--output results.json] [--baseline benchmarks/baseline.json]
+        [--threshold 1.5] [--save-baseline]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from benchmarks.synthetic import random_network
+from config import Config
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def measure(run: Callable[[], object], repeats: int, reset: Callable[[], None]) -> Dict:
+    """Time ``run`` ``repeats`` times, then measure its peak memory once.
+
+    ``reset`` is called before every run (outside the timed region) to
+    drop caches, so each run does the full work.
+    """
+    timings = []
+    for _ in range(repeats):
+        reset()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    reset()
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'seconds_min': min(timings),
+        'seconds_median': statistics.median(timings),
+        'peak_bytes': peak
+    }
+
+
+def service_cases(model: Dict, steps: int) -> Dict[str, tuple]:
+    """(run, reset) pairs exercising ModelService directly."""
+    from model_service import ModelService
+
+    service = ModelService()
+    model_id = service.create_model(model)['model']['id']
+    stored = service.get_model(model_id)
+    params = {'steps': steps}
+
+    def reset():
+        service.result_cache.invalidate_model(model_id)
+        service._structures.pop(model_id, None)
+        service._networks.pop(model_id, None)
+
+    def feedback_loops():
+        network = service.get_network(stored)
+        return list(service._find_feedback_loops(
+            network, Config.ANALYSIS_MAX_LOOP_LENGTH, Config.ANALYSIS_MAX_LOOPS
+        ))
+
+    return {
+        'simulate': (lambda: service.simulate(model_id, params), reset),
+        'analyze': (lambda: service.analyze(model_id), reset),
+        'find_feedback_loops': (feedback_loops, reset),
+    }
+
+
+def endpoint_cases(model: Dict, steps: int) -> Dict[str, tuple]:
+    """(run, reset) pairs exercising the Flask routes through the test client.
+
+    The app's model store is switched to memory first, so benchmarks never
+    write to the configured (persistent) store.
+    """
+    # Read when the store is first used, which is after this point
+    Config.MODEL_STORE = 'memory'
+    from app import app
+    from model_service import model_service
+
+    client = app.test_client()
+    model_id = client.post('/api/models', json=model).get_json()['model']['id']
+
+    def reset():
+        model_service.result_cache.invalidate_model(model_id)
+        model_service._structures.pop(model_id, None)
+        model_service._networks.pop(model_id, None)
+
+    def request(method, url, **kwargs):
+        response = getattr(client, method)(url, **kwargs)
+        assert response.status_code < 300, response.get_data(as_text=True)[:200]
+        return response
+
+    return {
+        'POST /api/models': (lambda: request('post', '/api/models', json=model), reset),
+        'POST /simulate': (
+            lambda: request('post', f'/api/models/{model_id}/simulate', json={'steps': steps}),
+            reset
+        ),
+        'GET /analyze': (lambda: request('get', f'/api/models/{model_id}/analyze'), reset),
+    }
+
+
+def run_suite(sizes: List[int], repeats: int, steps: int, seed: int) -> Dict:
+    """Run every case for every size and collect JSON-serializable results."""
+    results = []
+    for nodes in sizes:
+        model = random_network(nodes, seed=seed)
+        cases = {**service_cases(model, steps), **endpoint_cases(model, steps)}
+        for case, (run, reset) in cases.items():
+            measurement = measure(run, repeats, reset)
+            results.append({'case': case, 'nodes': nodes, **measurement})
+            print(f'  {case:22s} {nodes:6d} nodes  {measurement["seconds_min"] * 1e3:10.2f} ms'
+                  f'  {measurement["peak_bytes"] / 1e6:8.2f} MB peak', flush=True)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': sizes,
+            'repeats': repeats,
+            'steps': steps,
+            'seed': seed
+        },
+        'results': results
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """Compare min timings per (case, nodes) against the baseline.
+
+    Returns:
+        Rows with the baseline and current timing, their ratio and
+        whether the ratio exceeds ``threshold``
+    """
+    reference = {(r['case'], r['nodes']): r for r in baseline['results']}
+    rows = []
+    for result in results['results']:
+        base = reference.get((result['case'], result['nodes']))
+        if base is None:
+            continue
+        ratio = result['seconds_min'] / max(base['seconds_min'], 1e-9)
+        rows.append({
+            'case': result['case'],
+            'nodes': result['nodes'],
+            'baseline_seconds': base['seconds_min'],
+            'seconds': result['seconds_min'],
+            'ratio': ratio,
+            'regression': ratio > threshold
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10,100,1000,10000')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--steps', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results JSON to this file')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='Slowdown ratio that counts as a regression')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Overwrite the baseline with these results')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    print(f'sizes {sizes}, {args.repeats} repeats, {args.steps} steps')
+    results = run_suite(sizes, args.repeats, args.steps, args.seed)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'baseline written to {args.baseline}')
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f'no baseline at {args.baseline}; run with --save-baseline to create one')
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    rows = compare(results, baseline, args.threshold)
+    print(f'vs baseline ({baseline["meta"]["timestamp"]}), threshold {args.threshold}x:')
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f'  {row["case"]:22s} {row["nodes"]:6d} nodes  {row["ratio"]:6.2f}x{flag}')
+    if any(row['regression'] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
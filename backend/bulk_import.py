@@ -0,0 +1,230 @@
+"""Streaming parser and validator behind ``POST /api/models/bulk``.
+
+The request body is NDJSON (one model per line), optionally gzip'd, or a
+tar archive (optionally gzip'd) of ``.json`` files holding one model each
+and/or ``.ndjson``/``.jsonl`` files. The format is sniffed from the first
+bytes, and the body is read incrementally, so memory use does not grow
+with the size of the upload.
+
+Each document is either CellQuest model data (with 'nodes' and 'edges')
+or a Cell Collective model, which is converted with
+``import_cell_collective``. Decoding, validation and a trial compile run
+in worker processes through :func:`prepare_document`.
+"""
+import gzip
+import io
+import json
+import tarfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Dict, Iterator, Tuple
+
+from network import CompiledNetwork
+from rule_engine import import_cell_collective
+
+CELL_COLLECTIVE_KEYS = ('componentSet', 'internalComponentSet', 'externalComponentSet',
+                        'relationshipSet')
+EDGE_TYPES = ('activation', 'inhibition')
+MODEL_SUFFIXES = ('.json',)
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_TAR_MAGIC_OFFSET = 257  # 'ustar' in a POSIX tar header
+
+
+def iter_documents(stream: BinaryIO) -> Iterator[Tuple[str, bytes]]:
+    """Split an upload into raw model documents.
+
+    Args:
+        stream: Readable binary stream (e.g. the WSGI input)
+
+    Yields:
+        (source, raw JSON bytes) per document; source names the line or
+        archive member it came from
+    """
+    head = _read_up_to(stream, len(_GZIP_MAGIC))
+    if head == _GZIP_MAGIC:
+        stream = gzip.GzipFile(fileobj=_buffered(stream, head))
+        head = b''
+    head += _read_up_to(stream, _TAR_MAGIC_OFFSET + 5 - len(head))
+
+    reader = _buffered(stream, head)
+    if head[_TAR_MAGIC_OFFSET:] == b'ustar':
+        yield from _iter_archive(reader)
+    else:
+        yield from _iter_lines(reader, 'line')
+
+
+def prepare_document(raw: bytes) -> Dict:
+    """Decode, convert and validate one document (pool task).
+
+    Returns:
+        Model data for ``ModelService.create_model``
+
+    Raises:
+        ValueError: If the document is not a valid model
+    """
+    try:
+        data = json.loads(raw)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f'Invalid JSON: {e}')
+    if not isinstance(data, dict):
+        raise ValueError('Model must be a JSON object')
+    if any(key in data for key in CELL_COLLECTIVE_KEYS):
+        owner = data.get('owner')
+        data = import_cell_collective(data)
+        if owner is not None:
+            data['owner'] = owner
+
+    validate_model(data)
+    # Rules are closures and cannot be sent back; compiling here only
+    # proves that the model compiles, before it is stored
+    CompiledNetwork(data)
+    return data
+
+
+def validate_model(data: Dict) -> None:
+    """Check the structure of CellQuest model data.
+
+    Raises:
+        ValueError: On a missing or mistyped field, a duplicate node id, an
+            edge to an unknown node or an unknown edge type
+    """
+    for field in ('name', 'description', 'owner'):
+        if field in data and not isinstance(data[field], str):
+            raise ValueError(f"'{field}' must be a string")
+    nodes = data.get('nodes')
+    edges = data.get('edges')
+    if not isinstance(nodes, list) or not isinstance(edges, list):
+        raise ValueError("'nodes' and 'edges' must be lists")
+
+    known = set()
+    for node in nodes:
+        if not isinstance(node, dict) or not isinstance(node.get('id'), str):
+            raise ValueError("Every node needs a string 'id'")
+        if node['id'] in known:
+            raise ValueError(f"Duplicate node id '{node['id']}'")
+        known.add(node['id'])
+    for edge in edges:
+        if not isinstance(edge, dict):
+            raise ValueError('Every edge must be an object')
+        for end in ('source', 'target'):
+            if edge.get(end) not in known:
+                raise ValueError(f"Edge {end} '{edge.get(end)}' is not a node")
+        if edge.get('type') not in EDGE_TYPES:
+            raise ValueError(f"Edge type must be one of {', '.join(EDGE_TYPES)}")
+
+
+def prepare_documents(documents: Iterator[Tuple[str, bytes]], workers: int,
+                      window: int) -> Iterator[Tuple[str, object]]:
+    """Run :func:`prepare_document` over a stream of documents, in order.
+
+    At most ``window`` documents are in flight, so the upload is read
+    only as fast as the pool keeps up. If a worker process dies (e.g. a
+    document exhausts memory), the documents in flight fail and the rest
+    of the upload continues on a new pool.
+
+    Yields:
+        (source, model data) or (source, ValueError) per document
+    """
+    if workers <= 1:
+        for source, raw in documents:
+            yield source, _attempt(raw)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for source, raw in documents:
+            try:
+                future = pool.submit(_attempt, raw)
+            except BrokenProcessPool:
+                yield from _collect(pending, 0)
+                pool.shutdown()
+                pool = ProcessPoolExecutor(max_workers=workers)
+                future = pool.submit(_attempt, raw)
+            pending.append((source, future))
+            yield from _collect(pending, window - 1)
+        yield from _collect(pending, 0)
+    finally:
+        pool.shutdown()
+
+
+def _collect(pending: deque, keep: int) -> Iterator[Tuple[str, object]]:
+    """Yield the results of the oldest ``pending`` documents until at
+    most ``keep`` remain."""
+    while len(pending) > keep:
+        source, future = pending.popleft()
+        try:
+            yield source, future.result()
+        except BrokenProcessPool:
+            yield source, ValueError('A worker process died while preparing this document')
+
+
+def _attempt(raw: bytes):
+    """Prepare one document, returning rather than raising its error."""
+    try:
+        return prepare_document(raw)
+    except ValueError as e:
+        return e
+    except Exception as e:
+        # A malformed document must fail alone, never the whole upload
+        return ValueError(f'Invalid model ({type(e).__name__}: {e})')
+
+
+def _iter_archive(reader: BinaryIO) -> Iterator[Tuple[str, bytes]]:
+    # 'r|' reads members strictly in order without seeking
+    with tarfile.open(fileobj=reader, mode='r|') as archive:
+        for member in archive:
+            name = member.name.lower()
+            if not member.isfile() or not name.endswith(MODEL_SUFFIXES + NDJSON_SUFFIXES):
+                continue
+            content = archive.extractfile(member)
+            if name.endswith(MODEL_SUFFIXES):
+                yield member.name, content.read()
+            else:
+                yield from _iter_lines(content, f'{member.name} line')
+
+
+def _iter_lines(reader: BinaryIO, label: str) -> Iterator[Tuple[str, bytes]]:
+    for number, line in enumerate(reader, 1):
+        if line.strip():
+            yield f'{label} {number}', line
+
+
+def _read_up_to(stream: BinaryIO, size: int) -> bytes:
+    """Read ``size`` bytes, or fewer only at the end of the stream."""
+    chunks = []
+    while size > 0:
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _buffered(stream: BinaryIO, head: bytes) -> io.BufferedReader:
+    """Buffered reader over ``head`` followed by the rest of ``stream``."""
+    return io.BufferedReader(_Stream(stream, head), buffer_size=1 << 16)
+
+
+class _Stream(io.RawIOBase):
+    """Raw-IO adapter over any ``read(n)`` stream, with already-read bytes
+    put back in front."""
+
+    def __init__(self, stream: BinaryIO, head: bytes = b''):
+        self._stream = stream
+        self._head = head
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._head:
+            data, self._head = self._head[:len(buffer)], self._head[len(buffer):]
+        else:
+            data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
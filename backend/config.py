@@ -19,6 +19,55 @@ class Config:
     CC_API_URL = os.getenv('CC_API_URL', 'https://teach.cellcollective.org')
     CC_API_KEY = os.getenv('CC_API_KEY', '')  # Optional, if you have API key
 
+    # Model storage: 'sqlite' (persistent, shared by worker processes) or 'memory'
+    MODEL_STORE = os.getenv('MODEL_STORE', 'sqlite')
+    MODEL_STORE_PATH = os.getenv('MODEL_STORE_PATH', 'cellquest.db')
+    MODEL_STORE_CACHE_SIZE = int(os.getenv('MODEL_STORE_CACHE_SIZE', 256))
+    # Most recent versions kept per model (0 keeps every version)
+    MODEL_VERSION_RETENTION = int(os.getenv('MODEL_VERSION_RETENTION', 100))
+
+    # Bulk model import (POST /api/models/bulk)
+    BULK_IMPORT_WORKERS = int(os.getenv('BULK_IMPORT_WORKERS', os.cpu_count() or 1))
+    BULK_IMPORT_BATCH_SIZE = int(os.getenv('BULK_IMPORT_BATCH_SIZE', 100))
+    BULK_IMPORT_MAX_MODELS = int(os.getenv('BULK_IMPORT_MAX_MODELS', 10000))
+
+    # Simulation limits
+    MAX_BATCH_RUNS = int(os.getenv('MAX_BATCH_RUNS', 65536))
+    STREAM_MAX_ATTRACTOR_STATES = int(os.getenv('STREAM_MAX_ATTRACTOR_STATES', 1000))
+    # Rule nodes reading at most this many nodes use a 2^k lookup table
+    TRUTH_TABLE_MAX_INPUTS = int(os.getenv('TRUTH_TABLE_MAX_INPUTS', 6))
+
+    # Structural analysis (feedback loop enumeration caps)
+    ANALYSIS_MAX_LOOPS = int(os.getenv('ANALYSIS_MAX_LOOPS', 1000))
+    ANALYSIS_MAX_LOOP_LENGTH = int(os.getenv('ANALYSIS_MAX_LOOP_LENGTH', 20))
+
+    # Simulation result cache
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', 256))
+    RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+    # Attractor landscape (exhaustive 2^n enumeration)
+    ATTRACTOR_MAX_NODES = min(int(os.getenv('ATTRACTOR_MAX_NODES', 25)), 25)
+    ATTRACTOR_CHUNK_SIZE = int(os.getenv('ATTRACTOR_CHUNK_SIZE', 65536))
+    ATTRACTOR_WORKERS = int(os.getenv('ATTRACTOR_WORKERS', os.cpu_count() or 1))
+    ATTRACTOR_MAX_REPORTED = int(os.getenv('ATTRACTOR_MAX_REPORTED', 256))
+    ATTRACTOR_CACHE_MAX_ENTRIES = int(os.getenv('ATTRACTOR_CACHE_MAX_ENTRIES', 64))
+    ATTRACTOR_CACHE_MAX_BYTES = int(os.getenv('ATTRACTOR_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
+    # Background jobs (process pool)
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', os.cpu_count() or 1))
+    JOB_TIMEOUT = float(os.getenv('JOB_TIMEOUT', 300))
+    JOB_RESULT_TTL = float(os.getenv('JOB_RESULT_TTL', 600))
+    JOB_CANCEL_GRACE = float(os.getenv('JOB_CANCEL_GRACE', 10))
+
+    # Perturbation screens (knockout / over-expression)
+    SCREEN_WORKERS = int(os.getenv('SCREEN_WORKERS', os.cpu_count() or 1))
+    SCREEN_CHUNK_RUNS = int(os.getenv('SCREEN_CHUNK_RUNS', 256))
+
+    # Per-request profiling: send 'X-Profile: 1' to dump a cProfile of
+    # that request into PROFILE_DIR (disabled unless PROFILING_ENABLED)
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+
     # SocketIO
     SOCKETIO_ASYNC_MODE = 'threading'
 
@@ -0,0 +1,389 @@
+"""Simulation engines that step a compiled network's state."""
+import random
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import Config
+from network import CompiledNetwork
+from rule_engine import RuleEngine
+from scheduling import AsynchronousScheduler
+
+
+class PythonEngine:
+    """Reference synchronous engine using plain Python lists.
+
+    Rule: a node is ON if any activator is ON and no inhibitor is ON.
+    External nodes and nodes without regulators keep their state.
+    """
+
+    name = 'python'
+    deterministic = True
+
+    def __init__(self, network: CompiledNetwork):
+        """Initialize engine.
+
+        Args:
+            network: Compiled network to simulate
+        """
+        self.network = network
+        self._state: List[int] = [0] * network.size
+        self.nodes_evaluated = 0
+
+    def reset(self, vector: List[int]) -> None:
+        """Load an index-ordered 0/1 state vector."""
+        self._state = list(vector)
+
+    def vector(self) -> List[int]:
+        """Get the current state as an index-ordered list of 0/1."""
+        return list(self._state)
+
+    def packed(self) -> int:
+        """Get the current state packed into an int."""
+        return self.network.pack(self._state)
+
+    def step(self) -> None:
+        """Advance the state by one synchronous step."""
+        state = self._state
+        new_state = state[:]
+        activators = self.network.activators
+        inhibitors = self.network.inhibitors
+
+        for i in self.network.update_order:
+            has_activation = False
+            for source in activators[i]:
+                if state[source]:
+                    has_activation = True
+                    break
+            if not has_activation:
+                new_state[i] = 0
+                continue
+
+            has_inhibition = False
+            for source in inhibitors[i]:
+                if state[source]:
+                    has_inhibition = True
+                    break
+            new_state[i] = 0 if has_inhibition else 1
+
+        self._state = new_state
+        self.nodes_evaluated = len(self.network.update_order)
+
+
+class NumpyEngine:
+    """Vectorized synchronous engine.
+
+    State is a ``uint8`` vector; one step is two sparse mat-vec products
+    (active activator and inhibitor counts) followed by a mask that keeps
+    external and unregulated nodes fixed.
+    """
+
+    name = 'numpy'
+    deterministic = True
+
+    def __init__(self, network: CompiledNetwork):
+        """Initialize engine.
+
+        Args:
+            network: Compiled network to simulate
+        """
+        self.network = network
+        self._activation, self._inhibition, self._update_mask = network.sparse_matrices()
+        self._state = np.zeros(network.size, dtype=np.uint8)
+        self.nodes_evaluated = 0
+
+    def reset(self, vector: List[int]) -> None:
+        """Load an index-ordered 0/1 state vector."""
+        self._state = np.asarray(vector, dtype=np.uint8)
+
+    def vector(self) -> List[int]:
+        """Get the current state as an index-ordered list of 0/1."""
+        return self._state.tolist()
+
+    def packed(self) -> int:
+        """Get the current state packed into an int."""
+        return int.from_bytes(np.packbits(self._state, bitorder='little').tobytes(), 'little')
+
+    def step(self) -> None:
+        """Advance the state by one synchronous step."""
+        state = self._state
+        on = (self._activation @ state > 0) & (self._inhibition @ state == 0)
+        self._state = np.where(self._update_mask, on, state).astype(np.uint8)
+        self.nodes_evaluated = len(self.network.update_order)
+
+
+class BitsetEngine:
+    """Synchronous engine over a bit-packed state.
+
+    The whole state is one Python int (bit i = node i); each node is
+    updated with two bitwise ANDs against its precomputed regulator masks.
+    """
+
+    name = 'bitset'
+    deterministic = True
+
+    def __init__(self, network: CompiledNetwork):
+        """Initialize engine.
+
+        Args:
+            network: Compiled network to simulate
+        """
+        self.network = network
+        self._rules = [
+            (1 << i, network.activator_masks[i], network.inhibitor_masks[i])
+            for i in network.update_order
+        ]
+        self._state = 0
+        self.nodes_evaluated = 0
+
+    def reset(self, vector: List[int]) -> None:
+        """Load an index-ordered 0/1 state vector."""
+        self._state = self.network.pack(vector)
+
+    def vector(self) -> List[int]:
+        """Get the current state as an index-ordered list of 0/1."""
+        return self.network.unpack(self._state)
+
+    def packed(self) -> int:
+        """Get the current state packed into an int."""
+        return self._state
+
+    def step(self) -> None:
+        """Advance the state by one synchronous step."""
+        state = self._state
+        new_state = state & self.network.fixed_mask
+        for bit, activators, inhibitors in self._rules:
+            if state & activators and not state & inhibitors:
+                new_state |= bit
+        self._state = new_state
+        self.nodes_evaluated = len(self._rules)
+
+
+class IncrementalEngine:
+    """Synchronous engine that only re-evaluates nodes whose inputs changed.
+
+    After the first full step, only the downstream targets of nodes that
+    flipped in the previous step (from the out-adjacency index) can change,
+    so only those are evaluated. Pays off on sparse, low-activity networks
+    where most nodes settle after a few steps.
+    """
+
+    name = 'incremental'
+    deterministic = True
+
+    def __init__(self, network: CompiledNetwork):
+        """Initialize engine.
+
+        Args:
+            network: Compiled network to simulate
+        """
+        self.network = network
+        updatable = set(network.update_order)
+        self._dependents = [
+            tuple(sorted(set(targets) & updatable)) for targets in network.successors
+        ]
+        self._state: List[int] = [0] * network.size
+        self._packed = 0
+        self._changed: Optional[List[int]] = None  # None until the first step
+        self.nodes_evaluated = 0
+
+    def reset(self, vector: List[int]) -> None:
+        """Load an index-ordered 0/1 state vector."""
+        self._state = list(vector)
+        self._packed = self.network.pack(self._state)
+        self._changed = None
+
+    def vector(self) -> List[int]:
+        """Get the current state as an index-ordered list of 0/1."""
+        return list(self._state)
+
+    def packed(self) -> int:
+        """Get the current state packed into an int."""
+        return self._packed
+
+    def step(self) -> None:
+        """Advance the state by one synchronous step."""
+        if self._changed is None:
+            candidates = self.network.update_order
+        else:
+            dependents = self._dependents
+            candidates = {target for i in self._changed for target in dependents[i]}
+
+        state = self._state
+        activators = self.network.activators
+        inhibitors = self.network.inhibitors
+        # Evaluate everything against the old state before writing
+        changed = []
+        for i in candidates:
+            value = 1 if (
+                any(state[s] for s in activators[i]) and not any(state[s] for s in inhibitors[i])
+            ) else 0
+            if value != state[i]:
+                changed.append(i)
+
+        flipped = 0
+        for i in changed:
+            state[i] ^= 1
+            flipped |= 1 << i
+        self._packed ^= flipped
+        self._changed = changed
+        self.nodes_evaluated = len(candidates)
+
+
+class AsynchronousEngine(AsynchronousScheduler):
+    """Event-driven asynchronous engine.
+
+    Each node keeps counts of its active activators and inhibitors, so
+    evaluating it is O(1); when a node flips only its dependents' counts
+    are touched. The set of *unstable* nodes (current value differs from
+    what the rule says) is kept up to date, so ticks that would change
+    nothing cost nothing. See ``AsynchronousScheduler`` for the modes.
+    """
+
+    name = 'asynchronous'
+    deterministic = False
+
+    def __init__(self, network: CompiledNetwork, mode: str = 'random_order',
+                 seed: Optional[int] = None):
+        """Initialize engine.
+
+        Args:
+            network: Compiled network to simulate
+            mode: 'random_order' or 'random_node'
+            seed: Seed for the random number generator
+
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown async_mode '{mode}'. Choose from: {', '.join(self.MODES)}")
+        self.network = network
+        self.mode = mode
+        self._rng = random.Random(seed)
+
+        n = network.size
+        self._updatable = [False] * n
+        for i in network.update_order:
+            self._updatable[i] = True
+        activated: List[List[int]] = [[] for _ in range(n)]
+        inhibited: List[List[int]] = [[] for _ in range(n)]
+        for target in network.update_order:
+            for source in network.activators[target]:
+                activated[source].append(target)
+            for source in network.inhibitors[target]:
+                inhibited[source].append(target)
+        self._activated = activated
+        self._inhibited = inhibited
+        self._dependents = [sorted(set(a) | set(h)) for a, h in zip(activated, inhibited)]
+
+        self._state: List[int] = [0] * n
+        self._active_activators = [0] * n
+        self._active_inhibitors = [0] * n
+        self._unstable: List[int] = []
+        self._position: Dict[int, int] = {}
+        self.nodes_evaluated = 0
+
+    def reset(self, vector: List[int]) -> None:
+        """Load an index-ordered 0/1 state vector."""
+        network = self.network
+        self._state = list(vector)
+        self._active_activators = [
+            sum(self._state[s] for s in sources) for sources in network.activators
+        ]
+        self._active_inhibitors = [
+            sum(self._state[s] for s in sources) for sources in network.inhibitors
+        ]
+        self._reset_unstable()
+
+    def vector(self) -> List[int]:
+        """Get the current state as an index-ordered list of 0/1."""
+        return list(self._state)
+
+    def packed(self) -> int:
+        """Get the current state packed into an int."""
+        return self.network.pack(self._state)
+
+    def is_fixed_point(self) -> bool:
+        """True if no node would change under its update rule."""
+        return not self._unstable
+
+    def step(self) -> None:
+        """Advance the state by one asynchronous step."""
+        self.nodes_evaluated = 0
+        self._asynchronous_step()
+
+    def _flip(self, i: int) -> List[int]:
+        """Flip node ``i`` and return dependents that became unstable."""
+        value = 1 - self._state[i]
+        self._state[i] = value
+        delta = 1 if value else -1
+        for target in self._activated[i]:
+            self._active_activators[target] += delta
+        for target in self._inhibited[i]:
+            self._active_inhibitors[target] += delta
+        self.nodes_evaluated += 1 + len(self._activated[i]) + len(self._inhibited[i])
+
+        self._refresh(i)
+        return [target for target in self._dependents[i] if self._refresh(target)]
+
+    def _disagrees(self, i: int) -> bool:
+        target = 1 if self._active_activators[i] and not self._active_inhibitors[i] else 0
+        return target != self._state[i]
+
+
+ENGINES = {
+    BitsetEngine.name: BitsetEngine,
+    IncrementalEngine.name: IncrementalEngine,
+    PythonEngine.name: PythonEngine,
+    NumpyEngine.name: NumpyEngine,
+}
+
+
+def create_engine(network: CompiledNetwork, params: Dict):
+    """Create the engine requested by simulation parameters.
+
+    Args:
+        network: Compiled network to simulate
+        params: Simulation parameters. ``update_scheme`` is 'synchronous'
+            (default) or 'asynchronous'. Synchronous runs use ``engine``
+            ('bitset', 'incremental', 'python' or 'numpy', default
+            'bitset');
+            asynchronous runs use ``async_mode`` ('random_order' or
+            'random_node', default 'random_order') and ``seed``.
+            Networks with compiled ``rules`` always use ``RuleEngine``.
+
+    Returns:
+        Engine instance
+
+    Raises:
+        ValueError: If the scheme, engine or async mode is unknown
+    """
+    scheme = params.get('update_scheme', 'synchronous')
+    if network.rules is not None:
+        # Conditions and dominance are only understood by the rule engine
+        if scheme not in ('synchronous', 'asynchronous'):
+            raise ValueError(
+                f"Unknown update_scheme '{scheme}'. Choose from: synchronous, asynchronous"
+            )
+        return RuleEngine(
+            network,
+            asynchronous=scheme == 'asynchronous',
+            mode=params.get('async_mode', 'random_order'),
+            seed=params.get('seed'),
+            table_inputs=Config.TRUTH_TABLE_MAX_INPUTS
+        )
+    if scheme == 'asynchronous':
+        return AsynchronousEngine(
+            network,
+            mode=params.get('async_mode', 'random_order'),
+            seed=params.get('seed')
+        )
+    if scheme != 'synchronous':
+        raise ValueError(
+            f"Unknown update_scheme '{scheme}'. Choose from: synchronous, asynchronous"
+        )
+
+    name = params.get('engine', BitsetEngine.name)
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine '{name}'. Choose from: {', '.join(ENGINES)}")
+    return ENGINES[name](network)
@@ -0,0 +1,221 @@
+"""Structural graph algorithms for regulatory networks."""
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from network import CompiledNetwork
+
+Graph = Dict[int, Set[int]]
+
+# Search steps between calls to an enumeration's ``check`` callback
+CHECK_EVERY = 4096
+
+
+def strongly_connected_components(graph: Graph) -> List[List[int]]:
+    """Tarjan's algorithm, iterative (no recursion limit).
+
+    Args:
+        graph: Node -> set of successor nodes; every successor must also
+            be a key
+
+    Returns:
+        Components as lists of nodes, in reverse topological order
+    """
+    index: Dict[int, int] = {}
+    low: Dict[int, int] = {}
+    stack: List[int] = []
+    on_stack: Set[int] = set()
+    components = []
+    counter = 0
+
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root]))]
+
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = low[successor] = counter
+                    counter += 1
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph[successor])))
+                    break
+                if successor in on_stack:
+                    low[node] = min(low[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+    return components
+
+
+def elementary_cycles(graph: Graph, max_length: Optional[int] = None,
+                      check: Optional[Callable[[], None]] = None) -> Iterator[List[int]]:
+    """Enumerate elementary cycles with Johnson's algorithm, iteratively.
+
+    The search is scoped to one strongly connected component at a time:
+    for each component the cycles through its smallest node are listed,
+    that node is removed and the remainder is decomposed again.
+
+    Args:
+        graph: Node -> set of successor nodes
+        max_length: Skip cycles with more than this many nodes
+        check: Optional callback invoked per component and every
+            CHECK_EVERY search steps, even while no cycle is found; it
+            may raise to abandon the search (e.g. on cancellation)
+
+    Yields:
+        Cycles as lists of nodes (first node not repeated)
+    """
+    # Self-loops are cycles of length 1; Johnson's search runs without them
+    graph = {node: set(successors) for node, successors in graph.items()}
+    for node, successors in graph.items():
+        if node in successors:
+            successors.discard(node)
+            yield [node]
+
+    if max_length is not None and max_length < 2:
+        return
+
+    pending = [c for c in strongly_connected_components(graph) if len(c) > 1]
+    while pending:
+        if check:
+            check()
+        component = set(pending.pop())
+        start = min(component)
+        subgraph = {node: graph[node] & component for node in component}
+        yield from _cycles_through(start, subgraph, max_length, check)
+
+        component.discard(start)
+        remainder = {node: graph[node] & component for node in component}
+        pending.extend(
+            c for c in strongly_connected_components(remainder) if len(c) > 1
+        )
+
+
+def _cycles_through(start: int, graph: Graph, max_length: Optional[int],
+                    check: Optional[Callable[[], None]] = None) -> Iterator[List[int]]:
+    """Johnson's circuit search for cycles through ``start``."""
+    path = [start]
+    blocked = {start}
+    blocked_by: Dict[int, Set[int]] = defaultdict(set)
+    closed: Set[int] = set()
+    stack = [(start, iter(graph[start]))]
+    visits = 0
+
+    while stack:
+        visits += 1
+        if check and visits % CHECK_EVERY == 0:
+            check()
+        node, successors = stack[-1]
+        for successor in successors:
+            if successor == start:
+                yield path[:]
+                closed.update(path)
+            elif successor not in blocked:
+                if max_length is not None and len(path) >= max_length:
+                    # Cut off by length: treat as closed so nothing on the
+                    # path stays blocked on the strength of a partial search.
+                    closed.update(path)
+                    continue
+                path.append(successor)
+                stack.append((successor, iter(graph[successor])))
+                closed.discard(successor)
+                blocked.add(successor)
+                break
+        else:
+            if node in closed:
+                _unblock(node, blocked, blocked_by)
+            else:
+                for successor in graph[node]:
+                    blocked_by[successor].add(node)
+            stack.pop()
+            path.pop()
+
+
+def _unblock(node: int, blocked: Set[int], blocked_by: Dict[int, Set[int]]) -> None:
+    pending = {node}
+    while pending:
+        current = pending.pop()
+        if current in blocked:
+            blocked.discard(current)
+            pending.update(blocked_by[current])
+            blocked_by[current].clear()
+
+
+def find_feedback_loops(
+    network: CompiledNetwork,
+    max_length: Optional[int] = None,
+    max_count: Optional[int] = None
+) -> Iterator[Dict]:
+    """Enumerate feedback loops of a network and classify their sign.
+
+    A loop is 'positive' with an even number of inhibitions and 'negative'
+    with an odd number. A loop through a pair of nodes joined by both an
+    activation and an inhibition is 'mixed'; one using an edge of any
+    other type is 'unsigned'.
+
+    Args:
+        network: Compiled network
+        max_length: Longest loop (in edges) to report
+        max_count: Stop after this many loops
+
+    Yields:
+        {'nodes': [id, ..., id], 'length': int, 'sign': str}; ``nodes``
+        repeats the first node at the end
+    """
+    graph = {node: set(successors) for node, successors in enumerate(network.successors)}
+    signs = edge_signs(network)
+    node_ids = network.node_ids
+
+    for count, cycle in enumerate(elementary_cycles(graph, max_length)):
+        if max_count is not None and count >= max_count:
+            return
+        yield {
+            'nodes': [node_ids[i] for i in cycle] + [node_ids[cycle[0]]],
+            'length': len(cycle),
+            'sign': loop_sign(cycle, signs)
+        }
+
+
+def edge_signs(network: CompiledNetwork) -> Dict[tuple, Set[int]]:
+    """(source, target) -> set of edge signs (+1 activation, -1 inhibition)."""
+    signs: Dict[tuple, Set[int]] = defaultdict(set)
+    for target, sources in enumerate(network.activators):
+        for source in sources:
+            signs[(source, target)].add(1)
+    for target, sources in enumerate(network.inhibitors):
+        for source in sources:
+            signs[(source, target)].add(-1)
+    return signs
+
+
+def loop_sign(cycle: Iterable[int], signs: Dict[tuple, Set[int]]) -> str:
+    """Classify a cycle (first node not repeated) by the signs of its edges."""
+    cycle = list(cycle)
+    product = 1
+    for source, target in zip(cycle, cycle[1:] + cycle[:1]):
+        pair = signs.get((source, target))
+        if not pair:
+            return 'unsigned'
+        if len(pair) > 1:
+            return 'mixed'
+        product *= next(iter(pair))
+    return 'positive' if product > 0 else 'negative'
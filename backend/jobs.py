@@ -0,0 +1,323 @@
+"""Background jobs for CPU-heavy simulation and analysis.
+
+Jobs run in a bounded ``ProcessPoolExecutor`` so a long computation does
+not hold the GIL of the web process. Each task receives a snapshot of the
+model and runs it in a private ``ModelService``; progress and start
+notifications come back through a manager queue, and cancellation (or a
+timeout) is signalled through a shared dict that the task checks every
+time it reports progress, so a running job stops at its next progress
+report rather than immediately. A job that is still running
+``cancel_grace`` seconds after being flagged is stopped by recycling the
+pool: its worker processes are killed and the other jobs that were on
+them are resubmitted to a fresh pool.
+"""
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional, Set
+
+from config import Config
+
+JOB_KINDS = ('simulate', 'analyze', 'attractors', 'sweep')
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job was cancelled or timed out."""
+
+
+def _execute(job_id: str, kind: str, model: Dict, params: Dict, events, cancelled) -> Dict:
+    """Pool task: run one job against a model snapshot."""
+    from model_service import ModelService
+
+    # Already inside a worker process: don't fan out into another pool
+    Config.ATTRACTOR_WORKERS = 1
+
+    if cancelled.get(job_id):
+        raise JobCancelled()
+    events.put(('started', job_id))
+    service = ModelService()
+    service.store.insert(model)
+
+    def progress(phase, done, total):
+        if cancelled.get(job_id):
+            raise JobCancelled()
+        events.put(('progress', job_id, phase, done, total))
+
+    if kind == 'simulate':
+        return service.simulate(model['id'], params, progress)
+    if kind == 'analyze':
+        return service.analyze(model['id'], params, progress)
+    if kind == 'sweep':
+        return service.sweep(model['id'], params, progress)
+    return service.attractors(model['id'], params, progress)
+
+
+class JobManager:
+    """Submit, track, cancel and expire background jobs."""
+
+    def __init__(self, max_workers: int, timeout: float, result_ttl: float,
+                 cancel_grace: float = 10.0,
+                 on_event: Optional[Callable[[str, Dict, str], None]] = None):
+        """Initialize manager. Worker processes start on first submit.
+
+        Args:
+            max_workers: Size of the process pool
+            timeout: Seconds a job may run before it is cancelled
+            result_ttl: Seconds finished jobs are kept for retrieval
+            cancel_grace: Seconds a cancelled or timed-out job may keep
+                running before its worker is killed
+            on_event: Callback ``(event_name, payload, room)`` for progress
+                and completion events of jobs submitted with a room
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.result_ttl = result_ttl
+        self.cancel_grace = cancel_grace
+        self.on_event = on_event
+        self._jobs: Dict[str, Dict] = {}
+        self._tasks: Dict[str, tuple] = {}  # job_id -> (kind, model, params)
+        self._rooms: Dict[str, str] = {}  # job_id -> where to send its events
+        self._futures = {}
+        self._flagged: Dict[str, float] = {}  # job_id -> time cancel/timeout was flagged
+        self._retired: Set[str] = set()  # jobs lost with a recycled pool, to resubmit
+        self._lock = threading.Lock()
+        self._pool = None
+        self._manager = None
+        self._events = None
+        self._cancelled = None
+
+    def submit(self, kind: str, model: Dict, params: Dict, room: Optional[str] = None) -> Dict:
+        """Queue a job.
+
+        Args:
+            kind: 'simulate', 'analyze', 'attractors' or 'sweep'
+            model: Model to run against (a snapshot is sent to the worker)
+            params: Parameters for the corresponding ModelService method
+            room: Socket.IO room (e.g. the submitter's sid) that receives
+                the job's events; without one no events are sent
+
+        Returns:
+            Public view of the new job
+
+        Raises:
+            ValueError: If the job kind is unknown
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}'. Choose from: {', '.join(JOB_KINDS)}")
+        self._ensure_started()
+        self._expire()
+
+        job_id = str(uuid.uuid4())
+        job = {
+            'id': job_id,
+            'kind': kind,
+            'model_id': model['id'],
+            'model_version': model['version'],
+            'status': 'queued',
+            'progress': None,
+            'result': None,
+            'error': None,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._tasks[job_id] = (kind, model, params)
+            if room:
+                self._rooms[job_id] = room
+        self._start(job_id)
+        return self._public(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Public view of a job, or None if unknown or expired."""
+        self._expire()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._public(job) if job else None
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Cancel a queued or running job.
+
+        Returns:
+            Public view of the job, or None if unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            future = None
+            if job['status'] in ('queued', 'running'):
+                self._cancelled[job_id] = 'cancelled'
+                self._flagged.setdefault(job_id, time.time())
+                future = self._futures.get(job_id)
+        # Outside the lock: cancelling a queued future runs _finish at once
+        if future is not None:
+            future.cancel()
+        with self._lock:
+            return self._public(job)
+
+    def shutdown(self) -> None:
+        """Stop the worker pool and helper threads."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._events.put(None)
+            self._manager.shutdown()
+            self._pool = None
+
+    # Internals
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                return
+            self._manager = multiprocessing.Manager()
+            self._events = self._manager.Queue()
+            self._cancelled = self._manager.dict()
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            threading.Thread(target=self._drain_events, daemon=True).start()
+            threading.Thread(target=self._watchdog, daemon=True).start()
+
+    def _start(self, job_id: str) -> None:
+        """Submit a job's task to the current pool."""
+        with self._lock:
+            kind, model, params = self._tasks[job_id]
+            future = self._pool.submit(
+                _execute, job_id, kind, model, params, self._events, self._cancelled
+            )
+            self._futures[job_id] = future
+        # Outside the lock: on an already finished future the callback runs
+        # at once, and _finish takes the lock
+        future.add_done_callback(lambda f, job_id=job_id: self._finish(job_id, f))
+
+    def _drain_events(self) -> None:
+        """Relay worker start/progress messages to job records and listeners."""
+        events = self._events
+        while True:
+            try:
+                message = events.get()
+            except (EOFError, OSError):
+                return
+            if message is None:
+                return
+
+            job_id = message[1]
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job['finished_at'] is not None:
+                    continue
+                if message[0] == 'started':
+                    job['status'] = 'running'
+                    job['started_at'] = time.time()
+                    continue
+                _, _, phase, done, total = message
+                job['progress'] = {'phase': phase, 'done': done, 'total': total}
+                room = self._rooms.get(job_id)
+            self._emit('job_progress', {'job_id': job_id, **job['progress']}, room)
+
+    def _watchdog(self) -> None:
+        """Flag running jobs that exceed the timeout; recycle the pool
+        when a flagged job outlives the grace period."""
+        while self._pool is not None:
+            time.sleep(1.0)
+            now = time.time()
+            overdue = False
+            with self._lock:
+                for job_id, job in self._jobs.items():
+                    if job['status'] != 'running':
+                        continue
+                    if job_id not in self._cancelled and now - job['started_at'] > self.timeout:
+                        self._cancelled[job_id] = 'timeout'
+                        self._flagged[job_id] = now
+                    flagged = self._flagged.get(job_id)
+                    if flagged is not None and now - max(flagged, job['started_at']) > self.cancel_grace:
+                        # Killed below; its future fails once the pool notices
+                        self._flagged[job_id] = float('inf')
+                        overdue = True
+            if overdue:
+                self._recycle()
+
+    def _recycle(self) -> None:
+        """Replace the pool and kill its workers.
+
+        Jobs on the old pool that were not flagged fail with
+        BrokenProcessPool and are resubmitted by _finish.
+        """
+        with self._lock:
+            old = self._pool
+            if old is None:
+                return
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            self._retired.update(job_id for job_id in self._futures if job_id not in self._flagged)
+            # No public API to stop a running task before Python 3.14
+            processes = list((old._processes or {}).values())
+        for process in processes:
+            process.kill()
+        old.shutdown(wait=False)
+
+    def _finish(self, job_id: str, future) -> None:
+        broken = not future.cancelled() and isinstance(future.exception(), BrokenProcessPool)
+        with self._lock:
+            self._futures.pop(job_id, None)
+            job = self._jobs.get(job_id)
+            resubmit = job is not None and broken and job_id in self._retired
+            self._retired.discard(job_id)
+            if resubmit:
+                # Lost with a recycled pool through no fault of its own
+                job.update(status='queued', progress=None, started_at=None)
+            else:
+                self._tasks.pop(job_id, None)
+                self._flagged.pop(job_id, None)
+        if resubmit:
+            self._start(job_id)
+            return
+
+        with self._lock:
+            if job is None:
+                self._rooms.pop(job_id, None)
+                return
+            reason = self._cancelled.get(job_id)
+            job['finished_at'] = time.time()
+            try:
+                job['result'] = future.result()
+                job['status'] = 'completed'
+            except Exception as e:
+                # A flagged job's worker may have been killed after the grace period
+                if isinstance(e, (JobCancelled, CancelledError)) or (broken and reason):
+                    job['status'] = reason or 'cancelled'
+                    job['error'] = f'Job exceeded {self.timeout}s' if reason == 'timeout' else None
+                else:
+                    job['status'] = 'failed'
+                    job['error'] = str(e)
+            self._cancelled.pop(job_id, None)
+            room = self._rooms.pop(job_id, None)
+            payload = {'job_id': job_id, 'status': job['status'], 'error': job['error']}
+        self._emit('job_complete', payload, room)
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            for job_id in [
+                job_id for job_id, job in self._jobs.items()
+                if job['finished_at'] is not None and job['finished_at'] < cutoff
+            ]:
+                del self._jobs[job_id]
+
+    def _emit(self, event: str, payload: Dict, room: Optional[str]) -> None:
+        if self.on_event and room:
+            self.on_event(event, payload, room)
+
+    @staticmethod
+    def _public(job: Dict) -> Dict:
+        return dict(job)
+
+
+job_manager = JobManager(
+    max_workers=Config.JOB_WORKERS,
+    timeout=Config.JOB_TIMEOUT,
+    result_ttl=Config.JOB_RESULT_TTL,
+    cancel_grace=Config.JOB_CANCEL_GRACE
+)
@@ -0,0 +1,165 @@
+"""Exhaustive attractor landscape of small synchronous Boolean networks."""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from batch import step_matrix, step_states
+from network import CompiledNetwork
+
+# Worker-process globals, set once per process by _init_worker
+_worker = {}
+
+
+def _init_worker(context: Dict) -> None:
+    _worker.update(context)
+    if _worker.get('model') is not None:
+        # Compiled rules are closures, so each worker compiles its own network
+        _worker['network'] = CompiledNetwork(_worker.pop('model'))
+
+
+def _successors(start: int, stop: int) -> np.ndarray:
+    """Pool task: successor indices for ``[start, stop)``."""
+    return _successor_chunk(_worker, start, stop)
+
+
+def _successor_chunk(context: Dict, start: int, stop: int) -> np.ndarray:
+    """Compute successor indices for state indices ``[start, stop)``."""
+    free = context['free']
+    shifts = np.arange(free.size, dtype=np.int64)
+
+    indices = np.arange(start, stop, dtype=np.int64)
+    states = np.repeat(context['base'][None, :], stop - start, axis=0)
+    states[:, free] = (indices[:, None] >> shifts) & 1
+
+    if context.get('network') is not None:
+        following = step_states(context['network'], states)
+    else:
+        following = step_matrix(
+            context['activation'], context['inhibition'], context['update_mask'], states
+        )
+    return (following[:, free].astype(np.int64) << shifts).sum(axis=1).astype(np.uint32)
+
+
+def compute_landscape(
+    network: CompiledNetwork,
+    base_vector: List[int],
+    chunk_size: int,
+    workers: int,
+    max_reported: int,
+    progress: Optional[Callable[[str, int, int], None]] = None,
+    model: Optional[Dict] = None
+) -> Dict:
+    """Enumerate every state of the non-external nodes and find all attractors.
+
+    External nodes are held at their values in ``base_vector``. The
+    successor of each of the 2^n states is computed in chunks (across a
+    process pool when there is more than one chunk); basins are then
+    assigned by pointer doubling on the successor array, which leaves
+    every state pointing at a state on its attractor cycle together with
+    the smallest state index on that cycle.
+
+    Args:
+        network: Compiled network
+        base_vector: Index-ordered 0/1 vector supplying external node values
+        chunk_size: Number of states per work unit
+        workers: Maximum worker processes
+        max_reported: Maximum number of attractors listed in full
+        progress: Optional callback ``(phase, done, total)``
+        model: Model the network was compiled from; needed to spread a
+            rule network across the pool (workers compile their own)
+
+    Returns:
+        Landscape summary with attractors sorted by basin size
+    """
+    free = np.array(
+        [i for i in range(network.size) if not network.external[i]], dtype=np.int64
+    )
+    state_count = 1 << free.size
+    base = np.asarray(base_vector, dtype=np.uint8)
+    activation, inhibition, update_mask = network.sparse_matrices()
+    context = {
+        'activation': activation,
+        'inhibition': inhibition,
+        'update_mask': update_mask,
+        'base': base,
+        'free': free,
+        'network': network if network.rules is not None else None,
+    }
+
+    # Phase 1: successor array over the full state space
+    successors = np.empty(state_count, dtype=np.uint32)
+    chunks = [(start, min(start + chunk_size, state_count))
+              for start in range(0, state_count, chunk_size)]
+    done = 0
+    if len(chunks) == 1 or workers <= 1 or (network.rules is not None and model is None):
+        for start, stop in chunks:
+            successors[start:stop] = _successor_chunk(context, start, stop)
+            done += stop - start
+            if progress:
+                progress('successors', done, state_count)
+    else:
+        # Compiled rules cannot be pickled: send the model instead
+        shipped = {**context, 'network': None, 'model': model} if network.rules is not None else context
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            initializer=_init_worker,
+            initargs=(shipped,)
+        ) as pool:
+            futures = {pool.submit(_successors, start, stop): (start, stop)
+                       for start, stop in chunks}
+            for future in as_completed(futures):
+                start, stop = futures[future]
+                successors[start:stop] = future.result()
+                done += stop - start
+                if progress:
+                    progress('successors', done, state_count)
+
+    # Phase 2: pointer doubling. After k rounds ``jump`` is f^(2^k) and
+    # ``lowest[s]`` is the minimum state index over s, f(s), ..., f^(2^k - 1)(s).
+    jump = successors.copy()
+    lowest = np.arange(state_count, dtype=np.uint32)
+    rounds = max(1, free.size)
+    for round_number in range(rounds):
+        lowest = np.minimum(lowest, lowest[jump])
+        jump = jump[jump]
+        if progress:
+            progress('basins', round_number + 1, rounds)
+
+    # 2^n jumps always land on the cycle; the minimum along a walk that
+    # starts on the cycle is the cycle's canonical representative.
+    representatives = lowest[jump]
+    cycle_ids, basin_sizes = np.unique(representatives, return_counts=True)
+    order = np.argsort(-basin_sizes, kind='stable')
+
+    attractors = []
+    for rank in order[:max_reported]:
+        start = int(cycle_ids[rank])
+        cycle = [start]
+        current = int(successors[start])
+        while current != start:
+            cycle.append(current)
+            current = int(successors[current])
+
+        states = []
+        for index in cycle:
+            vector = base.copy()
+            vector[free] = (index >> np.arange(free.size)) & 1
+            states.append(network.state_dict(vector.tolist()))
+
+        basin_size = int(basin_sizes[rank])
+        attractors.append({
+            'id': len(attractors),
+            'period': len(cycle),
+            'basin_size': basin_size,
+            'basin_fraction': basin_size / state_count,
+            'states': states
+        })
+
+    return {
+        'free_node_count': int(free.size),
+        'state_count': state_count,
+        'attractor_count': int(cycle_ids.size),
+        'attractors': attractors,
+        'truncated': int(cycle_ids.size) > max_reported
+    }
@@ -0,0 +1,206 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+A small, dependency-free subset of the Prometheus client: labelled
+counters, gauges and histograms plus callback metrics whose values are
+read at scrape time (e.g. the result cache's own hit counters). Values
+are per process; work done in job or pool worker processes is not
+included.
+"""
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Latency buckets in seconds, from sub-millisecond to a minute
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Metric:
+    """Base class: a named metric family with fixed label names."""
+
+    type = 'untyped'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        """Exposition lines for this family, including HELP and TYPE."""
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}'] + list(
+            self._samples()
+        )
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def _labels(self, values: LabelValues, extra: Dict[str, str] = None) -> str:
+        pairs = list(zip(self.label_names, values)) + list((extra or {}).items())
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+class Counter(Metric):
+    """Monotonically increasing value per label set."""
+
+    type = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, *labels: str) -> None:
+        """Add ``amount`` to the series for ``labels``."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f'{self.name}{self._labels(labels)} {_format(value)}'
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    type = 'gauge'
+
+    def dec(self, amount: float = 1.0, *labels: str) -> None:
+        """Subtract ``amount`` from the series for ``labels``."""
+        self.inc(-amount, *labels)
+
+    def set(self, value: float, *labels: str) -> None:
+        """Set the series for ``labels`` to ``value``."""
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    """Cumulative bucket counts, sum and count per label set."""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, list] = {}  # labels -> [bucket counts, sum, count]
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record one observation for ``labels``."""
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((labels, ([*s[0]], s[1], s[2])) for labels, s in self._series.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{self._labels(labels, {"le": _format(bound)})} {cumulative}'
+            yield f'{self.name}_bucket{self._labels(labels, {"le": "+Inf"})} {count}'
+            yield f'{self.name}_sum{self._labels(labels)} {_format(total)}'
+            yield f'{self.name}_count{self._labels(labels)} {count}'
+
+
+class CallbackMetric(Metric):
+    """Metric whose samples are read from a callback at scrape time."""
+
+    def __init__(self, name: str, help_text: str, metric_type: str,
+                 read: Callable[[], Dict[LabelValues, float]], labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self.type = metric_type
+        self._read = read
+
+    def _samples(self):
+        for labels, value in sorted(self._read().items()):
+            yield f'{self.name}{self._labels(labels)} {_format(value)}'
+
+
+class Registry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """Add (or replace) a metric family; returns it for assignment."""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Full exposition text."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(line for metric in metrics for line in metric.render()) + '\n'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+registry = Registry()
+
+http_request_seconds = registry.register(Histogram(
+    'cellquest_http_request_duration_seconds',
+    'Time to produce a response (streamed bodies excluded)',
+    ('method', 'route', 'status')
+))
+http_request_bytes = registry.register(Counter(
+    'cellquest_http_request_bytes_total', 'Request body bytes received', ('method', 'route')
+))
+http_response_bytes = registry.register(Counter(
+    'cellquest_http_response_bytes_total',
+    'Response body bytes sent (streamed bodies excluded)',
+    ('method', 'route')
+))
+simulation_runs = registry.register(Counter(
+    'cellquest_simulations_total', 'Simulations run', ('engine',)
+))
+simulation_steps = registry.register(Counter(
+    'cellquest_simulation_steps_total', 'Simulation steps taken (replicates included)', ('engine',)
+))
+simulation_seconds = registry.register(Counter(
+    'cellquest_simulation_seconds_total', 'Time spent stepping simulations', ('engine',)
+))
+simulation_steps_per_second = registry.register(Histogram(
+    'cellquest_simulation_steps_per_second', 'Throughput of individual simulations', ('engine',),
+    buckets=(10, 100, 1e3, 1e4, 1e5, 1e6, 1e7)
+))
+nodes_evaluated = registry.register(Counter(
+    'cellquest_nodes_evaluated_total', 'Node update rules evaluated', ('engine',)
+))
+active_socket_simulations = registry.register(Gauge(
+    'cellquest_active_socket_simulations', 'Socket.IO simulations currently running'
+))
+
+
+def record_simulation(engine: str, steps: int, seconds: float, evaluated: int) -> None:
+    """Record one finished simulation run."""
+    simulation_runs.inc(1, engine)
+    simulation_steps.inc(steps, engine)
+    simulation_seconds.inc(seconds, engine)
+    nodes_evaluated.inc(evaluated, engine)
+    if seconds > 0 and steps:
+        simulation_steps_per_second.observe(steps / seconds, engine)
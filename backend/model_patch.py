@@ -0,0 +1,187 @@
+"""Fine-grained node and edge operations behind ``PATCH /api/models/<id>``.
+
+Operations are applied in order to a model snapshot and produce new node
+and edge lists (a list no operation touched is the snapshot's own list)
+plus a change set, which lets compiled networks and structural indexes
+be updated instead of rebuilt:
+
+    {'op': 'add', 'node': {...}}
+    {'op': 'remove', 'node': 'node_id'}      # also removes its edges
+    {'op': 'modify', 'node': 'node_id', 'changes': {...}}
+    {'op': 'add', 'edge': {...}}
+    {'op': 'remove', 'edge': selector}
+    {'op': 'modify', 'edge': selector, 'changes': {...}}
+
+An edge selector is ``{'id': ...}`` or ``{'source', 'target'[, 'type']}``
+and matches the first such edge.
+"""
+from typing import Dict, List, Optional, Tuple
+
+OPERATIONS = ('add', 'remove', 'modify')
+
+
+def apply_operations(model: Dict, operations: List[Dict]) -> Tuple[List[Dict], List[Dict], Dict]:
+    """Apply operations to a model's nodes and edges without mutating it.
+
+    Args:
+        model: Model snapshot with 'nodes' and 'edges'
+        operations: Operations as described in the module docstring
+
+    Returns:
+        Tuple of (nodes, edges, changes); ``changes`` holds the net
+        'removed_nodes', 'added_nodes', 'removed_edges' and 'added_edges'
+        entries (a modification is a removal plus an addition)
+
+    Raises:
+        ValueError: If an operation is malformed or refers to a missing
+            node or edge
+    """
+    if not isinstance(operations, list) or not operations:
+        raise ValueError('operations must be a non-empty list')
+
+    patch = _Patch(model)
+    for position, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in OPERATIONS:
+            raise ValueError(
+                f"Operation {position}: 'op' must be one of {', '.join(OPERATIONS)}"
+            )
+        try:
+            if 'node' in operation:
+                patch.node(operation)
+            elif 'edge' in operation:
+                patch.edge(operation)
+            else:
+                raise ValueError("needs a 'node' or an 'edge'")
+        except ValueError as e:
+            raise ValueError(f'Operation {position}: {e}')
+    return patch.nodes, patch.edges, patch.changes
+
+
+class _Patch:
+    """Copy-on-write node and edge lists plus the net change set."""
+
+    def __init__(self, model: Dict):
+        self.nodes = model['nodes']
+        self.edges = model['edges']
+        self._nodes_copied = False
+        self._edges_copied = False
+        self.changes = {'removed_nodes': [], 'added_nodes': [], 'removed_edges': [], 'added_edges': []}
+
+    def node(self, operation: Dict) -> None:
+        op = operation['op']
+        if op == 'add':
+            node = operation['node']
+            if not isinstance(node, dict) or not isinstance(node.get('id'), str):
+                raise ValueError("a new node needs a string 'id'")
+            if self._find_node(node['id']) is not None:
+                raise ValueError(f"node '{node['id']}' already exists")
+            self._writable_nodes().append(node)
+            self._added('nodes', node)
+            return
+
+        position = self._find_node(operation['node'])
+        if position is None:
+            raise ValueError(f"unknown node '{operation['node']}'")
+        old = self.nodes[position]
+        if op == 'remove':
+            del self._writable_nodes()[position]
+            self._removed('nodes', old)
+            for edge in [e for e in self.edges if old['id'] in (e['source'], e['target'])]:
+                self._remove_edge(edge)
+            return
+
+        changes = _changes(operation)
+        if changes.get('id', old['id']) != old['id']:
+            raise ValueError('node ids cannot be modified; remove and add the node instead')
+        node = {**old, **changes}
+        self._writable_nodes()[position] = node
+        self._removed('nodes', old)
+        self._added('nodes', node)
+
+    def edge(self, operation: Dict) -> None:
+        op = operation['op']
+        if op == 'add':
+            edge = operation['edge']
+            _check_edge(edge)
+            self._writable_edges().append(edge)
+            self._added('edges', edge)
+            return
+
+        position = self._find_edge(operation['edge'])
+        old = self.edges[position]
+        if op == 'remove':
+            self._remove_edge(old)
+            return
+
+        edge = {**old, **_changes(operation)}
+        _check_edge(edge)
+        self._writable_edges()[position] = edge
+        self._removed('edges', old)
+        self._added('edges', edge)
+
+    def _remove_edge(self, edge: Dict) -> None:
+        edges = self._writable_edges()
+        del edges[next(i for i, e in enumerate(edges) if e is edge)]
+        self._removed('edges', edge)
+
+    def _added(self, kind: str, item: Dict) -> None:
+        self.changes['added_' + kind].append(item)
+
+    def _removed(self, kind: str, item: Dict) -> None:
+        # Removing something this patch added cancels out
+        added = self.changes['added_' + kind]
+        for i, entry in enumerate(added):
+            if entry is item:
+                del added[i]
+                return
+        self.changes['removed_' + kind].append(item)
+
+    def _find_node(self, node_id) -> Optional[int]:
+        for i, node in enumerate(self.nodes):
+            if node['id'] == node_id:
+                return i
+        return None
+
+    def _find_edge(self, selector) -> int:
+        if not isinstance(selector, dict):
+            raise ValueError("an edge selector must be an object with 'id' or 'source' and 'target'")
+        if 'id' in selector:
+            matches = (i for i, e in enumerate(self.edges) if e.get('id') == selector['id'])
+        elif 'source' in selector and 'target' in selector:
+            matches = (
+                i for i, e in enumerate(self.edges)
+                if e['source'] == selector['source'] and e['target'] == selector['target']
+                and ('type' not in selector or e.get('type') == selector['type'])
+            )
+        else:
+            raise ValueError("an edge selector needs 'id' or 'source' and 'target'")
+        position = next(matches, None)
+        if position is None:
+            raise ValueError(f'no edge matches {selector}')
+        return position
+
+    def _writable_nodes(self) -> List[Dict]:
+        if not self._nodes_copied:
+            self.nodes = list(self.nodes)
+            self._nodes_copied = True
+        return self.nodes
+
+    def _writable_edges(self) -> List[Dict]:
+        if not self._edges_copied:
+            self.edges = list(self.edges)
+            self._edges_copied = True
+        return self.edges
+
+
+def _changes(operation: Dict) -> Dict:
+    changes = operation.get('changes')
+    if not isinstance(changes, dict):
+        raise ValueError("'modify' needs a 'changes' object")
+    return changes
+
+
+def _check_edge(edge) -> None:
+    if not isinstance(edge, dict) or not all(
+        isinstance(edge.get(key), str) for key in ('source', 'target')
+    ):
+        raise ValueError("an edge needs string 'source' and 'target'")
@@ -1,7 +1,38 @@
 """Service for managing biological network models via Cell Collective API."""
-import json
+import tarfile
+import threading
+import time
 import uuid
-from typing import Dict, List, Any, Optional
+import zlib
+from itertools import product
+from typing import Callable, Dict, Iterator, List, Any, Optional
+
+import numpy as np
+
+from batch import run_batch, unpack_state
+from bulk_import import iter_documents, prepare_documents
+from config import Config
+from engines import create_engine
+from graph_analysis import find_feedback_loops
+from landscape import compute_landscape
+import metrics
+from model_patch import apply_operations
+from network import CompiledNetwork
+from perturbation import PERTURBATIONS, screen_perturbations
+from result_cache import ResultCache, estimate_size, params_digest
+from rule_engine import import_cell_collective
+from stochastic import run_activity
+from storage import MemoryModelStore, ModelStore, create_store
+from structure import StructuralIndex
+from timeline_codec import check_format, encode_timeline, set_bits
+
+
+class VersionConflict(Exception):
+    """Raised when a write names a version that is no longer current."""
+
+    def __init__(self, version: int):
+        super().__init__(f'Model has changed; the current version is {version}')
+        self.version = version
 
 
 class ModelService:
@@ -11,13 +42,42 @@ class ModelService:
     Provides simplified interface for K-12 students.
     """
 
-    def __init__(self):
-        """Initialize model service."""
-        self.models = {}  # In-memory storage for demo
+    def __init__(self, store: Optional[ModelStore] = None,
+                 store_factory: Optional[Callable[[], ModelStore]] = None):
+        """Initialize model service.
+
+        Args:
+            store: Model storage backend (default: process-local memory)
+            store_factory: Builds the store on first use instead, so that
+                creating the service does not open a database
+        """
+        self._store = store
+        self._store_factory = store_factory or MemoryModelStore
+        self._store_lock = threading.Lock()
+        self._networks = {}  # model_id -> CompiledNetwork for current version
+        self._structures = {}  # model_id -> StructuralIndex, updated incrementally
+        self.result_cache = ResultCache(
+            Config.RESULT_CACHE_MAX_ENTRIES,
+            Config.RESULT_CACHE_MAX_BYTES
+        )
+        # (model_id, version, inputs) -> attractor landscape
+        self._landscapes = ResultCache(
+            Config.ATTRACTOR_CACHE_MAX_ENTRIES,
+            Config.ATTRACTOR_CACHE_MAX_BYTES
+        )
         # In production, would connect to Cell Collective via ccapi:
         # import ccapi
         # self.cc_client = ccapi.Client()
 
+    @property
+    def store(self) -> ModelStore:
+        """Model storage backend, created on first use."""
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = self._store_factory()
+        return self._store
+
     def create_model(self, model_data: Dict) -> Dict:
         """Create a new biological network model.
 
@@ -27,27 +87,16 @@ class ModelService:
                     'name': str,
                     'description': str,
                     'nodes': List[Dict],
-                    'edges': List[Dict]
+                    'edges': List[Dict],
+                    'owner': str,  # optional
+                    'logic': str  # optional, 'cell_collective' for imports
                 }
 
         Returns:
             Created model with unique ID
         """
-        model_id = str(uuid.uuid4())
-
-        model = {
-            'id': model_id,
-            'name': model_data.get('name', 'Untitled Model'),
-            'description': model_data.get('description', ''),
-            'nodes': model_data.get('nodes', []),
-            'edges': model_data.get('edges', []),
-            'created_at': self._get_timestamp(),
-            'updated_at': self._get_timestamp(),
-            'version': 1
-        }
-
-        # Store in memory (demo)
-        self.models[model_id] = model
+        model = self._new_model(model_data)
+        self.store.insert(model)
 
         # In production, would save to Cell Collective:
         # cc_model = self._convert_to_cc_format(model)
@@ -59,6 +108,44 @@ class ModelService:
             'model': model
         }
 
+    def bulk_import(self, stream) -> Dict:
+        """Create many models from an NDJSON or (gzip'd) tar upload.
+
+        The upload is read as a stream (see ``bulk_import``); documents are
+        decoded, validated and trial-compiled in a pool of
+        BULK_IMPORT_WORKERS processes, and valid models are inserted
+        BULK_IMPORT_BATCH_SIZE at a time, one store transaction per batch.
+
+        Args:
+            stream: Binary request body
+
+        Returns:
+            {'success': True, 'records': Iterator[Dict]} with one record
+            per document, reported once its batch is committed (so not
+            necessarily in 'index' order), then a summary:
+                {'type': 'model', 'index', 'source', 'success': True, 'id', 'name'}
+                {'type': 'model', 'index', 'source', 'success': False, 'error'}
+                {'type': 'error', 'error'}  # unreadable upload or too many models
+                {'type': 'summary', 'imported': int, 'failed': int}
+        """
+        return {'success': True, 'records': self._bulk_records(stream)}
+
+    def import_model(self, cc_model: Dict) -> Dict:
+        """Create a model from a Cell Collective model with regulation rules.
+
+        Args:
+            cc_model: Cell Collective model (see ``rule_engine`` for the
+                accepted shape)
+
+        Returns:
+            Created model; its edges carry conditions and dominance, which
+            simulations evaluate with the compiled rule engine
+
+        Raises:
+            ValueError: If the regulation structure is malformed
+        """
+        return self.create_model(import_cell_collective(cc_model))
+
     def get_model(self, model_id: str) -> Optional[Dict]:
         """Retrieve model by ID.
 
@@ -68,7 +155,52 @@ class ModelService:
         Returns:
             Model data or None if not found
         """
-        return self.models.get(model_id)
+        return self.store.get(model_id)
+
+    def get_model_version(self, model_id: str, version: int) -> Optional[Dict]:
+        """Retrieve an earlier (or the current) version of a model.
+
+        Versions are immutable snapshots, e.g. for undo: writing an old
+        version's nodes and edges back with ``update_model`` restores it.
+        Only the last ``Config.MODEL_VERSION_RETENTION`` versions are kept.
+
+        Args:
+            model_id: Unique model identifier
+            version: Version number, starting at 1
+
+        Returns:
+            Model data as of that version or None if not found (or pruned)
+        """
+        return self.store.get_version(model_id, version)
+
+    def list_models(self, owner: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """List the most recently updated models.
+
+        Args:
+            owner: Only list this owner's models
+            limit: Maximum number of models
+
+        Returns:
+            Model metadata (id, name, owner, version, updated_at)
+        """
+        return self.store.list_models(owner, limit)
+
+    def get_network(self, model: Dict) -> CompiledNetwork:
+        """Get the compiled network for a model, compiling it if needed.
+
+        Networks are cached per ``(model_id, version)``.
+
+        Args:
+            model: Model dictionary
+
+        Returns:
+            Compiled network for the model's current version
+        """
+        network = self._networks.get(model['id'])
+        if network is None or network.version != model['version']:
+            network = CompiledNetwork(model)
+            self._networks[model['id']] = network
+        return network
 
     def update_model(self, model_id: str, updates: Dict) -> Dict:
         """Update existing model.
@@ -78,29 +210,100 @@ class ModelService:
             updates: Dictionary of fields to update
 
         Returns:
-            Updated model
+            Updated model. The previous version remains available as an
+            immutable snapshot; lists not in ``updates`` are shared with it.
         """
-        if model_id not in self.models:
-            return {'success': False, 'error': 'Model not found'}
+        # Compare-and-set: if another request or process wrote the model
+        # between our read and write, re-apply the updates to its version
+        while True:
+            previous = self.store.get(model_id)
+            if previous is None:
+                return {'success': False, 'error': 'Model not found'}
+
+            model = dict(previous)
+            for field in ('name', 'description', 'nodes', 'edges'):
+                if field in updates:
+                    model[field] = updates[field]
+            model['updated_at'] = self._get_timestamp()
+            model['version'] = previous['version'] + 1
+            if self.store.update(model, previous['version']):
+                break
 
-        model = self.models[model_id]
+        self._invalidate(model_id)
 
-        # Update fields
-        if 'name' in updates:
-            model['name'] = updates['name']
-        if 'description' in updates:
-            model['description'] = updates['description']
-        if 'nodes' in updates:
-            model['nodes'] = updates['nodes']
-        if 'edges' in updates:
-            model['edges'] = updates['edges']
+        structure = self._structures.get(model_id)
+        if structure is not None:
+            if structure.version == previous['version']:
+                structure.apply_update(previous, model)
+            else:
+                self._structures.pop(model_id, None)
 
+        return {
+            'success': True,
+            'model': model
+        }
+
+    def patch_model(self, model_id: str, patch: Dict) -> Dict:
+        """Apply node and edge operations to the current version of a model.
+
+        Compiled networks, structural indexes and their caches are updated
+        from the change set instead of being rebuilt.
+
+        Args:
+            model_id: Model to update
+            patch: Operations and the version they were made against
+                {
+                    'version': int,  # must be the current version
+                    'operations': List[Dict]  # see ``model_patch``
+                }
+
+        Returns:
+            New version number and timestamp (the model itself is not
+            echoed back)
+
+        Raises:
+            ValueError: If the version is missing or an operation is invalid
+            VersionConflict: If the model is no longer at 'version'
+        """
+        version = patch.get('version')
+        if not isinstance(version, int) or isinstance(version, bool):
+            raise ValueError("'version' (the version being patched) is required")
+
+        previous = self.store.get(model_id)
+        if previous is None:
+            return {'success': False, 'error': 'Model not found'}
+        if previous['version'] != version:
+            raise VersionConflict(previous['version'])
+
+        nodes, edges, changes = apply_operations(previous, patch.get('operations'))
+        model = dict(previous)
+        model['nodes'] = nodes
+        model['edges'] = edges
         model['updated_at'] = self._get_timestamp()
-        model['version'] += 1
+        model['version'] = version + 1
+        if not self.store.update(model, version):
+            current = self.store.get(model_id)
+            if current is None:
+                return {'success': False, 'error': 'Model not found'}
+            raise VersionConflict(current['version'])
+
+        network = self._networks.get(model_id)
+        self._invalidate(model_id)
+        if network is not None and network.version == version:
+            self._networks[model_id] = network.derive(model, changes)
+
+        structure = self._structures.get(model_id)
+        if structure is not None:
+            if structure.version == version:
+                structure.apply_changes(changes, model['version'])
+            else:
+                self._structures.pop(model_id, None)
 
         return {
             'success': True,
-            'model': model
+            'id': model_id,
+            'version': model['version'],
+            'updated_at': model['updated_at']
         }
 
     def delete_model(self, model_id: str) -> Dict:
@@ -112,12 +315,13 @@ class ModelService:
         Returns:
             Success status
         """
-        if model_id in self.models:
-            del self.models[model_id]
+        if self.store.delete(model_id):
+            self._invalidate(model_id)
+            self._structures.pop(model_id, None)
             return {'success': True}
         return {'success': False, 'error': 'Model not found'}
 
-    def simulate(self, model_id: str, params: Dict) -> Dict:
+    def simulate(self, model_id: str, params: Dict, progress=None) -> Dict:
         """Run simulation on model.
 
         Args:
@@ -126,65 +330,541 @@ class ModelService:
                 {
                     'steps': int,
                     'initial_conditions': Dict[str, int],
-                    'update_scheme': 'synchronous' | 'asynchronous'
+                    'update_scheme': 'synchronous' | 'asynchronous',
+                    'engine': 'bitset' | 'incremental' | 'python' | 'numpy',
+                    'async_mode': 'random_order' | 'random_node',
+                    'seed': int,  # asynchronous / stochastic RNG seed
+                    'timeline_format': 'full' | 'delta' | 'columnar',
+                    'stochastic': bool,  # activity levels, see below
+                    'replicates': int,
+                    'noise': float | Dict[str, float],  # flip probability
+                    'input_levels': Dict[str, float],  # external ON-probability
+                    'window': int,  # sliding window length (steps)
+                    'stride': int  # steps between reported windows
                 }
+            progress: Optional callback ``(phase, done, total)``, called
+                about every 1% of the steps
 
         Returns:
-            Simulation results with timeline
+            Simulation results with timeline. When a state repeats the run
+            stops and reports the exact ``transient_length`` (steps before
+            the cycle), ``cycle_period`` and the ``attractor`` states.
+            Asynchronous runs stop only at fixed points. ``nodes_evaluated``
+            lists how many node rules were evaluated in each step. See
+            ``timeline_codec`` for the compact timeline formats.
+
+            Stochastic runs instead step ``replicates`` noisy synchronous
+            runs together and return each node's ``activity`` (fraction of
+            replicate-steps ON) over the last ``window`` steps, plus an
+            ``activity_trace`` of sliding windows every ``stride`` steps.
+
+        Raises:
+            ValueError: If the scheme, engine, async mode or timeline
+                format is unknown
         """
-        model = self.models.get(model_id)
+        model = self.store.get(model_id)
         if not model:
             return {'success': False, 'error': 'Model not found'}
 
-        # Initialize states
+        # Unseeded asynchronous or stochastic runs are random, so never
+        # served from cache
+        cacheable = params.get('seed') is not None or (
+            params.get('update_scheme', 'synchronous') == 'synchronous'
+            and not params.get('stochastic')
+        )
+        run = self._run_stochastic if params.get('stochastic') else self._run_simulation
+        if not cacheable:
+            return run(model, params, progress)
+
+        cache_key = (model_id, model['version'], params_digest(params))
+        result = self.result_cache.get(cache_key)
+        if result is None:
+            result = run(model, params, progress)
+            size = estimate_size(_state_rows(result), len(model['nodes']))
+            self.result_cache.put(cache_key, result, size)
+        return result
+
+    def simulate_stream(self, model_id: str, params: Dict) -> Dict:
+        """Run a simulation as a stream of records, for NDJSON responses.
+
+        Memory stays bounded regardless of ``steps``: states are emitted
+        as they are produced and cycles are detected with Brent's
+        algorithm (constant memory) instead of a seen-map. Brent confirms
+        a cycle later than the first repeated state; the transient length
+        is then recovered by re-running from the start.
+
+        When ``steps`` runs out before Brent confirms a cycle, a state may
+        still have repeated within ``steps``; 'reached_attractor' is then
+        None (unconfirmed). With 'confirm_cycle' the run is instead
+        continued, unstreamed, for up to ``2 * steps`` more steps (at most
+        3x the work), and 'reached_attractor', 'transient_length',
+        'cycle_period' and 'attractor' always agree with :meth:`simulate`
+        ('steps_checked' counts every step taken). 'steps_taken' and
+        'final_state' describe the streamed timeline, which may run past
+        the first repeated state where :meth:`simulate` stops.
+
+        Records, in order:
+            {'type': 'header', 'node_ids', 'steps', 'block_size',
+             'timeline_format', 'initial' (delta only)}
+            {'type': 'steps', 'start', 'states' | 'flips', 'nodes_evaluated'}
+            {'type': 'summary', 'steps_taken', 'steps_checked',
+             'reached_attractor', 'transient_length', 'cycle_period',
+             'attractor', 'final_state'}
+
+        Args:
+            model_id: Model to simulate
+            params: Parameters as for :meth:`simulate`, plus
+                'block_size': int  # steps per 'steps' record (default 1)
+                'confirm_cycle': bool  # check past ``steps`` (default False)
+                'timeline_format' may be 'full' or 'delta'
+
+        Returns:
+            {'success': True, 'records': Iterator[Dict]}
+
+        Raises:
+            ValueError: If the scheme, engine, async mode or timeline
+                format is unknown
+        """
+        model = self.store.get(model_id)
+        if not model:
+            return {'success': False, 'error': 'Model not found'}
+
+        network = self.get_network(model)
+        engine = create_engine(network, params)
+        timeline_format = params.get('timeline_format', 'full')
+        if timeline_format not in ('full', 'delta'):
+            raise ValueError("Streaming supports timeline_format 'full' or 'delta'")
+
         state = self._initialize_state(model, params.get('initial_conditions', {}))
+        initial = network.state_vector(state)
+        engine.reset(initial)
 
-        # Run simulation
-        steps = params.get('steps', 100)
-        timeline = [state.copy()]
+        return {
+            'success': True,
+            'records': self._stream_records(network, engine, initial, params, timeline_format)
+        }
 
-        for step in range(steps):
-            state = self._update_state(model, state, params.get('update_scheme', 'synchronous'))
-            timeline.append(state.copy())
+    def simulate_batch(self, model_id: str, params: Dict) -> Dict:
+        """Run many synchronous simulations of one model as a single batch.
 
-            # Check for attractor (repeated state)
-            if self._reached_attractor(timeline):
-                break
+        Args:
+            model_id: Model to simulate
+            params: Batch parameters
+                {
+                    'steps': int,
+                    'initial_conditions': List[Dict[str, int]],  # or one Dict
+                    'enumerate_external': bool  # every on/off combination
+                                                # of external nodes, applied
+                                                # to each initial condition
+                }
+
+        Returns:
+            Per-run final states, attractor ids and step counts, plus the
+            distinct attractors found
+
+        Raises:
+            ValueError: If initial_conditions is malformed or the batch
+                exceeds MAX_BATCH_RUNS
+        """
+        model = self.store.get(model_id)
+        if not model:
+            return {'success': False, 'error': 'Model not found'}
+
+        network = self.get_network(model)
+        conditions = params.get('initial_conditions') or [{}]
+        if isinstance(conditions, dict):
+            # A single condition, in the form /simulate accepts
+            conditions = [conditions]
+        if not isinstance(conditions, list) or not all(isinstance(c, dict) for c in conditions):
+            raise ValueError('initial_conditions must be an object or a list of objects')
+
+        external_ids = []
+        if params.get('enumerate_external'):
+            external_ids = [
+                node_id for node_id, is_external in zip(network.node_ids, network.external)
+                if is_external
+            ]
+
+        run_count = len(conditions) * 2 ** len(external_ids)
+        if run_count > Config.MAX_BATCH_RUNS:
+            raise ValueError(
+                f'Batch of {run_count} runs exceeds the limit of {Config.MAX_BATCH_RUNS}'
+            )
+
+        combinations = [
+            dict(zip(external_ids, values))
+            for values in product((0, 1), repeat=len(external_ids))
+        ]
+
+        initial_states = np.array([
+            network.state_vector(self._initialize_state(model, {**condition, **combination}))
+            for condition in conditions
+            for combination in combinations
+        ], dtype=np.uint8).reshape(run_count, network.size)
+
+        started = time.perf_counter()
+        result = run_batch(network, initial_states, params.get('steps', 100))
+        total_steps = int(result['steps_taken'].sum())
+        metrics.record_simulation(
+            'batch', total_steps, time.perf_counter() - started,
+            total_steps * len(network.update_order)
+        )
+
+        runs = []
+        for final_state, steps_taken, attractor_id in zip(
+            result['final_states'].tolist(),
+            result['steps_taken'].tolist(),
+            result['attractor_ids'].tolist()
+        ):
+            runs.append({
+                'final_state': network.state_dict(final_state),
+                'attractor_id': attractor_id if attractor_id >= 0 else None,
+                'steps_taken': steps_taken
+            })
+
+        attractors = [
+            {
+                'id': attractor_id,
+                'period': len(states),
+                'states': [network.state_dict(unpack_state(network, s)) for s in states]
+            }
+            for attractor_id, states in enumerate(result['attractors'])
+        ]
 
         return {
             'success': True,
-            'timeline': timeline,
-            'steps_taken': len(timeline) - 1,
-            'reached_attractor': self._reached_attractor(timeline),
-            'final_state': timeline[-1]
+            'run_count': run_count,
+            'runs': runs,
+            'attractors': attractors
+        }
+
+    def perturbation_screen(self, model_id: str, params: Dict) -> Dict:
+        """Knock out and over-express nodes and compare against wild type.
+
+        Every variant runs in one batch (split across worker processes)
+        with the perturbed node held fixed; the stored model is not
+        modified.
+
+        Args:
+            model_id: Model to screen
+            params: Screen parameters
+                {
+                    'nodes': List[str],  # default: every node
+                    'perturbations': ['knockout', 'overexpression'],
+                    'steps': int,
+                    'initial_conditions': Dict[str, int]
+                }
+
+        Returns:
+            Wild-type outcome, one result per (node, perturbation) with its
+            attractor and the nodes whose final state differs from wild
+            type, and the distinct attractors found
+
+        Raises:
+            ValueError: If a node or perturbation is unknown, or the screen
+                exceeds MAX_BATCH_RUNS
+        """
+        model = self.store.get(model_id)
+        if not model:
+            return {'success': False, 'error': 'Model not found'}
+
+        network = self.get_network(model)
+        node_ids = params.get('nodes') or list(network.node_ids)
+        unknown = [node_id for node_id in node_ids if node_id not in network.index]
+        if unknown:
+            raise ValueError(f"Unknown nodes: {', '.join(unknown)}")
+        kinds = params.get('perturbations') or list(PERTURBATIONS)
+        invalid = [kind for kind in kinds if kind not in PERTURBATIONS]
+        if invalid:
+            raise ValueError(
+                f"Unknown perturbations: {', '.join(invalid)}. "
+                f"Choose from: {', '.join(PERTURBATIONS)}"
+            )
+
+        run_count = 1 + len(node_ids) * len(kinds)
+        if run_count > Config.MAX_BATCH_RUNS:
+            raise ValueError(
+                f'Screen of {run_count} runs exceeds the limit of {Config.MAX_BATCH_RUNS}'
+            )
+
+        initial = network.state_vector(
+            self._initialize_state(model, params.get('initial_conditions', {}))
+        )
+        screen = screen_perturbations(
+            model,
+            network,
+            initial,
+            [network.index[node_id] for node_id in node_ids],
+            kinds,
+            steps=params.get('steps', 100),
+            workers=Config.SCREEN_WORKERS,
+            chunk_runs=Config.SCREEN_CHUNK_RUNS
+        )
+
+        final_states = screen['final_states']
+        attractor_ids = [a if a >= 0 else None for a in screen['attractor_ids'].tolist()]
+        steps_taken = screen['steps_taken'].tolist()
+        wild_final = final_states[0]
+
+        results = []
+        for run, (node_index, kind) in enumerate(screen['variants'], start=1):
+            changed = np.flatnonzero(final_states[run] != wild_final).tolist()
+            results.append({
+                'node_id': network.node_ids[node_index],
+                'perturbation': kind,
+                'attractor_id': attractor_ids[run],
+                'attractor_changed': attractor_ids[run] != attractor_ids[0],
+                'final_state_diff': {
+                    network.node_ids[i]: int(final_states[run][i]) for i in changed
+                },
+                'steps_taken': steps_taken[run]
+            })
+
+        return {
+            'success': True,
+            'run_count': run_count,
+            'wild_type': {
+                'final_state': network.state_dict(wild_final.tolist()),
+                'attractor_id': attractor_ids[0],
+                'steps_taken': steps_taken[0]
+            },
+            'results': results,
+            'attractors': [
+                {
+                    'id': attractor_id,
+                    'period': len(states),
+                    'states': [network.state_dict(unpack_state(network, s)) for s in states]
+                }
+                for attractor_id, states in enumerate(screen['attractors'])
+            ]
         }
 
-    def analyze(self, model_id: str) -> Dict:
+    def sweep(self, model_id: str, params: Dict, progress=None) -> Dict:
+        """Dose-response sweep of one or two external inputs' activity levels.
+
+        The whole grid runs as one batch: ``replicates`` noisy runs per grid
+        point, stacked into a single state matrix. The warm-up from the
+        initial state does not depend on the swept inputs, so it is run
+        once (swept inputs at their initial states) and the warmed
+        replicates are copied to every grid point, which then only needs
+        ``settle`` steps to respond before activity is measured.
+
+        Args:
+            model_id: Model to sweep
+            params: Sweep parameters
+                {
+                    'inputs': [str] | [str, str],  # swept external nodes
+                    'levels': int | List[float],  # K points in [0, 1]
+                                                  # (default 11: 0%..100%)
+                    'outputs': List[str],  # default: non-external nodes
+                    'replicates': int,  # per grid point, default 50
+                    'warmup': int,  # shared warm-up steps, default 50
+                    'settle': int,  # per-point steps before measuring,
+                                    # default 20
+                    'window': int,  # measured steps, default 20
+                    'noise', 'input_levels', 'initial_conditions', 'seed':
+                        as for stochastic :meth:`simulate`
+                }
+            progress: Optional callback ``(phase, done, total)``
+
+        Returns:
+            ``levels``, ``outputs`` and ``activity``, a nested list indexed
+            ``[i][o]`` (one input) or ``[i][j][o]`` (two inputs) by the
+            level indices of the swept inputs and the output index
+
+        Raises:
+            ValueError: If inputs, levels or outputs are invalid or the
+                grid exceeds MAX_BATCH_RUNS runs
+        """
+        model = self.store.get(model_id)
+        if not model:
+            return {'success': False, 'error': 'Model not found'}
+
+        network = self.get_network(model)
+        inputs = params.get('inputs') or []
+        if (not _is_id_list(inputs) or len(inputs) not in (1, 2)
+                or len(set(inputs)) != len(inputs)):
+            raise ValueError('Sweep one or two distinct external inputs')
+        for node_id in inputs:
+            if node_id not in network.index or not network.external[network.index[node_id]]:
+                raise ValueError(f"Swept input '{node_id}' is not an external node")
+
+        levels = params.get('levels', 11)
+        if isinstance(levels, int) and not isinstance(levels, bool):
+            if levels < 2:
+                raise ValueError('levels must be at least 2')
+            levels = np.linspace(0.0, 1.0, levels).tolist()
+        if not isinstance(levels, list) or not levels:
+            raise ValueError('levels must be a count or a non-empty list of levels')
+        for level in levels:
+            _check_probability(level, 'Sweep level')
+
+        outputs = params.get('outputs') or [
+            node_id for node_id, is_external in zip(network.node_ids, network.external)
+            if not is_external
+        ]
+        if not _is_id_list(outputs):
+            raise ValueError('outputs must be a list of node ids')
+        unknown = [node_id for node_id in outputs if node_id not in network.index]
+        if unknown:
+            raise ValueError(f"Unknown outputs: {', '.join(unknown)}")
+
+        replicates = _int_param(params, 'replicates', 50, 1)
+        warmup = _int_param(params, 'warmup', 50, 0)
+        settle = _int_param(params, 'settle', 20, 0)
+        window = _int_param(params, 'window', 20, 1)
+        grid = list(product(levels, repeat=len(inputs)))
+        self._check_replicates(replicates * len(grid))
+
+        fixed_levels = {
+            node_id: level for node_id, level in _input_levels(params).items()
+            if node_id not in inputs
+        }
+        setup = self._stochastic_setup(model, network, {**params, 'input_levels': fixed_levels})
+        rng = np.random.default_rng(params.get('seed'))
+
+        # Shared warm-up, swept inputs untouched
+        warmed = run_activity(
+            network,
+            np.repeat(setup['initial'][None, :], replicates, axis=0),
+            1,
+            setup['input_indices'],
+            np.tile(setup['levels'], (replicates, 1)),
+            setup['noise'],
+            warmup,
+            1,
+            1,
+            rng,
+            progress,
+            'warmup'
+        )['final_states']
+
+        # Every grid point starts from the warmed replicates
+        input_indices = setup['input_indices'] + [network.index[node_id] for node_id in inputs]
+        point_levels = np.array([
+            list(setup['levels']) + list(point) for point in grid
+        ], dtype=np.float64)
+        measured = run_activity(
+            network,
+            np.tile(warmed, (len(grid), 1)),
+            len(grid),
+            input_indices,
+            np.repeat(point_levels, replicates, axis=0),
+            setup['noise'],
+            settle + window,
+            window,
+            settle + window,
+            rng,
+            progress
+        )['activity']
+
+        columns = [network.index[node_id] for node_id in outputs]
+        shape = (len(levels),) * len(inputs) + (len(outputs),)
+        activity = np.round(measured[:, columns], 4).reshape(shape)
+
+        return {
+            'success': True,
+            'inputs': inputs,
+            'levels': levels,
+            'outputs': outputs,
+            'replicates': replicates,
+            'activity': activity.tolist()
+        }
+
+    def attractors(self, model_id: str, params: Dict, progress=None) -> Dict:
+        """Compute every attractor and its basin size by exhaustive enumeration.
+
+        Only for small models: the 2^n states of the non-external nodes are
+        enumerated, with external nodes held at their default states or the
+        values in ``params['inputs']``. Results are cached per model version.
+
+        Args:
+            model_id: Model to analyze
+            params: {'inputs': Dict[str, int]}
+            progress: Optional callback ``(phase, done, total)``
+
+        Returns:
+            Attractors sorted by basin size
+
+        Raises:
+            ValueError: If the model has more than ATTRACTOR_MAX_NODES
+                non-external nodes
+        """
+        model = self.store.get(model_id)
+        if not model:
+            return {'success': False, 'error': 'Model not found'}
+
+        network = self.get_network(model)
+        inputs = {
+            node_id: value for node_id, value in params.get('inputs', {}).items()
+            if node_id in network.index and network.external[network.index[node_id]]
+        }
+        cache_key = (model_id, model['version'], tuple(sorted(inputs.items())))
+        cached = self._landscapes.get(cache_key)
+        if cached is not None:
+            return cached
+
+        free_count = network.size - sum(network.external)
+        if free_count > Config.ATTRACTOR_MAX_NODES:
+            raise ValueError(
+                f'Attractor enumeration is limited to {Config.ATTRACTOR_MAX_NODES} '
+                f'non-external nodes; this model has {free_count}'
+            )
+
+        base = network.state_vector(self._initialize_state(model, inputs))
+        landscape = compute_landscape(
+            network,
+            base,
+            chunk_size=Config.ATTRACTOR_CHUNK_SIZE,
+            workers=Config.ATTRACTOR_WORKERS,
+            max_reported=Config.ATTRACTOR_MAX_REPORTED,
+            progress=progress,
+            model=model
+        )
+
+        result = {'success': True, 'inputs': inputs, **landscape}
+        rows = sum(len(attractor['states']) for attractor in result['attractors'])
+        self._landscapes.put(cache_key, result, estimate_size(rows, network.size))
+        return result
+
+    def analyze(self, model_id: str, params: Optional[Dict] = None, progress=None) -> Dict:
         """Analyze network structure and properties.
 
         Args:
             model_id: Model to analyze
+            params: Optional loop search limits
+                {
+                    'max_loop_length': int,  # default ANALYSIS_MAX_LOOP_LENGTH
+                    'max_loops': int  # capped at ANALYSIS_MAX_LOOPS
+                }
+            progress: Optional callback ``(phase, done, total)``
 
         Returns:
             Analysis results
         """
-        model = self.models.get(model_id)
+        model = self.store.get(model_id)
         if not model:
             return {'success': False, 'error': 'Model not found'}
 
-        nodes = model['nodes']
-        edges = model['edges']
+        params = params or {}
+        max_length = params.get('max_loop_length') or Config.ANALYSIS_MAX_LOOP_LENGTH
+        max_loops = min(params.get('max_loops') or Config.ANALYSIS_MAX_LOOPS, Config.ANALYSIS_MAX_LOOPS)
+
+        # Counters and loops come from the incrementally maintained index
+        if progress:
+            progress('analyze', 0, 1)
+        summary = self._get_structure(model).summary(
+            max_length, max_loops, model['version'], progress
+        )
+        if summary is None:
+            # A concurrent update moved the shared index past this snapshot
+            summary = StructuralIndex(model).summary(max_length, max_loops, progress=progress)
+        if progress:
+            progress('analyze', 1, 1)
 
-        # Basic metrics
         analysis = {
             'success': True,
-            'node_count': len(nodes),
-            'edge_count': len(edges),
-            'external_nodes': len([n for n in nodes if n.get('type') == 'external']),
-            'internal_nodes': len([n for n in nodes if n.get('type') == 'internal']),
-            'activation_edges': len([e for e in edges if e.get('type') == 'activation']),
-            'inhibition_edges': len([e for e in edges if e.get('type') == 'inhibition']),
-            'feedback_loops': self._find_feedback_loops(model),
+            **summary,
             'complexity_score': self._calculate_complexity(model)
         }
 
@@ -192,6 +872,246 @@ class ModelService:
 
     # Helper methods
 
+    def _new_model(self, model_data: Dict) -> Dict:
+        """Build version 1 of a model from creation data."""
+        model = {
+            'id': str(uuid.uuid4()),
+            'name': model_data.get('name', 'Untitled Model'),
+            'description': model_data.get('description', ''),
+            'nodes': model_data.get('nodes', []),
+            'edges': model_data.get('edges', []),
+            'created_at': self._get_timestamp(),
+            'updated_at': self._get_timestamp(),
+            'version': 1
+        }
+        if 'owner' in model_data:
+            model['owner'] = model_data['owner']
+        if 'logic' in model_data:
+            model['logic'] = model_data['logic']
+        return model
+
+    def _bulk_records(self, stream) -> Iterator[Dict]:
+        """Records of :meth:`bulk_import`."""
+        workers = Config.BULK_IMPORT_WORKERS
+        counts = {'imported': 0, 'failed': 0}
+        batch = []
+
+        def commit():
+            try:
+                self.store.insert_many([model for _, model in batch])
+                records = [
+                    {**record, 'success': True, 'id': model['id'], 'name': model['name']}
+                    for record, model in batch
+                ]
+                counts['imported'] += len(batch)
+            except ValueError as e:
+                records = [{**record, 'success': False, 'error': str(e)} for record, _ in batch]
+                counts['failed'] += len(batch)
+            batch.clear()
+            return records
+
+        documents = prepare_documents(iter_documents(stream), workers, window=4 * workers)
+        try:
+            for index, (source, data) in enumerate(documents):
+                if index >= Config.BULK_IMPORT_MAX_MODELS:
+                    yield from commit()
+                    yield {'type': 'error', 'error': (
+                        f'Upload exceeds the limit of {Config.BULK_IMPORT_MAX_MODELS} models'
+                    )}
+                    break
+                record = {'type': 'model', 'index': index, 'source': source}
+                if isinstance(data, Exception):
+                    counts['failed'] += 1
+                    yield {**record, 'success': False, 'error': str(data)}
+                    continue
+                batch.append((record, self._new_model(data)))
+                if len(batch) >= Config.BULK_IMPORT_BATCH_SIZE:
+                    yield from commit()
+        except (OSError, EOFError, tarfile.TarError, zlib.error) as e:
+            yield from commit()
+            yield {'type': 'error', 'error': f'Unreadable upload: {e}'}
+        finally:
+            documents.close()
+        yield from commit()
+        yield {'type': 'summary', **counts}
+
+    def _invalidate(self, model_id: str) -> None:
+        """Drop every cached structure derived from a model."""
+        self._networks.pop(model_id, None)
+        self._landscapes.invalidate_model(model_id)
+        self.result_cache.invalidate_model(model_id)
+
+    def _get_structure(self, model: Dict) -> StructuralIndex:
+        """Get the structural index for a model's current version."""
+        structure = self._structures.get(model['id'])
+        if structure is None or structure.version != model['version']:
+            structure = StructuralIndex(model)
+            self._structures[model['id']] = structure
+        return structure
+
+    def _run_simulation(self, model: Dict, params: Dict, progress=None) -> Dict:
+        """Run one simulation of ``model``; see :meth:`simulate`."""
+        network = self.get_network(model)
+        engine = create_engine(network, params)
+        timeline_format = params.get('timeline_format', 'full')
+        check_format(timeline_format)
+
+        # Initialize states
+        state = self._initialize_state(model, params.get('initial_conditions', {}))
+        engine.reset(network.state_vector(state))
+
+        # Run simulation; the timeline holds packed states until the end
+        steps = params.get('steps', 100)
+        timeline = [engine.packed()]
+        seen = {timeline[0]: 0}  # packed state -> first step it occurred
+        cycle_start = None
+        nodes_evaluated = []
+        report_every = max(1, steps // 100)
+        started = time.perf_counter()
+
+        for step in range(1, steps + 1):
+            if progress and step % report_every == 0:
+                progress('simulate', step, steps)
+            if not engine.deterministic and engine.is_fixed_point():
+                # Stochastic updates can only settle into fixed points;
+                # revisiting a state does not imply a cycle.
+                cycle_start = step - 1
+                break
+
+            engine.step()
+            packed = engine.packed()
+            timeline.append(packed)
+            nodes_evaluated.append(engine.nodes_evaluated)
+
+            if engine.deterministic:
+                # Deterministic dynamics: a repeated state confirms a cycle
+                cycle_start = seen.get(packed)
+                if cycle_start is not None:
+                    break
+                seen[packed] = step
+        else:
+            if not engine.deterministic and engine.is_fixed_point():
+                cycle_start = len(timeline) - 1
+        metrics.record_simulation(
+            engine.name, len(timeline) - 1, time.perf_counter() - started, sum(nodes_evaluated)
+        )
+
+        result = {
+            'success': True,
+            'timeline': encode_timeline(network, timeline, timeline_format),
+            'steps_taken': len(timeline) - 1,
+            'reached_attractor': cycle_start is not None,
+            'final_state': network.state_dict(network.unpack(timeline[-1])),
+            'transient_length': None,
+            'cycle_period': None,
+            'attractor': None,
+            'nodes_evaluated': nodes_evaluated
+        }
+        if cycle_start is not None:
+            period = len(timeline) - 1 - cycle_start if engine.deterministic else 1
+            result['transient_length'] = cycle_start
+            result['cycle_period'] = period
+            result['attractor'] = [
+                network.state_dict(network.unpack(packed))
+                for packed in timeline[cycle_start:cycle_start + period]
+            ]
+
+        return result
+
+    def _run_stochastic(self, model: Dict, params: Dict, progress=None) -> Dict:
+        """Run replicated noisy simulations of ``model``; see :meth:`simulate`."""
+        network = self.get_network(model)
+        replicates = _int_param(params, 'replicates', 100, 1)
+        steps = _int_param(params, 'steps', 100, 0)
+        window = _int_param(params, 'window', 20, 1)
+        stride = _int_param(params, 'stride', window, 1)
+        self._check_replicates(replicates)
+
+        setup = self._stochastic_setup(model, network, params)
+        levels = np.tile(setup['levels'], (replicates, 1))
+        started = time.perf_counter()
+        activity = run_activity(
+            network,
+            np.repeat(setup['initial'][None, :], replicates, axis=0),
+            1,
+            setup['input_indices'],
+            levels,
+            setup['noise'],
+            steps,
+            window,
+            stride,
+            np.random.default_rng(params.get('seed')),
+            progress
+        )
+        metrics.record_simulation(
+            'stochastic',
+            steps * replicates,
+            time.perf_counter() - started,
+            steps * replicates * len(network.update_order)
+        )
+
+        return {
+            'success': True,
+            'stochastic': True,
+            'replicates': replicates,
+            'steps_taken': steps,
+            'window': window,
+            'activity': dict(zip(network.node_ids, np.round(activity['activity'][0], 4).tolist())),
+            'activity_trace': {
+                'node_ids': list(network.node_ids),
+                'steps': [step for step, _ in activity['trace']],
+                'levels': [np.round(snapshot[0], 4).tolist() for _, snapshot in activity['trace']]
+            }
+        }
+
+    def _stochastic_setup(self, model: Dict, network: CompiledNetwork, params: Dict) -> Dict:
+        """Validate stochastic parameters into initial state, inputs and noise.
+
+        Raises:
+            ValueError: If a probability is outside [0, 1], an input
+                level names a node that is not external or the seed is
+                not a non-negative integer
+        """
+        input_levels = _input_levels(params)
+        seed = params.get('seed')
+        if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+            raise ValueError('seed must be a non-negative integer')
+        for node_id, level in input_levels.items():
+            if node_id not in network.index or not network.external[network.index[node_id]]:
+                raise ValueError(f"Input level given for '{node_id}', which is not an external node")
+            _check_probability(level, f"Input level of '{node_id}'")
+
+        noise = np.zeros(network.size)
+        raw_noise = params.get('noise', 0.0)
+        per_node = raw_noise if isinstance(raw_noise, dict) else {
+            node_id: raw_noise for node_id in network.node_ids
+        }
+        for node_id, level in per_node.items():
+            if node_id not in network.index:
+                raise ValueError(f"Noise given for unknown node '{node_id}'")
+            _check_probability(level, f"Noise of '{node_id}'")
+            if not network.external[network.index[node_id]]:
+                noise[network.index[node_id]] = level
+
+        initial = network.state_vector(
+            self._initialize_state(model, params.get('initial_conditions', {}))
+        )
+        return {
+            'initial': np.asarray(initial, dtype=np.uint8),
+            'input_indices': [network.index[node_id] for node_id in input_levels],
+            'levels': np.array(list(input_levels.values()), dtype=np.float64),
+            'noise': noise
+        }
+
+    @staticmethod
+    def _check_replicates(rows: int) -> None:
+        if rows < 1:
+            raise ValueError('replicates must be at least 1')
+        if rows > Config.MAX_BATCH_RUNS:
+            raise ValueError(
+                f'Batch of {rows} runs exceeds the limit of {Config.MAX_BATCH_RUNS}'
+            )
+
     def _initialize_state(self, model: Dict, initial_conditions: Dict) -> Dict:
         """Initialize node states for simulation."""
         state = {}
@@ -208,109 +1128,158 @@ class ModelService:
 
         Implements Boolean network update rules.
         """
+        network = self.get_network(model)
+        engine = create_engine(network, {'update_scheme': scheme})
+        engine.reset(network.state_vector(current_state))
+        engine.step()
         new_state = current_state.copy()
-
-        # Build adjacency info
-        regulators = {}  # target -> [(source, type)]
-        for edge in model['edges']:
-            target = edge['target']
-            if target not in regulators:
-                regulators[target] = []
-            regulators[target].append((edge['source'], edge['type']))
-
-        # Update each node
-        for node in model['nodes']:
-            node_id = node['id']
-
-            if node.get('type') == 'external':
-                # External nodes don't change (inputs)
-                continue
-
-            # Calculate new state based on regulators
-            if node_id in regulators:
-                new_state[node_id] = self._calculate_node_state(
-                    current_state,
-                    regulators[node_id]
-                )
-
+        new_state.update(network.state_dict(engine.vector()))
         return new_state
 
-    def _calculate_node_state(self, current_state: Dict, regulators: List) -> int:
-        """Calculate new state for a node based on its regulators.
-
-        Simple rule: Node is ON if any activator is ON and no inhibitors are ON.
-        """
-        has_activation = False
-        has_inhibition = False
-
-        for source, edge_type in regulators:
-            if current_state.get(source, 0) == 1:
-                if edge_type == 'activation':
-                    has_activation = True
-                elif edge_type == 'inhibition':
-                    has_inhibition = True
-
-        # ON if activated and not inhibited
-        if has_activation and not has_inhibition:
-            return 1
-
-        return 0
-
-    def _reached_attractor(self, timeline: List[Dict]) -> bool:
-        """Check if simulation reached a repeated state (attractor)."""
-        if len(timeline) < 2:
+    def _stream_records(self, network: CompiledNetwork, engine, initial: List[int],
+                        params: Dict, timeline_format: str) -> Iterator[Dict]:
+        """Generate the records of :meth:`simulate_stream`."""
+        steps = params.get('steps', 100)
+        block_size = max(1, int(params.get('block_size', 1)))
+        delta = timeline_format == 'delta'
+
+        header = {
+            'type': 'header',
+            'node_ids': list(network.node_ids),
+            'steps': steps,
+            'block_size': block_size,
+            'timeline_format': timeline_format
+        }
+        if delta:
+            header['initial'] = ''.join(str(bit) for bit in initial)
+        yield header
+
+        def new_block(start):
+            return {'type': 'steps', 'start': start, 'flips' if delta else 'states': [],
+                    'nodes_evaluated': []}
+
+        previous = engine.packed()
+        if delta:
+            block = new_block(1)
+        else:
+            block = new_block(0)
+            block['states'].append(network.state_dict(initial))
+            block['nodes_evaluated'].append(0)
+
+        # Brent's cycle detection: compare against a tortoise that jumps
+        # to the current state whenever the search window doubles.
+        brent = {'tortoise': previous, 'power': 1, 'window': 0}
+
+        def cycle_confirmed(packed):
+            brent['window'] += 1
+            if packed == brent['tortoise']:
+                return True
+            if brent['window'] == brent['power']:
+                brent.update(tortoise=packed, power=brent['power'] * 2, window=0)
             return False
 
-        current = timeline[-1]
-        for i in range(len(timeline) - 2, max(-1, len(timeline) - 11), -1):
-            if timeline[i] == current:
-                return True
+        period = None
+        fixed_point = False
+        steps_taken = 0
 
-        return False
-
-    def _find_feedback_loops(self, model: Dict) -> List[Dict]:
-        """Find feedback loops in network."""
-        # Simplified implementation
-        loops = []
-
-        # Build adjacency list
-        adj = {}
-        for edge in model['edges']:
-            source = edge['source']
-            target = edge['target']
-            if source not in adj:
-                adj[source] = []
-            adj[source].append(target)
-
-        # DFS to find cycles
-        visited = set()
-        rec_stack = set()
-
-        def dfs(node, path):
-            visited.add(node)
-            rec_stack.add(node)
-
-            if node in adj:
-                for neighbor in adj[node]:
-                    if neighbor in path:
-                        # Found loop
-                        loop_start = path.index(neighbor)
-                        loop = path[loop_start:] + [neighbor]
-                        loops.append({
-                            'nodes': loop,
-                            'length': len(loop) - 1
-                        })
-                    elif neighbor not in visited:
-                        dfs(neighbor, path + [neighbor])
-
-            rec_stack.remove(node)
+        for step in range(1, steps + 1):
+            if not engine.deterministic and engine.is_fixed_point():
+                fixed_point = True
+                break
 
-        for node in model['nodes']:
-            node_id = node['id']
-            if node_id not in visited:
-                dfs(node_id, [node_id])
+            engine.step()
+            packed = engine.packed()
+            steps_taken = step
+            if delta:
+                block['flips'].append(set_bits(previous ^ packed))
+            else:
+                block['states'].append(network.state_dict(network.unpack(packed)))
+            block['nodes_evaluated'].append(engine.nodes_evaluated)
+            previous = packed
+
+            if len(block['nodes_evaluated']) >= block_size:
+                yield block
+                block = new_block(step + 1)
 
-        return loops
+            if engine.deterministic and cycle_confirmed(packed):
+                period = brent['window']
+                break
+        else:
+            fixed_point = not engine.deterministic and engine.is_fixed_point()
+
+        if block['nodes_evaluated']:
+            yield block
+
+        steps_checked = steps_taken
+        unconfirmed = engine.deterministic and period is None
+        if unconfirmed and params.get('confirm_cycle'):
+            # A state may have repeated within the budget without Brent
+            # confirming it yet. Keep checking, without streaming: a cycle
+            # with transient + period <= steps is confirmed before step
+            # 3 * steps (the tortoise waits at most 2 * steps).
+            unconfirmed = False
+            while steps_checked < 3 * steps:
+                engine.step()
+                steps_checked += 1
+                if cycle_confirmed(engine.packed()):
+                    period = brent['window']
+                    break
+
+        summary = {
+            'type': 'summary',
+            'steps_taken': steps_taken,
+            'steps_checked': steps_checked,
+            'reached_attractor': None if unconfirmed else period is not None or fixed_point,
+            'transient_length': None,
+            'cycle_period': None,
+            'attractor': None,
+            'final_state': network.state_dict(network.unpack(previous))
+        }
+        if fixed_point:
+            summary.update(
+                transient_length=steps_taken,
+                cycle_period=1,
+                attractor=[summary['final_state']]
+            )
+        elif period is not None:
+            # Re-run from the start with two engines ``period`` apart; they
+            # first agree at the start of the cycle.
+            lead = create_engine(network, params)
+            trail = create_engine(network, params)
+            lead.reset(initial)
+            trail.reset(initial)
+            for _ in range(period):
+                lead.step()
+            transient = 0
+            while lead.packed() != trail.packed():
+                lead.step()
+                trail.step()
+                transient += 1
+
+            if transient + period > steps:
+                # Confirmed only by checking past the budget: no state
+                # repeated within it, so simulate reports no attractor
+                summary['reached_attractor'] = False
+            else:
+                summary.update(transient_length=transient, cycle_period=period)
+                if period <= Config.STREAM_MAX_ATTRACTOR_STATES:
+                    attractor = []
+                    for _ in range(period):
+                        attractor.append(network.state_dict(trail.vector()))
+                        trail.step()
+                    summary['attractor'] = attractor
+        yield summary
+
+    def _find_feedback_loops(self, network: CompiledNetwork,
+                             max_length: Optional[int] = None,
+                             max_count: Optional[int] = None) -> Iterator[Dict]:
+        """Find feedback loops in network.
+
+        Elementary cycles via Tarjan SCC decomposition and Johnson's
+        algorithm, each classified as positive or negative. Lazy, so
+        callers can stop early.
+        """
+        return find_feedback_loops(network, max_length, max_count)
 
     def _calculate_complexity(self, model: Dict) -> float:
         """Calculate model complexity score."""
@@ -334,5 +1303,40 @@ class ModelService:
         return model
 
 
-# Singleton instance
-model_service = ModelService()
+def _state_rows(result: Dict) -> int:
+    """Number of per-node rows in a simulate result, for cache sizing."""
+    timeline = result.get('timeline') or []
+    if isinstance(timeline, dict):
+        # delta and columnar are smaller; count them as full timelines
+        rows = timeline.get('length', len(timeline.get('flips', [])) + 1)
+    else:
+        rows = len(timeline)
+    trace = result.get('activity_trace') or {}
+    return 1 + rows + len(result.get('attractor') or []) + len(trace.get('steps', []))
+
+
+def _int_param(params: Dict, key: str, default: int, minimum: int) -> int:
+    value = params.get(key, default)
+    if not isinstance(value, int) or isinstance(value, bool) or value < minimum:
+        raise ValueError(f'{key} must be an integer of at least {minimum}')
+    return value
+
+
+def _input_levels(params: Dict) -> Dict:
+    input_levels = params.get('input_levels') or {}
+    if not isinstance(input_levels, dict):
+        raise ValueError('input_levels must map external node ids to probabilities')
+    return input_levels
+
+
+def _is_id_list(value) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _check_probability(value, label: str) -> None:
+    if not isinstance(value, (int, float)) or not 0 <= value <= 1:
+        raise ValueError(f'{label} must be a probability between 0 and 1')
+
+
+# Singleton instance; the configured store is opened on first request
+model_service = ModelService(store_factory=create_store)
@@ -0,0 +1,285 @@
+"""Compiled, integer-indexed view of a model's regulatory network."""
+import copy
+from typing import Dict, List, Optional, Tuple
+
+from rule_engine import build_truth_tables, compile_rules, has_rules, rule_inputs, truth_table
+
+
+class CompiledNetwork:
+    """Dense index structure derived from a model's nodes and edges.
+
+    Built once per ``(model_id, version)`` so simulation and analysis
+    work on integer indices instead of re-deriving regulators from the
+    edge list every step.
+
+    Attributes:
+        model_id: Id of the model this network was compiled from
+        version: Model version this network was compiled from
+        node_ids: Node ids in index order
+        index: Node id -> dense index
+        external: Per-node flag, True for external (input) nodes
+        regulated: Per-node flag, True if any edge targets the node
+        activators: Per-node tuple of activating regulator indices
+        inhibitors: Per-node tuple of inhibiting regulator indices
+        successors: Per-node tuple of target indices, in edge order
+        update_order: Indices of nodes recomputed on each step
+        activator_masks: Per-node bit mask of activating regulators
+        inhibitor_masks: Per-node bit mask of inhibiting regulators
+        fixed_mask: Bit mask of nodes that keep their state every step
+        rules: Per-node compiled regulation rules (see ``rule_engine``)
+            for models with conditions, dominance or Cell Collective
+            logic; None for plain activation/inhibition models
+        rule_inputs: Per-node sorted indices each compiled rule reads
+            (None without rules)
+    """
+
+    def __init__(self, model: Dict):
+        """Compile a model.
+
+        Args:
+            model: Model dictionary with 'nodes' and 'edges'
+        """
+        self.model_id = model.get('id')
+        self.version = model.get('version')
+
+        self.node_ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.external: List[bool] = []
+        for node in model['nodes']:
+            node_id = node['id']
+            if node_id in self.index:
+                continue
+            self.index[node_id] = len(self.node_ids)
+            self.node_ids.append(node_id)
+            self.external.append(node.get('type') == 'external')
+
+        n = len(self.node_ids)
+        activators: List[List[int]] = [[] for _ in range(n)]
+        inhibitors: List[List[int]] = [[] for _ in range(n)]
+        successors: List[List[int]] = [[] for _ in range(n)]
+        self.regulated: List[bool] = [False] * n
+        self._in_edges: List[int] = [0] * n  # incoming edges, known source or not
+
+        for edge in model['edges']:
+            target = self.index.get(edge['target'])
+            if target is None:
+                continue
+            # Any incoming edge makes the node rule-driven, even when the
+            # source is unknown (it is simply never ON).
+            self.regulated[target] = True
+            self._in_edges[target] += 1
+            source = self.index.get(edge['source'])
+            if source is None:
+                continue
+            successors[source].append(target)
+            if edge.get('type') == 'activation':
+                activators[target].append(source)
+            elif edge.get('type') == 'inhibition':
+                inhibitors[target].append(source)
+
+        self.activators: List[Tuple[int, ...]] = [tuple(a) for a in activators]
+        self.inhibitors: List[Tuple[int, ...]] = [tuple(i) for i in inhibitors]
+        self.successors: List[Tuple[int, ...]] = [tuple(s) for s in successors]
+        self.update_order: Tuple[int, ...] = tuple(
+            i for i in range(n) if self.regulated[i] and not self.external[i]
+        )
+        self.activator_masks: List[int] = [self._mask(a) for a in self.activators]
+        self.inhibitor_masks: List[int] = [self._mask(i) for i in self.inhibitors]
+        self.fixed_mask: int = ((1 << n) - 1) ^ self._mask(self.update_order)
+        self.rules = None
+        self.rule_inputs = None
+        if has_rules(model):
+            self.rules = compile_rules(model, self.index)
+            self.rule_inputs = rule_inputs(model, self.index)
+        self._truth_tables = {}
+        self._matrices = None
+
+    def derive(self, model: Dict, changes: Dict) -> 'CompiledNetwork':
+        """Compile the next version of a model from this network.
+
+        Only the nodes whose regulators changed are re-derived (and, with
+        rules, recompiled); cached truth tables are carried over for every
+        other node. This network is left untouched, since simulations may
+        still be running on it. Falls back to a full compile when existing
+        nodes are removed or reordered (indices would shift), when a rule
+        network gains nodes, or when the model gains or loses rules.
+
+        Args:
+            model: Next version of the model
+            changes: Change set from ``model_patch.apply_operations``
+                between this network's model version and ``model``
+
+        Returns:
+            Network equivalent to ``CompiledNetwork(model)``
+        """
+        nodes = model['nodes']
+        n_old = self.size
+        new_ids = [node['id'] for node in nodes[n_old:]]
+        if (len(nodes) < n_old
+                or (self.rules is not None) != has_rules(model)
+                or (new_ids and self.rules is not None)
+                or any(nodes[i]['id'] != node_id for i, node_id in enumerate(self.node_ids))
+                or len(set(new_ids)) != len(new_ids)
+                or any(node_id in self.index for node_id in new_ids)):
+            return CompiledNetwork(model)
+
+        network = copy.copy(self)
+        network.model_id = model.get('id')
+        network.version = model.get('version')
+        index = network.index = dict(self.index)
+        for node_id in new_ids:
+            index[node_id] = len(index)
+        network.node_ids = self.node_ids + new_ids
+        network.external = [node.get('type') == 'external' for node in nodes]
+        n = len(network.node_ids)
+        padding = n - n_old
+        activators = network.activators = self.activators + [()] * padding
+        inhibitors = network.inhibitors = self.inhibitors + [()] * padding
+        successors = network.successors = self.successors + [()] * padding
+        in_edges = network._in_edges = self._in_edges + [0] * padding
+        dirty = set(range(n_old, n))
+
+        def relink(edge, edge_index, sign, count=True):
+            target = edge_index.get(edge['target'])
+            if target is None:
+                return
+            dirty.add(target)
+            if count:
+                in_edges[target] += sign
+            source = edge_index.get(edge['source'])
+            if source is None:
+                return
+            successors[source] = _adjust(successors[source], target, sign)
+            if edge.get('type') == 'activation':
+                activators[target] = _adjust(activators[target], source, sign)
+            elif edge.get('type') == 'inhibition':
+                inhibitors[target] = _adjust(inhibitors[target], source, sign)
+
+        # Removed edges were compiled against the old index
+        added = set(new_ids)
+        for edge in changes['removed_edges']:
+            relink(edge, self.index, -1)
+        for edge in changes['added_edges']:
+            if edge['source'] not in added and edge['target'] not in added:
+                relink(edge, index, 1)
+        if added:
+            # Edges naming a new node were dangling until now; those into
+            # an existing node were already counted as incoming edges
+            fresh = {id(edge) for edge in changes['added_edges']}
+            for edge in model['edges']:
+                if edge['source'] in added or edge['target'] in added:
+                    relink(edge, index, 1, edge['target'] in added or id(edge) in fresh)
+
+        regulated = network.regulated = self.regulated + [False] * padding
+        activator_masks = network.activator_masks = self.activator_masks + [0] * padding
+        inhibitor_masks = network.inhibitor_masks = self.inhibitor_masks + [0] * padding
+        for i in dirty:
+            regulated[i] = in_edges[i] > 0
+            activator_masks[i] = self._mask(activators[i])
+            inhibitor_masks[i] = self._mask(inhibitors[i])
+        network.update_order = tuple(
+            i for i in range(n) if regulated[i] and not network.external[i]
+        )
+        network.fixed_mask = ((1 << n) - 1) ^ self._mask(network.update_order)
+        network._matrices = None
+
+        network._truth_tables = {}
+        if self.rules is not None:
+            network.rules = list(self.rules)
+            network.rule_inputs = list(self.rule_inputs)
+            rules = compile_rules(model, index, dirty)
+            inputs = rule_inputs(model, index, dirty)
+            for i in dirty:
+                network.rules[i] = rules[i]
+                network.rule_inputs[i] = inputs[i]
+
+            updated = set(network.update_order)
+            stale = dirty | (updated ^ set(self.update_order))
+            for max_inputs, old_tables in self._truth_tables.items():
+                tables = list(old_tables)
+                for i in stale:
+                    tables[i] = truth_table(network, i, max_inputs) if i in updated else None
+                network._truth_tables[max_inputs] = tables
+        return network
+
+    @property
+    def size(self) -> int:
+        """Number of nodes in the network."""
+        return len(self.node_ids)
+
+    def sparse_matrices(self):
+        """Get CSR activation/inhibition matrices and the update mask.
+
+        Row ``t`` of each matrix holds the regulators of node ``t``, so
+        ``matrix @ state`` counts the active regulators of every node.
+        Built lazily and kept for the lifetime of the network.
+
+        Returns:
+            Tuple of (activation CSR, inhibition CSR, update mask)
+        """
+        if self._matrices is None:
+            import numpy as np
+            from scipy.sparse import csr_matrix
+
+            n = self.size
+            shape = (n, n)
+
+            def build(regulators):
+                rows = [t for t, sources in enumerate(regulators) for _ in sources]
+                cols = [s for sources in regulators for s in sources]
+                data = np.ones(len(rows), dtype=np.int32)
+                return csr_matrix((data, (rows, cols)), shape=shape)
+
+            update_mask = np.zeros(n, dtype=bool)
+            update_mask[list(self.update_order)] = True
+            self._matrices = (
+                build(self.activators),
+                build(self.inhibitors),
+                update_mask,
+            )
+        return self._matrices
+
+    def truth_tables(self, max_inputs: int) -> List[Optional[bytes]]:
+        """Get lookup tables for rule nodes with at most ``max_inputs`` inputs.
+
+        Built lazily per ``max_inputs`` and kept for the lifetime of the
+        network; see :func:`rule_engine.build_truth_tables`.
+        """
+        tables = self._truth_tables.get(max_inputs)
+        if tables is None:
+            tables = self._truth_tables[max_inputs] = build_truth_tables(self, max_inputs)
+        return tables
+
+    def state_vector(self, state: Dict) -> List[int]:
+        """Convert a ``{node_id: 0|1}`` state into an index-ordered vector."""
+        return [1 if state.get(node_id, 0) == 1 else 0 for node_id in self.node_ids]
+
+    def state_dict(self, vector: List[int]) -> Dict[str, int]:
+        """Convert an index-ordered vector back into ``{node_id: 0|1}``."""
+        return dict(zip(self.node_ids, vector))
+
+    def pack(self, vector: List[int]) -> int:
+        """Pack an index-ordered 0/1 vector into an int (bit i = node i)."""
+        bits = ''.join('1' if value else '0' for value in reversed(vector))
+        return int(bits, 2) if bits else 0
+
+    def unpack(self, packed: int) -> List[int]:
+        """Unpack an int produced by :meth:`pack` into a 0/1 vector."""
+        if not self.node_ids:
+            return []
+        return [1 if bit == '1' else 0 for bit in reversed(format(packed, f'0{self.size}b'))]
+
+    @staticmethod
+    def _mask(indices) -> int:
+        mask = 0
+        for i in indices:
+            mask |= 1 << i
+        return mask
+
+
+def _adjust(indices: Tuple[int, ...], index: int, sign: int) -> Tuple[int, ...]:
+    """Add one occurrence of ``index`` (sign > 0) or remove one (sign < 0)."""
+    if sign > 0:
+        return indices + (index,)
+    position = indices.index(index)
+    return indices[:position] + indices[position + 1:]
@@ -0,0 +1,91 @@
+"""Size- and byte-bounded LRU cache for simulation results."""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Approximate JSON bytes per node in a state row ('"node_id":0,')
+BYTES_PER_NODE_STATE = 12
+
+
+def params_digest(params: Dict) -> str:
+    """Canonical hash of request parameters (key order does not matter)."""
+    canonical = json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def estimate_size(state_rows: int, node_count: int) -> int:
+    """Approximate size of a result made of ``state_rows`` rows of node
+    values; far cheaper than serializing the result to measure it."""
+    return 64 + state_rows * node_count * BYTES_PER_NODE_STATE
+
+
+class ResultCache:
+    """Thread-safe LRU cache bounded by entry count and total bytes.
+
+    Keys are tuples whose first element is the model id, so every entry
+    for a model can be dropped when the model changes.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        """Initialize cache.
+
+        Args:
+            max_entries: Maximum number of cached results
+            max_bytes: Maximum total size of cached results
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a cached value and mark it most recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> None:
+        """Store a value of ``size`` bytes, evicting least recently used entries."""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate_model(self, model_id: str) -> None:
+        """Drop every entry cached for a model."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == model_id]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,532 @@
+"""Cell Collective regulation rules: import, compilation and simulation.
+
+Cell Collective models describe each component's logic as a set of
+regulators (``relationshipSet``) rather than as a formula. A regulator
+is positive or negative, may only count under conditions on other
+components, and may dominate other regulators of the same target. The
+rules are parsed once into edges carrying that extra information, then
+compiled into one closure per node over the bit-packed state (bit i =
+node i), so a simulation step costs a few bitwise operations per node
+instead of re-interpreting the regulation structure.
+
+Semantics of one node update:
+    * A regulator is *active* when its source is ON and every one of its
+      conditions holds.
+    * An active regulator is ignored if another active regulator of the
+      same target dominates it.
+    * A node with positive regulators is ON when at least one positive
+      regulator is active and no negative regulator is.
+    * A node with only negative regulators is ON when none of them is
+      active under Cell Collective logic (``model['logic'] ==
+      'cell_collective'``, set on import) and OFF otherwise, matching the
+      plain activation/inhibition rule of hand-built models.
+
+Accepted import shape::
+
+    {
+        'name': str,
+        'description': str,
+        'externalComponentSet': [{'id': ..., 'name': ...}, ...],
+        'componentSet': [{'id': ..., 'name': ..., 'state': 0|1}, ...],
+        'relationshipSet': [
+            {
+                'id': ...,
+                'target': component id,
+                'regulator': component id,
+                'type': 'POSITIVE' | 'NEGATIVE',
+                'conditions': [condition, ...],
+                'dominates': [relationship id, ...]
+            },
+            ...
+        ]
+    }
+
+    condition = {
+        'type': 'IF' | 'UNLESS',
+        'state': 'ON' | 'OFF',
+        'relation': 'AND' | 'OR',        # between 'components'
+        'components': [component id, ...],
+        'subConditionRelation': 'AND' | 'OR',
+        'subConditions': [condition, ...]
+    }
+
+``componentId``/``regulatorId``/``regulationType``/``speciesRelation``
+are accepted as aliases.
+"""
+import random
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from scheduling import AsynchronousScheduler
+
+Rule = Callable[[int], bool]
+
+CELL_COLLECTIVE_LOGIC = 'cell_collective'
+
+
+def import_cell_collective(data: Dict) -> Dict:
+    """Convert a Cell Collective model into CellQuest model data.
+
+    Args:
+        data: Model in the shape described in the module docstring
+
+    Returns:
+        Model data for ``ModelService.create_model``; regulators become
+        edges that keep their 'id', 'conditions' and 'dominates'
+
+    Raises:
+        ValueError: If a component, relationship or condition is
+            malformed, or a relationship dominates one of a different
+            target
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Model must be a JSON object')
+
+    nodes = []
+    known = set()
+
+    def add_component(component, node_type):
+        node_id = str(component['id'])
+        if node_id in known:
+            return
+        known.add(node_id)
+        nodes.append({
+            'id': node_id,
+            'name': component.get('name') or component.get('externalName') or node_id,
+            'type': node_type,
+            'state': 1 if component.get('state') in (1, True, 'ON') else 0
+        })
+
+    internal_key = 'componentSet' if 'componentSet' in data else 'internalComponentSet'
+    for key, node_type in (('externalComponentSet', 'external'), (internal_key, 'internal')):
+        for position, component in enumerate(_objects(data, key)):
+            if component.get('id') is None:
+                raise ValueError(f"{key} entry {position} needs an 'id'")
+            add_component(component, node_type)
+
+    # Components only mentioned by relationships or conditions are internal nodes
+    relationships = _objects(data, 'relationshipSet')
+    endpoints = []
+    for position, relationship in enumerate(relationships):
+        target = _first(relationship, 'target', 'componentId', 'targetId')
+        source = _first(relationship, 'regulator', 'regulatorId', 'source')
+        if target is None or source is None:
+            raise ValueError(f'Relationship {position} needs a target and a regulator')
+        endpoints.append((str(target), str(source)))
+        for component_id in endpoints[-1]:
+            add_component({'id': component_id}, 'internal')
+
+    edges = []
+    for position, (relationship, (target, source)) in enumerate(zip(relationships, endpoints)):
+        regulation = str(_first(relationship, 'type', 'regulationType') or '').upper()
+        if regulation not in ('POSITIVE', 'NEGATIVE', 'ACTIVATION', 'INHIBITION'):
+            raise ValueError(f"Relationship {position} has unknown type '{regulation}'")
+
+        edges.append({
+            'id': str(relationship.get('id', f'r{position}')),
+            'source': source,
+            'target': target,
+            'type': 'activation' if regulation in ('POSITIVE', 'ACTIVATION') else 'inhibition',
+            'conditions': [
+                _parse_condition(c, add_component) for c in _objects(relationship, 'conditions')
+            ],
+            'dominates': [str(d) for d in _list(relationship, 'dominates')]
+        })
+
+    edge_targets = {edge['id']: edge['target'] for edge in edges}
+    for edge in edges:
+        for dominated in edge['dominates']:
+            if edge_targets.get(dominated) != edge['target']:
+                raise ValueError(
+                    f"Relationship {edge['id']} dominates '{dominated}', "
+                    f"which is not a regulator of {edge['target']}"
+                )
+
+    return {
+        'name': data.get('name', 'Imported Model'),
+        'description': data.get('description', ''),
+        'nodes': nodes,
+        'edges': edges,
+        'logic': CELL_COLLECTIVE_LOGIC
+    }
+
+
+def has_rules(model: Dict) -> bool:
+    """True if the model needs the rule engine rather than plain masks."""
+    return model.get('logic') == CELL_COLLECTIVE_LOGIC or any(
+        edge.get('conditions') or edge.get('dominates') for edge in model['edges']
+    )
+
+
+def compile_rules(model: Dict, index: Dict[str, int],
+                  targets: Optional[Set[int]] = None) -> List[Optional[Rule]]:
+    """Compile each node's regulators into a closure over the packed state.
+
+    Args:
+        model: Model whose edges may carry 'conditions' and 'dominates'
+        index: Node id -> bit index, as in ``CompiledNetwork.index``
+        targets: Only compile these nodes (the others are None)
+
+    Returns:
+        Per-node ``rule(state) -> bool``; nodes without activation or
+        inhibition regulators are always OFF, as in the mask engines
+    """
+    regulators: List[List[Dict]] = [[] for _ in range(len(index))]
+    for edge in model['edges']:
+        target = index.get(edge['target'])
+        if target is None or edge.get('type') not in ('activation', 'inhibition'):
+            continue
+        if targets is None or target in targets:
+            regulators[target].append(edge)
+
+    inhibitor_only_on = model.get('logic') == CELL_COLLECTIVE_LOGIC
+    return [
+        None if targets is not None and i not in targets
+        else _compile_node(edges, index, inhibitor_only_on) if edges else _never
+        for i, edges in enumerate(regulators)
+    ]
+
+
+def rule_inputs(model: Dict, index: Dict[str, int],
+                targets: Optional[Set[int]] = None) -> List[Tuple[int, ...]]:
+    """Per-node sorted indices of every node its rule reads.
+
+    That is the regulators plus every component named in their conditions.
+    With ``targets``, only those nodes' inputs are collected.
+    """
+    inputs: List[set] = [set() for _ in range(len(index))]
+    for edge in model['edges']:
+        target = index.get(edge['target'])
+        if target is None or edge.get('type') not in ('activation', 'inhibition'):
+            continue
+        if targets is not None and target not in targets:
+            continue
+        if edge['source'] in index:
+            inputs[target].add(index[edge['source']])
+        pending = list(edge.get('conditions') or [])
+        while pending:
+            condition = pending.pop()
+            inputs[target].update(index[c] for c in condition.get('components', []) if c in index)
+            pending.extend(condition.get('subconditions', []))
+    return [tuple(sorted(nodes)) for nodes in inputs]
+
+
+def build_truth_tables(network, max_inputs: int) -> List[Optional[bytes]]:
+    """Materialize the rule of every node that reads at most ``max_inputs`` nodes.
+
+    Entry ``j`` of a node's table is its next value when input ``b`` (in
+    ``network.rule_inputs`` order) has the value of bit ``b`` of ``j``.
+
+    Returns:
+        Per-node table of 2^k bytes; None for fixed nodes and nodes with
+        more than ``max_inputs`` inputs
+    """
+    tables: List[Optional[bytes]] = [None] * network.size
+    for i in network.update_order:
+        tables[i] = truth_table(network, i, max_inputs)
+    return tables
+
+
+def truth_table(network, i: int, max_inputs: int) -> Optional[bytes]:
+    """Table of updated node ``i`` as in :func:`build_truth_tables`, or
+    None if it reads more than ``max_inputs`` nodes."""
+    inputs = network.rule_inputs[i]
+    if len(inputs) > max_inputs:
+        return None
+    rule = network.rules[i]
+    return bytes(1 if rule(_spread(j, inputs)) else 0 for j in range(1 << len(inputs)))
+
+
+class RuleEngine(AsynchronousScheduler):
+    """Engine for models with compiled regulation rules.
+
+    Synchronous by default; with ``asynchronous=True`` it schedules
+    updates exactly as ``AsynchronousEngine`` does (same modes, ticks and
+    random draws), re-evaluating a flipped node's dependents to keep the
+    unstable set current. Nodes reading at most ``table_inputs`` nodes
+    are evaluated by a lookup in their precomputed truth table instead
+    of their rule.
+    """
+
+    name = 'rules'
+
+    def __init__(self, network, asynchronous: bool = False,
+                 mode: str = 'random_order', seed: Optional[int] = None,
+                 table_inputs: int = 0):
+        """Initialize engine.
+
+        Args:
+            network: Compiled network with ``rules``
+            asynchronous: Update one node at a time instead of all at once
+            mode: Asynchronous mode, 'random_order' or 'random_node'
+            seed: Seed for the asynchronous random number generator
+            table_inputs: Largest number of inputs for which a node is
+                evaluated by truth-table lookup (0 disables tables)
+
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown async_mode '{mode}'. Choose from: {', '.join(self.MODES)}")
+        self.network = network
+        self.deterministic = not asynchronous
+        self.mode = mode
+        self._rng = random.Random(seed)
+        tables = network.truth_tables(table_inputs) if table_inputs > 0 else [None] * network.size
+        self._rules = [
+            (i, 1 << i, network.rules[i] if tables[i] is None
+             else _table_rule(network.rule_inputs[i], tables[i]))
+            for i in network.update_order
+        ]
+        self._state = 0
+        self.nodes_evaluated = 0
+
+        if asynchronous:
+            self._rule_of = {i: rule for i, _, rule in self._rules}
+            self._updatable = [False] * network.size
+            dependents: List[Set[int]] = [set() for _ in range(network.size)]
+            for i in network.update_order:
+                self._updatable[i] = True
+                for source in network.rule_inputs[i]:
+                    dependents[source].add(i)
+            self._dependents = [sorted(targets) for targets in dependents]
+            self._reset_unstable()
+
+    def reset(self, vector: List[int]) -> None:
+        """Load an index-ordered 0/1 state vector."""
+        self._state = self.network.pack(vector)
+        if not self.deterministic:
+            self._reset_unstable()
+
+    def vector(self) -> List[int]:
+        """Get the current state as an index-ordered list of 0/1."""
+        return self.network.unpack(self._state)
+
+    def packed(self) -> int:
+        """Get the current state packed into an int."""
+        return self._state
+
+    def is_fixed_point(self) -> bool:
+        """True if no node would change under its update rule."""
+        if not self.deterministic:
+            return not self._unstable
+        state = self._state
+        return all(bool(rule(state)) == bool(state & bit) for _, bit, rule in self._rules)
+
+    def step(self) -> None:
+        """Advance the state by one step."""
+        if self.deterministic:
+            state = self._state
+            new_state = state & self.network.fixed_mask
+            for _, bit, rule in self._rules:
+                if rule(state):
+                    new_state |= bit
+            self._state = new_state
+            self.nodes_evaluated = len(self._rules)
+            return
+
+        self.nodes_evaluated = 0
+        self._asynchronous_step()
+
+    def _flip(self, i: int) -> List[int]:
+        """Flip node ``i`` and return dependents that became unstable."""
+        self._state ^= 1 << i
+        self._refresh(i)
+        self.nodes_evaluated += 1 + len(self._dependents[i])
+        return [target for target in self._dependents[i] if self._refresh(target)]
+
+    def _disagrees(self, i: int) -> bool:
+        return bool(self._rule_of[i](self._state)) != bool(self._state >> i & 1)
+
+
+# Compilation helpers
+
+def _compile_node(edges: List[Dict], index: Dict[str, int], inhibitor_only_on: bool) -> Rule:
+    has_activators = any(edge['type'] == 'activation' for edge in edges)
+    default_on = inhibitor_only_on and not has_activators
+
+    regulators = []
+    for edge in edges:
+        source = index.get(edge['source'])
+        conditions = [_compile_condition(c, index) for c in edge.get('conditions') or []]
+        regulators.append((
+            edge.get('id'),
+            1 << source if source is not None else 0,
+            edge['type'] == 'activation',
+            _all_of(conditions) if conditions else None
+        ))
+
+    if not any(edge.get('dominates') for edge in edges):
+        activators = [(mask, cond) for _, mask, positive, cond in regulators if positive]
+        inhibitors = [(mask, cond) for _, mask, positive, cond in regulators if not positive]
+        if not any(cond for _, _, _, cond in regulators):
+            # Plain regulation: two mask tests, as in BitsetEngine
+            activator_mask = 0
+            for mask, _ in activators:
+                activator_mask |= mask
+            inhibitor_mask = 0
+            for mask, _ in inhibitors:
+                inhibitor_mask |= mask
+            if default_on:
+                return lambda state: not state & inhibitor_mask
+            return lambda state: bool(state & activator_mask) and not state & inhibitor_mask
+
+        def conditional_rule(state):
+            for mask, cond in inhibitors:
+                if state & mask and (cond is None or cond(state)):
+                    return False
+            if default_on:
+                return True
+            for mask, cond in activators:
+                if state & mask and (cond is None or cond(state)):
+                    return True
+            return False
+        return conditional_rule
+
+    position = {edge.get('id'): k for k, edge in enumerate(edges)}
+    dominated_by = [
+        [position[d] for d in edge.get('dominates') or [] if d in position]
+        for edge in edges
+    ]
+
+    def dominance_rule(state):
+        active = [
+            bool(state & mask) and (cond is None or cond(state))
+            for _, mask, _, cond in regulators
+        ]
+        effective = list(active)
+        for k, dominated in enumerate(dominated_by):
+            if active[k]:
+                for d in dominated:
+                    effective[d] = False
+        on_positive = off_negative = False
+        for (_, _, positive, _), is_effective in zip(regulators, effective):
+            if is_effective:
+                if positive:
+                    on_positive = True
+                else:
+                    off_negative = True
+        if off_negative:
+            return False
+        return default_on or on_positive
+    return dominance_rule
+
+
+def _compile_condition(condition: Dict, index: Dict[str, int]) -> Rule:
+    mask = 0
+    unknown = False
+    for component in condition.get('components', []):
+        if component in index:
+            mask |= 1 << index[component]
+        else:
+            unknown = True  # unknown components are never ON
+
+    want_on = condition.get('state', 1) == 1
+    if condition.get('relation', 'and') == 'and':
+        if want_on:
+            test = (lambda state: False) if unknown else (lambda state: state & mask == mask)
+        else:
+            test = lambda state: not state & mask
+    else:
+        if want_on:
+            test = lambda state: bool(state & mask)
+        else:
+            test = (lambda state: True) if unknown else (lambda state: state & mask != mask)
+
+    subconditions = [_compile_condition(c, index) for c in condition.get('subconditions', [])]
+    if subconditions:
+        combine = _all_of if condition.get('sub_relation', 'and') == 'and' else _any_of
+        sub_test = combine(subconditions)
+        component_test = test
+        if condition.get('components'):
+            test = lambda state: component_test(state) and sub_test(state)
+        else:
+            test = sub_test
+
+    if condition.get('type', 'if') == 'unless':
+        positive_test = test
+        return lambda state: not positive_test(state)
+    return test
+
+
+def _spread(j: int, inputs: Tuple[int, ...]) -> int:
+    """Packed state with ``inputs[b]`` ON for every set bit ``b`` of ``j``."""
+    state = 0
+    for b, i in enumerate(inputs):
+        if j >> b & 1:
+            state |= 1 << i
+    return state
+
+
+def _table_rule(inputs: Tuple[int, ...], table: bytes) -> Rule:
+    """Generate ``lambda state: table[index]`` with the bit gather unrolled."""
+    terms = [f'(state >> {i} & 1) << {b}' if b else f'(state >> {i} & 1)'
+             for b, i in enumerate(inputs)]
+    return eval(f"lambda state: table[{' | '.join(terms) or '0'}]", {'table': table})
+
+
+def _never(state: int) -> bool:
+    return False
+
+
+def _all_of(predicates: List[Rule]) -> Rule:
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda state: all(predicate(state) for predicate in predicates)
+
+
+def _any_of(predicates: List[Rule]) -> Rule:
+    return lambda state: any(predicate(state) for predicate in predicates)
+
+
+def _parse_condition(condition: Dict, add_component: Callable[[Dict, str], None]) -> Dict:
+    """Normalize one (sub)condition, registering the components it names."""
+    kind = str(condition.get('type', 'IF')).lower()
+    state = str(condition.get('state', 'ON')).upper()
+    relation = str(_first(condition, 'relation', 'speciesRelation') or 'AND').lower()
+    sub_relation = str(condition.get('subConditionRelation', 'AND')).lower()
+    if kind not in ('if', 'unless'):
+        raise ValueError(f"Unknown condition type '{kind}'")
+    if state not in ('ON', 'OFF'):
+        raise ValueError(f"Unknown condition state '{state}'")
+    if relation not in ('and', 'or') or sub_relation not in ('and', 'or'):
+        raise ValueError('Condition relations must be AND or OR')
+
+    components = [str(c) for c in _list(condition, 'components')]
+    for component_id in components:
+        add_component({'id': component_id}, 'internal')
+
+    return {
+        'type': kind,
+        'state': 1 if state == 'ON' else 0,
+        'relation': relation,
+        'components': components,
+        'sub_relation': sub_relation,
+        'subconditions': [
+            _parse_condition(c, add_component) for c in _objects(condition, 'subConditions')
+        ]
+    }
+
+
+def _list(mapping: Dict, key: str) -> List:
+    """``mapping[key]`` (default empty), which must be a list."""
+    value = mapping.get(key)
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise ValueError(f"'{key}' must be a list")
+    return value
+
+
+def _objects(mapping: Dict, key: str) -> List[Dict]:
+    """``mapping[key]`` (default empty), which must be a list of objects."""
+    value = _list(mapping, key)
+    if not all(isinstance(item, dict) for item in value):
+        raise ValueError(f"'{key}' must be a list of objects")
+    return value
+
+
+def _first(mapping: Dict, *keys):
+    for key in keys:
+        if mapping.get(key) is not None:
+            return mapping[key]
+    return None
@@ -0,0 +1,105 @@
+"""Asynchronous update schemes shared by the event-driven engines.
+
+``AsynchronousEngine`` (plain activation/inhibition) and ``RuleEngine``
+(compiled Cell Collective rules) differ only in how a node is evaluated;
+both keep the set of *unstable* nodes (current value differs from what
+the rule says) and schedule updates with the same random draws, so the
+same seed gives the same trajectory on the same network.
+"""
+import heapq
+import math
+from typing import Dict, List
+
+
+class AsynchronousScheduler:
+    """Unstable-set bookkeeping plus the 'random_order' and 'random_node' modes.
+
+    Modes:
+        random_order: each step visits every node once in a fresh random
+            order, updating in place. Only unstable nodes are actually
+            visited, in order of lazily drawn uniform keys.
+        random_node: each step is N ticks; every tick updates one node
+            chosen uniformly at random. Runs of ticks that hit stable
+            nodes are skipped by drawing their length geometrically.
+
+    Subclasses set ``network``, ``mode``, ``_rng`` and ``_updatable``
+    (per-node bool), and implement ``_disagrees(i)`` (the node's rule
+    would change it) and ``_flip(i)``, which flips node ``i`` and returns
+    the dependents that became unstable, in ascending index order.
+    """
+
+    MODES = ('random_order', 'random_node')
+
+    def _reset_unstable(self) -> None:
+        """Rebuild the unstable set after a new state was loaded."""
+        self._unstable: List[int] = []
+        self._position: Dict[int, int] = {}
+        for i in self.network.update_order:
+            self._refresh(i)
+
+    def _asynchronous_step(self) -> None:
+        if self.mode == 'random_order':
+            self._random_order_sweep()
+        else:
+            self._random_node_ticks(self.network.size)
+
+    def _random_order_sweep(self) -> None:
+        rng = self._rng
+        keys = {i: rng.random() for i in self._unstable}
+        heap = [(key, i) for i, key in keys.items()]
+        heapq.heapify(heap)
+        visited = set()
+
+        while heap:
+            current_key, i = heapq.heappop(heap)
+            if i in visited:
+                continue
+            visited.add(i)
+            if i not in self._position:
+                continue  # became stable before its turn
+            for target in self._flip(i):
+                if target in visited:
+                    continue
+                # A node's key is independent of everything observed so
+                # far, so drawing it on first need is equivalent to having
+                # drawn the whole permutation up front.
+                key = keys.get(target)
+                if key is None:
+                    key = keys[target] = rng.random()
+                if key > current_key:
+                    heapq.heappush(heap, (key, target))
+
+    def _random_node_ticks(self, ticks: int) -> None:
+        rng = self._rng
+        n = self.network.size
+        while self._unstable:
+            p = len(self._unstable) / n
+            if p < 1:
+                # Ticks up to and including the first one that picks an
+                # unstable node: geometric with success probability p.
+                skip = 1 + int(math.log(1.0 - rng.random()) / math.log(1.0 - p))
+            else:
+                skip = 1
+            if skip > ticks:
+                return
+            ticks -= skip
+            self._flip(self._unstable[rng.randrange(len(self._unstable))])
+
+    def _refresh(self, i: int) -> bool:
+        """Re-evaluate node ``i``; return True if it just became unstable."""
+        if not self._updatable[i]:
+            return False
+        unstable = self._disagrees(i)
+        position = self._position.get(i)
+        if unstable and position is None:
+            self._position[i] = len(self._unstable)
+            self._unstable.append(i)
+            return True
+        if not unstable and position is not None:
+            # Swap-remove to keep random choice O(1)
+            last = self._unstable.pop()
+            if last != i:
+                self._unstable[position] = last
+                self._position[last] = position
+            del self._position[i]
+        return False
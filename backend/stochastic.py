@@ -0,0 +1,101 @@
+"""Stochastic multi-replicate simulation reporting activity levels.
+
+Activity level is the fraction of time a node is ON, as reported by
+Cell Collective's simulator. Replicates are rows of one state matrix,
+stepped together with the batch kernel; external inputs are re-drawn
+every step from their ON-probability and every other node flips with
+its noise probability after each update.
+"""
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from batch import step_states
+from network import CompiledNetwork
+
+# Longest gap between progress reports, in seconds, when steps are slow
+PROGRESS_INTERVAL = 0.5
+
+
+def run_activity(
+    network: CompiledNetwork,
+    initial_states: np.ndarray,
+    groups: int,
+    input_indices: List[int],
+    input_levels: np.ndarray,
+    noise: np.ndarray,
+    steps: int,
+    window: int,
+    stride: int,
+    rng: np.random.Generator,
+    progress: Optional[Callable[[str, int, int], None]] = None,
+    phase: str = 'simulate'
+) -> Dict:
+    """Step ``groups`` blocks of replicates and track windowed activity.
+
+    Rows of ``initial_states`` are split into ``groups`` equal, contiguous
+    blocks (e.g. one block per input level); activity is averaged over
+    the replicates of each block.
+
+    Args:
+        network: Compiled network
+        initial_states: (rows x nodes) initial 0/1 states
+        groups: Number of replicate blocks
+        input_indices: External nodes driven by an ON-probability
+        input_levels: (rows x len(input_indices)) ON-probabilities
+        noise: Per-node flip probability applied after every step
+        steps: Number of steps
+        window: Sliding window length, in steps
+        stride: Steps between recorded windows
+        rng: Random generator
+        progress: Optional callback ``(phase, done, total)``, called
+            about every 1% of the steps and at least every
+            PROGRESS_INTERVAL seconds
+        phase: Phase name passed to ``progress``
+
+    Returns:
+        ``activity`` (groups x nodes) over the last ``window`` steps and
+        ``trace``: list of (step, groups x nodes activity) for each
+        window ending at ``window``, ``window + stride``, ...
+    """
+    states = np.array(initial_states, dtype=np.uint8, copy=True)
+    rows = states.shape[0]
+    replicates = rows // groups
+    noisy = np.flatnonzero(noise > 0)
+    noise = noise[noisy]
+    _draw_inputs(states, input_indices, input_levels, rng)
+
+    ring = np.zeros((window, groups, network.size), dtype=np.float64)
+    trace = []
+    report_every = max(1, steps // 100)
+    reported = time.monotonic()
+    for step in range(1, steps + 1):
+        states = step_states(network, states)
+        if noisy.size:
+            flips = rng.random((rows, noisy.size)) < noise
+            states[:, noisy] ^= flips.astype(np.uint8)
+        _draw_inputs(states, input_indices, input_levels, rng)
+
+        ring[step % window] = states.reshape(groups, replicates, -1).mean(axis=1)
+        if step >= window and (step - window) % stride == 0:
+            trace.append((step, ring.mean(axis=0)))
+        if progress and (step % report_every == 0
+                         or time.monotonic() - reported >= PROGRESS_INTERVAL):
+            progress(phase, step, steps)
+            reported = time.monotonic()
+
+    filled = min(steps, window)
+    if filled == window:
+        activity = ring.mean(axis=0)
+    else:
+        activity = ring[1:filled + 1].mean(axis=0) if filled else states.reshape(
+            groups, replicates, -1).mean(axis=1)
+    return {'activity': activity, 'trace': trace, 'final_states': states}
+
+
+def _draw_inputs(states: np.ndarray, indices: List[int], levels: np.ndarray,
+                 rng: np.random.Generator) -> None:
+    """Set driven external nodes ON with their per-row probability."""
+    if indices:
+        states[:, indices] = rng.random(levels.shape) < levels
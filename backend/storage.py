@@ -0,0 +1,420 @@
+"""Pluggable model storage.
+
+``MemoryModelStore`` keeps models in a process-local dict.
+``SQLiteModelStore`` persists them in one SQLite database in WAL mode, so
+every web worker process sees the same models and they survive restarts.
+
+Stored models are immutable snapshots: callers never mutate a model
+returned by ``get``, they write a new dict with a higher version through
+``update``, which only succeeds if the stored version is still the one the
+caller read (compare-and-set). The most recent versions (up to
+``Config.MODEL_VERSION_RETENTION``) stay readable through ``get_version``;
+node and edge lists an update did not touch are shared with the previous
+version instead of being copied.
+"""
+import abc
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from config import Config
+
+
+class ModelStore(abc.ABC):
+    """Interface of a model storage backend."""
+
+    @abc.abstractmethod
+    def get(self, model_id: str) -> Optional[Dict]:
+        """Return the current version of a model, or None if not found."""
+
+    @abc.abstractmethod
+    def get_version(self, model_id: str, version: int) -> Optional[Dict]:
+        """Return one version of a model, or None if it does not exist or
+        was pruned."""
+
+    @abc.abstractmethod
+    def insert(self, model: Dict) -> None:
+        """Store a new model.
+
+        Raises:
+            ValueError: If a model with the same id already exists
+        """
+
+    @abc.abstractmethod
+    def insert_many(self, models: List[Dict]) -> None:
+        """Store several new models in one transaction (all or none).
+
+        Raises:
+            ValueError: If any of the ids already exists
+        """
+
+    @abc.abstractmethod
+    def update(self, model: Dict, expected_version: int) -> bool:
+        """Replace a model if its stored version is ``expected_version``.
+
+        Returns:
+            False if the model was deleted or changed in the meantime
+        """
+
+    @abc.abstractmethod
+    def delete(self, model_id: str) -> bool:
+        """Delete a model and all its versions; returns False if it did
+        not exist."""
+
+    @abc.abstractmethod
+    def list_models(self, owner: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Metadata (id, name, owner, version, updated_at) of the most
+        recently updated models, optionally only those of ``owner``."""
+
+
+class MemoryModelStore(ModelStore):
+    """Process-local store; models are lost when the process exits."""
+
+    def __init__(self, version_retention: int = 0):
+        """
+        Args:
+            version_retention: Most recent versions kept per model (0: all)
+        """
+        self.version_retention = version_retention
+        self._models: Dict[str, Dict] = {}
+        self._versions: Dict[str, Dict[int, Dict]] = {}  # model_id -> version -> model
+        self._lock = threading.Lock()
+
+    def get(self, model_id: str) -> Optional[Dict]:
+        return self._models.get(model_id)
+
+    def get_version(self, model_id: str, version: int) -> Optional[Dict]:
+        return self._versions.get(model_id, {}).get(version)
+
+    def insert(self, model: Dict) -> None:
+        with self._lock:
+            if model['id'] in self._models:
+                raise ValueError(f"Model {model['id']} already exists")
+            self._models[model['id']] = model
+            self._versions[model['id']] = {model['version']: model}
+
+    def insert_many(self, models: List[Dict]) -> None:
+        with self._lock:
+            ids = [model['id'] for model in models]
+            if len(set(ids)) != len(ids) or any(model_id in self._models for model_id in ids):
+                raise ValueError('A model with one of these ids already exists')
+            for model in models:
+                self._models[model['id']] = model
+                self._versions[model['id']] = {model['version']: model}
+
+    def update(self, model: Dict, expected_version: int) -> bool:
+        with self._lock:
+            current = self._models.get(model['id'])
+            if current is None or current['version'] != expected_version:
+                return False
+            self._models[model['id']] = model
+            versions = self._versions[model['id']]
+            versions[model['version']] = model
+            if self.version_retention > 0:
+                oldest = model['version'] - self.version_retention
+                for version in [v for v in versions if v <= oldest]:
+                    del versions[version]
+            return True
+
+    def delete(self, model_id: str) -> bool:
+        with self._lock:
+            self._versions.pop(model_id, None)
+            return self._models.pop(model_id, None) is not None
+
+    def list_models(self, owner: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        models = [
+            model for model in list(self._models.values())
+            if owner is None or model.get('owner') == owner
+        ]
+        models.sort(key=lambda model: model['updated_at'], reverse=True)
+        return [_metadata(model) for model in models[:limit]]
+
+
+class SQLiteModelStore(ModelStore):
+    """Models as zlib-compressed JSON blobs in a SQLite database.
+
+    The current version of each model is one row in ``models``, with its
+    metadata in indexed columns next to the blob. Every version is also a
+    row in ``model_versions`` whose node and edge lists are references to
+    content-addressed rows in ``model_parts``, so versions that share a
+    list share its storage. Each thread (and each process, after a fork)
+    opens its own connection; statements are constant strings, so
+    sqlite3's statement cache prepares each of them once per connection.
+    Reads go through a small LRU cache of decoded models that is
+    validated against the stored version on every hit, so updates made by
+    other processes are seen immediately. Versions beyond the retention
+    limit are deleted on update, together with parts no version uses.
+    """
+
+    _SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS models ('
+        ' id TEXT PRIMARY KEY,'
+        ' name TEXT NOT NULL,'
+        ' owner TEXT,'
+        ' version INTEGER NOT NULL,'
+        ' updated_at TEXT NOT NULL,'
+        ' data BLOB NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS models_name ON models (name)',
+        'CREATE INDEX IF NOT EXISTS models_owner ON models (owner, updated_at)',
+        'CREATE INDEX IF NOT EXISTS models_updated_at ON models (updated_at)',
+        'CREATE TABLE IF NOT EXISTS model_versions ('
+        ' model_id TEXT NOT NULL,'
+        ' version INTEGER NOT NULL,'
+        ' meta BLOB NOT NULL,'
+        ' nodes TEXT NOT NULL,'
+        ' edges TEXT NOT NULL,'
+        ' PRIMARY KEY (model_id, version))',
+        'CREATE INDEX IF NOT EXISTS model_versions_nodes ON model_versions (nodes)',
+        'CREATE INDEX IF NOT EXISTS model_versions_edges ON model_versions (edges)',
+        'CREATE TABLE IF NOT EXISTS model_parts (hash TEXT PRIMARY KEY, data BLOB NOT NULL)',
+    )
+    _SELECT_VERSION = 'SELECT version FROM models WHERE id = ?'
+    _SELECT = 'SELECT version, data FROM models WHERE id = ?'
+    _INSERT = ('INSERT INTO models (id, name, owner, version, updated_at, data)'
+               ' VALUES (?, ?, ?, ?, ?, ?)')
+    _UPDATE = ('UPDATE models SET name = ?, owner = ?, version = ?, updated_at = ?, data = ?'
+               ' WHERE id = ? AND version = ?')
+    _DELETE = 'DELETE FROM models WHERE id = ?'
+    _LIST = ('SELECT id, name, owner, version, updated_at FROM models'
+             ' ORDER BY updated_at DESC LIMIT ?')
+    _LIST_OWNER = ('SELECT id, name, owner, version, updated_at FROM models'
+                   ' WHERE owner = ? ORDER BY updated_at DESC LIMIT ?')
+    _SELECT_SNAPSHOT = ('SELECT v.meta, n.data, e.data FROM model_versions v'
+                        ' JOIN model_parts n ON n.hash = v.nodes'
+                        ' JOIN model_parts e ON e.hash = v.edges'
+                        ' WHERE v.model_id = ? AND v.version = ?')
+    _INSERT_SNAPSHOT = ('INSERT INTO model_versions (model_id, version, meta, nodes, edges)'
+                        ' VALUES (?, ?, ?, ?, ?)')
+    _SELECT_SNAPSHOT_PARTS = 'SELECT nodes, edges FROM model_versions WHERE model_id = ?'
+    _DELETE_SNAPSHOTS = 'DELETE FROM model_versions WHERE model_id = ?'
+    _SELECT_EXPIRED_PARTS = ('SELECT nodes, edges FROM model_versions'
+                             ' WHERE model_id = ? AND version <= ?')
+    _DELETE_EXPIRED_SNAPSHOTS = 'DELETE FROM model_versions WHERE model_id = ? AND version <= ?'
+    _PART_EXISTS = 'SELECT 1 FROM model_parts WHERE hash = ?'
+    _INSERT_PART = 'INSERT OR IGNORE INTO model_parts (hash, data) VALUES (?, ?)'
+    _DELETE_UNUSED_PART = ('DELETE FROM model_parts WHERE hash = ? AND NOT EXISTS'
+                           ' (SELECT 1 FROM model_versions WHERE nodes = ? OR edges = ?)')
+
+    def __init__(self, path: str, cache_size: int = 256, version_retention: int = 0):
+        """Open (and if needed create) the database.
+
+        Args:
+            path: Database file, shared by every process using the store
+            cache_size: Decoded models kept in this process's read cache
+            version_retention: Most recent versions kept per model (0: all)
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self.version_retention = version_retention
+        self._local = threading.local()
+        self._cache: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        connection = self._connection()
+        for statement in self._SCHEMA:
+            connection.execute(statement)
+
+    def get(self, model_id: str) -> Optional[Dict]:
+        connection = self._connection()
+        with self._cache_lock:
+            cached = self._cache.get(model_id)
+        if cached is not None:
+            row = connection.execute(self._SELECT_VERSION, (model_id,)).fetchone()
+            if row is not None and row[0] == cached['version']:
+                with self._cache_lock:
+                    if model_id in self._cache:
+                        self._cache.move_to_end(model_id)
+                return cached
+
+        row = connection.execute(self._SELECT, (model_id,)).fetchone()
+        if row is None:
+            self._forget(model_id)
+            return None
+        model = _decode(row[1])
+        self._remember(model)
+        return model
+
+    def get_version(self, model_id: str, version: int) -> Optional[Dict]:
+        current = self.get(model_id)
+        if current is not None and current['version'] == version:
+            return current
+        row = self._connection().execute(self._SELECT_SNAPSHOT, (model_id, version)).fetchone()
+        if row is None:
+            return None
+        model = _decode(row[0])
+        model['nodes'] = _decode(row[1])
+        model['edges'] = _decode(row[2])
+        return model
+
+    def insert(self, model: Dict) -> None:
+        self.insert_many([model])
+
+    def insert_many(self, models: List[Dict]) -> None:
+        connection = self._connection()
+        with _transaction(connection):
+            for model in models:
+                try:
+                    connection.execute(self._INSERT, (
+                        model['id'], model['name'], model.get('owner'), model['version'],
+                        model['updated_at'], _encode(model)
+                    ))
+                except sqlite3.IntegrityError:
+                    raise ValueError(f"Model {model['id']} already exists")
+                self._insert_snapshot(connection, model)
+        for model in models:
+            self._remember(model)
+
+    def update(self, model: Dict, expected_version: int) -> bool:
+        connection = self._connection()
+        with _transaction(connection):
+            cursor = connection.execute(self._UPDATE, (
+                model['name'], model.get('owner'), model['version'], model['updated_at'],
+                _encode(model), model['id'], expected_version
+            ))
+            updated = cursor.rowcount == 1
+            if updated:
+                self._insert_snapshot(connection, model)
+                if self.version_retention > 0:
+                    self._prune_snapshots(connection, model['id'],
+                                          model['version'] - self.version_retention)
+        if not updated:
+            self._forget(model['id'])
+            return False
+        self._remember(model)
+        return True
+
+    def delete(self, model_id: str) -> bool:
+        connection = self._connection()
+        with _transaction(connection):
+            parts = {
+                digest for row in connection.execute(self._SELECT_SNAPSHOT_PARTS, (model_id,))
+                for digest in row
+            }
+            cursor = connection.execute(self._DELETE, (model_id,))
+            connection.execute(self._DELETE_SNAPSHOTS, (model_id,))
+            self._collect_parts(connection, parts)
+        self._forget(model_id)
+        return cursor.rowcount == 1
+
+    def list_models(self, owner: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        connection = self._connection()
+        if owner is None:
+            rows = connection.execute(self._LIST, (limit,)).fetchall()
+        else:
+            rows = connection.execute(self._LIST_OWNER, (owner, limit)).fetchall()
+        return [
+            {'id': row[0], 'name': row[1], 'owner': row[2], 'version': row[3],
+             'updated_at': row[4]}
+            for row in rows
+        ]
+
+    def _insert_snapshot(self, connection: sqlite3.Connection, model: Dict) -> None:
+        """Record ``model`` as a version, storing only node and edge lists
+        that no earlier version already stored."""
+        digests = []
+        for field in _PARTS:
+            data = json.dumps(model[field], separators=(',', ':')).encode('utf-8')
+            digest = hashlib.sha256(data).hexdigest()
+            if connection.execute(self._PART_EXISTS, (digest,)).fetchone() is None:
+                connection.execute(self._INSERT_PART, (digest, zlib.compress(data)))
+            digests.append(digest)
+        meta = {key: value for key, value in model.items() if key not in _PARTS}
+        connection.execute(self._INSERT_SNAPSHOT, (
+            model['id'], model['version'], _encode(meta), *digests
+        ))
+
+    def _prune_snapshots(self, connection: sqlite3.Connection, model_id: str,
+                         oldest: int) -> None:
+        """Delete the versions of a model up to and including ``oldest``."""
+        parts = {
+            digest for row in connection.execute(self._SELECT_EXPIRED_PARTS, (model_id, oldest))
+            for digest in row
+        }
+        if parts:
+            connection.execute(self._DELETE_EXPIRED_SNAPSHOTS, (model_id, oldest))
+            self._collect_parts(connection, parts)
+
+    def _collect_parts(self, connection: sqlite3.Connection, parts: Iterable[str]) -> None:
+        """Delete those of ``parts`` no remaining version refers to."""
+        # Parts may be shared with other versions and other models (copies)
+        for digest in parts:
+            connection.execute(self._DELETE_UNUSED_PART, (digest, digest, digest))
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection, reopened in a forked child process."""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            # Autocommit: every statement is its own short transaction
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
+
+    def _remember(self, model: Dict) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[model['id']] = model
+            self._cache.move_to_end(model['id'])
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _forget(self, model_id: str) -> None:
+        with self._cache_lock:
+            self._cache.pop(model_id, None)
+
+
+def create_store() -> ModelStore:
+    """Build the store selected by ``Config.MODEL_STORE``.
+
+    Raises:
+        ValueError: If MODEL_STORE is neither 'sqlite' nor 'memory'
+    """
+    if Config.MODEL_STORE == 'sqlite':
+        return SQLiteModelStore(Config.MODEL_STORE_PATH, Config.MODEL_STORE_CACHE_SIZE,
+                                Config.MODEL_VERSION_RETENTION)
+    if Config.MODEL_STORE == 'memory':
+        return MemoryModelStore(Config.MODEL_VERSION_RETENTION)
+    raise ValueError(f'Unknown MODEL_STORE: {Config.MODEL_STORE}')
+
+
+# Fields stored once per distinct value and shared between versions
+_PARTS = ('nodes', 'edges')
+
+
+@contextmanager
+def _transaction(connection: sqlite3.Connection) -> Iterator[None]:
+    """Run the enclosed statements in one write transaction."""
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        yield
+    except BaseException:
+        connection.execute('ROLLBACK')
+        raise
+    connection.execute('COMMIT')
+
+
+def _metadata(model: Dict) -> Dict:
+    return {
+        'id': model['id'],
+        'name': model['name'],
+        'owner': model.get('owner'),
+        'version': model['version'],
+        'updated_at': model['updated_at']
+    }
+
+
+def _encode(model: Dict) -> bytes:
+    return zlib.compress(json.dumps(model, separators=(',', ':')).encode('utf-8'))
+
+
+def _decode(data: bytes):
+    return json.loads(zlib.decompress(data).decode('utf-8'))
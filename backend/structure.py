@@ -0,0 +1,260 @@
+"""Incrementally maintained structural index behind ``ModelService.analyze``."""
+import threading
+from collections import Counter, defaultdict
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+from graph_analysis import elementary_cycles, loop_sign, strongly_connected_components
+
+EdgeKey = Tuple[str, str, Optional[str]]  # (source, target, type)
+
+
+def edge_key(edge: Dict) -> EdgeKey:
+    """Identity of an edge for counting purposes."""
+    return (edge['source'], edge['target'], edge.get('type'))
+
+
+class StructuralIndex:
+    """Node/edge counters, adjacency and per-SCC loop cache for one model.
+
+    Nodes and edges can be added or removed one at a time; counters and
+    adjacency are updated in O(1). Strongly connected components are
+    re-derived lazily (linear time) after a change, but the expensive
+    loop enumeration is cached per component, keyed by the component's
+    internal edges, so components an edit did not touch are reused.
+    A full summary is cached until the next change, so repeated analyze
+    calls are O(1).
+    """
+
+    def __init__(self, model: Dict):
+        """Build the index from a model.
+
+        Args:
+            model: Model dictionary with 'nodes', 'edges' and 'version'
+        """
+        self.version = model.get('version')
+        self.node_types: Counter = Counter()
+        self.edge_types: Counter = Counter()
+        self.node_count = 0
+        self.edge_count = 0
+        self._node_ids: Counter = Counter()  # id -> multiplicity
+        # source -> target -> Counter of edge types
+        self._successors: Dict[str, Dict[str, Counter]] = defaultdict(dict)
+        self._component_loops: Dict[Tuple, List[Dict]] = {}
+        self._summaries: Dict[Tuple, Dict] = {}
+        self._lock = threading.RLock()
+
+        for node in model['nodes']:
+            self.add_node(node)
+        for edge in model['edges']:
+            self.add_edge(edge)
+
+    # Incremental updates
+
+    def add_node(self, node: Dict) -> None:
+        """Add one node entry."""
+        with self._lock:
+            self.node_count += 1
+            self.node_types[node.get('type')] += 1
+            self._node_ids[node['id']] += 1
+            self._summaries.clear()
+
+    def remove_node(self, node: Dict) -> None:
+        """Remove one node entry (edges referencing it are kept)."""
+        with self._lock:
+            self.node_count -= 1
+            self.node_types[node.get('type')] -= 1
+            self._node_ids[node['id']] -= 1
+            if self._node_ids[node['id']] <= 0:
+                del self._node_ids[node['id']]
+            self._summaries.clear()
+
+    def add_edge(self, edge: Dict) -> None:
+        """Add one edge entry."""
+        with self._lock:
+            key = edge_key(edge)
+            self.edge_count += 1
+            self.edge_types[key[2]] += 1
+            self._successors[key[0]].setdefault(key[1], Counter())[key[2]] += 1
+            self._summaries.clear()
+
+    def remove_edge(self, edge: Dict) -> None:
+        """Remove one edge entry."""
+        with self._lock:
+            key = edge_key(edge)
+            self.edge_count -= 1
+            self.edge_types[key[2]] -= 1
+            targets = self._successors[key[0]]
+            types = targets[key[1]]
+            types[key[2]] -= 1
+            if types[key[2]] <= 0:
+                del types[key[2]]
+            if not types:
+                del targets[key[1]]
+            self._summaries.clear()
+
+    def apply_update(self, old_model: Dict, new_model: Dict) -> None:
+        """Apply the difference between two versions of a model's nodes and edges.
+
+        Args:
+            old_model: Model contents the index currently reflects
+            new_model: New model contents, including the new 'version'
+        """
+        with self._lock:
+            old_nodes = Counter(_node_key(n) for n in old_model['nodes'])
+            new_nodes = Counter(_node_key(n) for n in new_model['nodes'])
+            for (node_id, node_type), count in (old_nodes - new_nodes).items():
+                for _ in range(count):
+                    self.remove_node({'id': node_id, 'type': node_type})
+            for (node_id, node_type), count in (new_nodes - old_nodes).items():
+                for _ in range(count):
+                    self.add_node({'id': node_id, 'type': node_type})
+
+            old_edges = Counter(edge_key(e) for e in old_model['edges'])
+            new_edges = Counter(edge_key(e) for e in new_model['edges'])
+            for (source, target, edge_type), count in (old_edges - new_edges).items():
+                for _ in range(count):
+                    self.remove_edge({'source': source, 'target': target, 'type': edge_type})
+            for (source, target, edge_type), count in (new_edges - old_edges).items():
+                for _ in range(count):
+                    self.add_edge({'source': source, 'target': target, 'type': edge_type})
+
+            self.version = new_model.get('version')
+
+    def apply_changes(self, changes: Dict, version: Optional[int]) -> None:
+        """Apply a change set from ``model_patch.apply_operations``.
+
+        Args:
+            changes: Net removed and added nodes and edges
+            version: Model version after the changes
+        """
+        with self._lock:
+            for node in changes['removed_nodes']:
+                self.remove_node(node)
+            for node in changes['added_nodes']:
+                self.add_node(node)
+            for edge in changes['removed_edges']:
+                self.remove_edge(edge)
+            for edge in changes['added_edges']:
+                self.add_edge(edge)
+            self.version = version
+
+    # Queries
+
+    def summary(self, max_length: Optional[int], max_loops: int,
+                version: Optional[int] = None, progress=None) -> Optional[Dict]:
+        """Counters plus feedback loops, cached until the next change.
+
+        Args:
+            max_length: Longest loop (in edges) to report
+            max_loops: Maximum number of loops to report
+            version: If given, only summarize that model version
+            progress: Optional callback ``(phase, done, total)``, called
+                per component and periodically during loop enumeration
+
+        Returns:
+            Structural metrics in the shape returned by ``analyze``, or
+            None if the index no longer reflects ``version``
+        """
+        with self._lock:
+            if version is not None and version != self.version:
+                return None
+            cache_key = (max_length, max_loops)
+            cached = self._summaries.get(cache_key)
+            if cached is not None:
+                return cached
+
+            loops = []
+            truncated = False
+            reused = {}
+            components = self._components()
+            for done, component in enumerate(components):
+                if len(loops) > max_loops:
+                    break
+                check = None
+                if progress:
+                    progress('loops', done, len(components))
+                    check = lambda done=done: progress('loops', done, len(components))
+                key, component_loops = self._loops_for(component, max_length, max_loops + 1, check)
+                reused[key] = component_loops
+                loops.extend(component_loops)
+            # Keep only enumerations of components that still exist
+            self._component_loops = reused
+            if len(loops) > max_loops:
+                truncated = True
+                loops = loops[:max_loops]
+
+            summary = {
+                'node_count': self.node_count,
+                'edge_count': self.edge_count,
+                'external_nodes': self.node_types['external'],
+                'internal_nodes': self.node_types['internal'],
+                'activation_edges': self.edge_types['activation'],
+                'inhibition_edges': self.edge_types['inhibition'],
+                'feedback_loops': loops,
+                'feedback_loops_truncated': truncated,
+                'positive_loops': sum(1 for loop in loops if loop['sign'] == 'positive'),
+                'negative_loops': sum(1 for loop in loops if loop['sign'] == 'negative')
+            }
+            self._summaries[cache_key] = summary
+            return summary
+
+    def _components(self) -> List[List[str]]:
+        """SCCs that can hold loops (size > 1, or a self-loop)."""
+        nodes = list(self._node_ids)
+        graph = {
+            node: {target for target in self._successors.get(node, ()) if target in self._node_ids}
+            for node in nodes
+        }
+        index = {node: i for i, node in enumerate(nodes)}
+        int_graph = {index[node]: {index[t] for t in targets} for node, targets in graph.items()}
+        components = []
+        for component in strongly_connected_components(int_graph):
+            members = [nodes[i] for i in sorted(component)]
+            if len(members) > 1 or members[0] in graph[members[0]]:
+                components.append(members)
+        return components
+
+    def _loops_for(self, members: List[str], max_length: Optional[int], limit: int,
+                   check=None):
+        """Loops inside one component, reusing an earlier enumeration if unchanged.
+
+        Returns:
+            Tuple of (cache key, loops)
+        """
+        member_set = set(members)
+        internal = frozenset(
+            (node, target, edge_type)
+            for node in members
+            for target, types in self._successors.get(node, {}).items()
+            if target in member_set
+            for edge_type in types
+        )
+        cache_key = (internal, max_length, limit)
+        loops = self._component_loops.get(cache_key)
+        if loops is not None:
+            return cache_key, loops
+
+        index = {node: i for i, node in enumerate(members)}
+        graph = {i: set() for i in range(len(members))}
+        signs = defaultdict(set)
+        for source, target, edge_type in internal:
+            graph[index[source]].add(index[target])
+            if edge_type == 'activation':
+                signs[(index[source], index[target])].add(1)
+            elif edge_type == 'inhibition':
+                signs[(index[source], index[target])].add(-1)
+
+        loops = [
+            {
+                'nodes': [members[i] for i in cycle] + [members[cycle[0]]],
+                'length': len(cycle),
+                'sign': loop_sign(cycle, signs)
+            }
+            for cycle in islice(elementary_cycles(graph, max_length, check), limit)
+        ]
+        return cache_key, loops
+
+
+def _node_key(node: Dict) -> Tuple[str, Optional[str]]:
+    return (node['id'], node.get('type'))
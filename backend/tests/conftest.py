@@ -0,0 +1,7 @@
+"""Shared fixtures; backend modules are imported flat, as app.py does."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Never touch a persistent model store from the tests
+os.environ['MODEL_STORE'] = 'memory'
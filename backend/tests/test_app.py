@@ -0,0 +1,55 @@
+"""Routes must answer malformed request bodies with 400, not 500."""
+import pytest
+
+from benchmarks.synthetic import random_network
+
+ROUTES = [
+    ('post', '/api/models'),
+    ('post', '/api/models/import'),
+    ('put', '/api/models/{id}'),
+    ('patch', '/api/models/{id}'),
+    ('post', '/api/models/{id}/simulate'),
+    ('post', '/api/models/{id}/simulate/batch'),
+    ('post', '/api/models/{id}/perturbation-screen'),
+    ('post', '/api/models/{id}/sweep'),
+    ('post', '/api/jobs'),
+]
+
+BODIES = [
+    {'data': b'not json', 'content_type': 'application/json'},
+    {'data': b'plain text', 'content_type': 'text/plain'},
+    {'json': [1, 2]},
+    {'json': 'string'},
+]
+
+# Routes whose parameters all have defaults accept an empty body
+OPTIONAL_BODY = ('/api/models/{id}/perturbation-screen', '/api/models/{id}/sweep')
+
+
+@pytest.fixture(scope='module')
+def client():
+    from app import app
+    return app.test_client()
+
+
+@pytest.fixture(scope='module')
+def model_id():
+    from app import model_service
+    return model_service.create_model(random_network(5, seed=1))['model']['id']
+
+
+@pytest.mark.parametrize('body', BODIES)
+@pytest.mark.parametrize('method,path', ROUTES)
+def test_malformed_body_is_rejected(client, model_id, method, path, body):
+    response = getattr(client, method)(path.format(id=model_id), **body)
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'error': 'Request body must be a JSON object'}
+
+
+@pytest.mark.parametrize('method,path', ROUTES)
+def test_missing_body(client, model_id, method, path):
+    response = getattr(client, method)(path.format(id=model_id))
+    if path in OPTIONAL_BODY:
+        assert response.get_json().get('error') != 'Request body must be a JSON object'
+    else:
+        assert response.status_code == 400
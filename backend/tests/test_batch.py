@@ -0,0 +1,38 @@
+"""Batch simulation must agree with one-at-a-time simulation."""
+import pytest
+
+from benchmarks.synthetic import random_network
+from model_service import ModelService
+
+
+@pytest.fixture
+def service_and_model():
+    service = ModelService()
+    model = service.create_model(random_network(25, seed=3))['model']
+    return service, model
+
+
+def test_batch_matches_single_runs(service_and_model):
+    service, model = service_and_model
+    conditions = [{node['id']: (i >> k) & 1 for k, node in enumerate(model['nodes'][:5])}
+                  for i in range(8)]
+    batch = service.simulate_batch(model['id'], {'steps': 50, 'initial_conditions': conditions})
+    for condition, run in zip(conditions, batch['runs']):
+        single = service.simulate(model['id'], {'steps': 50, 'initial_conditions': condition})
+        assert run['final_state'] == single['final_state']
+
+
+def test_single_condition_dict_is_one_run(service_and_model):
+    service, model = service_and_model
+    condition = {model['nodes'][0]['id']: 1}
+    as_dict = service.simulate_batch(model['id'], {'initial_conditions': condition})
+    as_list = service.simulate_batch(model['id'], {'initial_conditions': [condition]})
+    assert len(as_dict['runs']) == 1
+    assert as_dict['runs'] == as_list['runs']
+
+
+@pytest.mark.parametrize('conditions', ['on', [1, 2], [{'a': 1}, 'b']])
+def test_malformed_conditions_are_rejected(service_and_model, conditions):
+    service, model = service_and_model
+    with pytest.raises(ValueError):
+        service.simulate_batch(model['id'], {'initial_conditions': conditions})
@@ -0,0 +1,87 @@
+"""Bulk import: one bad document fails alone; the rest are stored."""
+import io
+import os
+import json
+
+import pytest
+
+import bulk_import
+from benchmarks.synthetic import random_network, random_rule_network
+from model_service import ModelService
+
+
+def upload(documents):
+    return io.BytesIO(b''.join(json.dumps(d).encode() + b'\n' for d in documents))
+
+
+@pytest.fixture(params=[1, 2], ids=['inline', 'pool'])
+def workers(request, monkeypatch):
+    monkeypatch.setattr('config.Config.BULK_IMPORT_WORKERS', request.param)
+    monkeypatch.setattr('config.Config.BULK_IMPORT_BATCH_SIZE', 3)
+    return request.param
+
+
+def run(documents):
+    service = ModelService()
+    records = list(service.bulk_import(upload(documents))['records'])
+    models = sorted((r for r in records if r['type'] == 'model'), key=lambda r: r['index'])
+    return service, models, records[-1]
+
+
+def test_malformed_documents_fail_alone(workers):
+    documents = [
+        random_network(5, seed=1),
+        {'componentSet': [{'name': 'no id'}]},
+        {'relationshipSet': ['not an object']},
+        random_rule_network(6, seed=2),
+        {'nodes': 'n1', 'edges': []},
+        random_network(5, seed=3),
+    ]
+    service, models, summary = run(documents)
+    assert [m['success'] for m in models] == [True, False, False, True, False, True]
+    assert summary == {'type': 'summary', 'imported': 3, 'failed': 3}
+    for record in models:
+        if record['success']:
+            assert service.get_model(record['id'])
+
+
+def test_unexpected_errors_are_per_document(workers, monkeypatch):
+    prepare = bulk_import.prepare_document
+
+    def flaky(raw):
+        if b'"boom"' in raw:
+            raise KeyError('boom')
+        return prepare(raw)
+
+    # Pool workers are forked after this patch and inherit it
+    monkeypatch.setattr(bulk_import, 'prepare_document', flaky)
+    documents = [random_network(4, seed=1), {**random_network(4, seed=2), 'name': 'boom'},
+                 random_network(4, seed=3)]
+    service, models, summary = run(documents)
+    assert [m['success'] for m in models] == [True, False, True]
+    assert models[1]['error'] == "Invalid model (KeyError: 'boom')"
+    assert summary['imported'] == 2
+
+
+def test_dead_worker_fails_documents_in_flight_only(monkeypatch):
+    monkeypatch.setattr('config.Config.BULK_IMPORT_WORKERS', 2)
+    prepare = bulk_import.prepare_document
+
+    def crashing(raw):
+        if b'"crash"' in raw:
+            os._exit(1)
+        return prepare(raw)
+
+    monkeypatch.setattr(bulk_import, 'prepare_document', crashing)
+    # The window is 4 * workers = 8 documents; the crash breaks the pool
+    # and fails at most those, later documents go to a new pool
+    documents = [random_network(4, seed=i) for i in range(30)]
+    documents[3] = {**documents[3], 'name': 'crash'}
+    service, models, summary = run(documents)
+    assert len(models) == 30
+    assert not models[3]['success']
+    assert models[3]['error'] == 'A worker process died while preparing this document'
+    failed = [m['index'] for m in models if not m['success']]
+    assert max(failed) < 3 + 8
+    assert all(m['success'] for m in models[11:])
+    assert summary == {'type': 'summary', 'imported': 30 - len(failed), 'failed': len(failed)}
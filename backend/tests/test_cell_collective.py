@@ -0,0 +1,55 @@
+"""Cell Collective import: accepted shapes and clear errors for malformed ones."""
+import pytest
+
+from benchmarks.synthetic import random_rule_network
+from model_service import ModelService
+from rule_engine import import_cell_collective
+
+RELATIONSHIP = {'id': 'r1', 'target': 'B', 'regulator': 'A', 'type': 'POSITIVE'}
+
+
+def test_import_keeps_components_and_regulation():
+    model = import_cell_collective({
+        'externalComponentSet': [{'id': 'A', 'name': 'Signal'}],
+        'componentSet': [{'id': 'B', 'state': 'ON'}],
+        'relationshipSet': [{**RELATIONSHIP, 'conditions': [
+            {'type': 'UNLESS', 'components': ['C'], 'subConditions': []}
+        ]}]
+    })
+    assert [(n['id'], n['type'], n['state']) for n in model['nodes']] == \
+        [('A', 'external', 0), ('B', 'internal', 1), ('C', 'internal', 0)]
+    assert model['edges'][0]['conditions'][0]['components'] == ['C']
+
+
+@pytest.mark.parametrize('data', [
+    {'componentSet': 'A,B'},
+    {'componentSet': ['A']},
+    {'componentSet': [{'name': 'no id'}]},
+    {'externalComponentSet': {'id': 'A'}},
+    {'relationshipSet': ['A->B']},
+    {'relationshipSet': [{'target': 'B'}]},
+    {'relationshipSet': [{**RELATIONSHIP, 'conditions': 'IF A'}]},
+    {'relationshipSet': [{**RELATIONSHIP, 'conditions': [{'components': 'A'}]}]},
+    {'relationshipSet': [{**RELATIONSHIP, 'conditions': [{'subConditions': [1]}]}]},
+    {'relationshipSet': [{**RELATIONSHIP, 'dominates': 'r2'}]},
+])
+def test_malformed_models_raise_value_error(data):
+    with pytest.raises(ValueError):
+        import_cell_collective(data)
+
+
+def test_import_endpoint_rejects_malformed_model_with_400():
+    from app import app
+    client = app.test_client()
+    response = client.post('/api/models/import', json={'componentSet': [{'name': 'no id'}]})
+    assert response.status_code == 400
+    assert "needs an 'id'" in response.get_json()['error']
+
+    response = client.post('/api/models/import', json=random_rule_network(10, seed=1))
+    assert response.status_code == 201
+
+
+def test_import_model_compiles_rules():
+    service = ModelService()
+    model = service.import_model(random_rule_network(15, seed=2))['model']
+    assert service.get_network(model).rules is not None
@@ -0,0 +1,155 @@
+"""Every synchronous engine must reproduce the original per-node rule, and
+the rule engine must reproduce AsynchronousEngine's seeded asynchronous runs."""
+import random
+from typing import Dict, List
+
+import pytest
+
+from benchmarks.synthetic import random_network
+from engines import (AsynchronousEngine, BitsetEngine, IncrementalEngine, NumpyEngine,
+                     PythonEngine)
+from network import CompiledNetwork
+from rule_engine import RuleEngine, compile_rules, rule_inputs
+
+STEPS = 30
+SEEDS = range(40)
+
+
+def timeline(engine, initial, steps=STEPS):
+    engine.reset(initial)
+    states = [engine.vector()]
+    for _ in range(steps):
+        engine.step()
+        states.append(engine.vector())
+    return states
+
+
+# The simulator's original update, kept verbatim (as functions) as the
+# reference every engine is checked against.
+
+def _update_state(model: Dict, current_state: Dict, scheme: str) -> Dict:
+    """Update states for one simulation step.
+
+    Implements Boolean network update rules.
+    """
+    new_state = current_state.copy()
+
+    # Build adjacency info
+    regulators = {}  # target -> [(source, type)]
+    for edge in model['edges']:
+        target = edge['target']
+        if target not in regulators:
+            regulators[target] = []
+        regulators[target].append((edge['source'], edge['type']))
+
+    # Update each node
+    for node in model['nodes']:
+        node_id = node['id']
+
+        if node.get('type') == 'external':
+            # External nodes don't change (inputs)
+            continue
+
+        # Calculate new state based on regulators
+        if node_id in regulators:
+            new_state[node_id] = _calculate_node_state(
+                current_state,
+                regulators[node_id]
+            )
+
+    return new_state
+
+
+def _calculate_node_state(current_state: Dict, regulators: List) -> int:
+    """Calculate new state for a node based on its regulators.
+
+    Simple rule: Node is ON if any activator is ON and no inhibitors are ON.
+    """
+    has_activation = False
+    has_inhibition = False
+
+    for source, edge_type in regulators:
+        if current_state.get(source, 0) == 1:
+            if edge_type == 'activation':
+                has_activation = True
+            elif edge_type == 'inhibition':
+                has_inhibition = True
+
+    # ON if activated and not inhibited
+    if has_activation and not has_inhibition:
+        return 1
+
+    return 0
+
+
+def baseline_timeline(model, network, initial, steps=STEPS):
+    state = network.state_dict(initial)
+    states = [network.state_vector(state)]
+    for _ in range(steps):
+        state = _update_state(model, state, 'synchronous')
+        states.append(network.state_vector(state))
+    return states
+
+
+def random_case(seed):
+    rng = random.Random(seed)
+    model = random_network(rng.randint(1, 60), mean_in_degree=rng.uniform(0.5, 4),
+                           external_fraction=rng.uniform(0, 0.4), seed=seed)
+    network = CompiledNetwork(model)
+    initial = [rng.randint(0, 1) for _ in range(network.size)]
+    return model, network, initial
+
+
+def with_rules(model, network):
+    """Compile a plain model's regulation as rules, as RuleEngine needs."""
+    network.rules = compile_rules(model, network.index)
+    network.rule_inputs = rule_inputs(model, network.index)
+    return network
+
+
+@pytest.mark.parametrize('engine_class',
+                         [PythonEngine, BitsetEngine, NumpyEngine, IncrementalEngine])
+@pytest.mark.parametrize('seed', SEEDS)
+def test_engine_matches_baseline(engine_class, seed):
+    model, network, initial = random_case(seed)
+    assert timeline(engine_class(network), initial) == baseline_timeline(model, network, initial)
+
+
+@pytest.mark.parametrize('table_inputs', [0, 6])
+@pytest.mark.parametrize('seed', SEEDS)
+def test_rule_engine_matches_baseline(table_inputs, seed):
+    model, network, initial = random_case(seed)
+    expected = baseline_timeline(model, network, initial)
+    rules = RuleEngine(with_rules(model, network), table_inputs=table_inputs)
+    assert timeline(rules, initial) == expected
+
+
+def test_incremental_engine_survives_reset():
+    model, network, initial = random_case(7)
+    engine = IncrementalEngine(network)
+    timeline(engine, [1 - value for value in initial])
+    assert timeline(engine, initial) == baseline_timeline(model, network, initial)
+
+
+@pytest.mark.parametrize('table_inputs', [0, 6])
+@pytest.mark.parametrize('mode', AsynchronousEngine.MODES)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_asynchronous_rule_engine_matches_asynchronous_engine(mode, table_inputs, seed):
+    model, network, initial = random_case(seed)
+    expected = timeline(AsynchronousEngine(network, mode=mode, seed=seed), initial)
+    rules = RuleEngine(with_rules(model, network), asynchronous=True, mode=mode, seed=seed,
+                       table_inputs=table_inputs)
+    assert timeline(rules, initial) == expected
+
+
+@pytest.mark.parametrize('mode', AsynchronousEngine.MODES)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_asynchronous_fixed_points_are_baseline_fixed_points(mode, seed):
+    model, network, initial = random_case(seed)
+    for engine in (AsynchronousEngine(network, mode=mode, seed=seed),
+                   RuleEngine(with_rules(model, network), asynchronous=True, mode=mode, seed=seed)):
+        engine.reset(initial)
+        for _ in range(STEPS):
+            engine.step()
+        state = network.state_dict(engine.vector())
+        assert engine.is_fixed_point() == (_update_state(model, state, 'synchronous') == state)
@@ -0,0 +1,87 @@
+"""Tarjan and Johnson must agree with brute-force graph searches."""
+import random
+
+import pytest
+
+from graph_analysis import elementary_cycles, strongly_connected_components
+
+
+def random_graph(seed):
+    rng = random.Random(seed)
+    size = rng.randint(1, 9)
+    density = rng.uniform(0.05, 0.5)
+    return {node: {target for target in range(size) if rng.random() < density}
+            for node in range(size)}
+
+
+def canonical(cycle):
+    """Rotate a cycle to start at its smallest node."""
+    start = cycle.index(min(cycle))
+    return tuple(cycle[start:] + cycle[:start])
+
+
+def brute_force_cycles(graph):
+    """Every simple path from each node back to itself via larger nodes."""
+    cycles = set()
+
+    def extend(path):
+        for successor in graph[path[-1]]:
+            if successor == path[0]:
+                cycles.add(tuple(path))
+            elif successor > path[0] and successor not in path:
+                extend(path + [successor])
+
+    for node in graph:
+        extend([node])
+    return cycles
+
+
+def reachable(graph, node):
+    seen, pending = {node}, [node]
+    while pending:
+        for successor in graph[pending.pop()]:
+            if successor not in seen:
+                seen.add(successor)
+                pending.append(successor)
+    return seen
+
+
+@pytest.mark.parametrize('seed', range(80))
+def test_components_match_mutual_reachability(seed):
+    graph = random_graph(seed)
+    reach = {node: reachable(graph, node) for node in graph}
+    expected = {frozenset(other for other in graph if other in reach[node] and node in reach[other])
+                for node in graph}
+    components = strongly_connected_components(graph)
+    assert {frozenset(c) for c in components} == expected
+    assert sum(len(c) for c in components) == len(graph)
+
+
+@pytest.mark.parametrize('max_length', [None, 1, 2, 4])
+@pytest.mark.parametrize('seed', range(80))
+def test_cycles_match_brute_force(seed, max_length):
+    graph = random_graph(seed)
+    expected = {cycle for cycle in brute_force_cycles(graph)
+                if max_length is None or len(cycle) <= max_length}
+    found = [canonical(cycle) for cycle in elementary_cycles(graph, max_length)]
+    assert len(found) == len(set(found))
+    assert set(found) == expected
+
+
+class Abort(Exception):
+    pass
+
+
+def test_check_can_abort_a_long_search():
+    complete = {node: set(range(9)) - {node} for node in range(9)}
+    calls = []
+
+    def check():
+        calls.append(1)
+        if len(calls) > 3:
+            raise Abort
+
+    with pytest.raises(Abort):
+        for _ in elementary_cycles(complete, check=check):
+            pass
+    assert len(calls) == 4
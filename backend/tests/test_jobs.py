@@ -0,0 +1,108 @@
+"""Cancellation and timeouts of background jobs."""
+import threading
+import time
+
+import pytest
+
+from benchmarks.synthetic import random_network
+from jobs import JobManager
+from model_service import ModelService
+
+
+def wait_for(manager, job_id, statuses, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job['status'] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job stayed {manager.get(job_id)['status']}")
+
+
+@pytest.fixture
+def model():
+    return ModelService().create_model(random_network(20, seed=1))['model']
+
+
+@pytest.fixture(autouse=True)
+def hanging_jobs(monkeypatch):
+    """Make ``{'hang': True}`` simulations block without reporting progress.
+
+    Workers are forked on first submit, so they inherit this patch.
+    """
+    simulate = ModelService.simulate
+
+    def hanging_simulate(self, model_id, params, progress=None):
+        if params.get('hang'):
+            time.sleep(3600)
+        return simulate(self, model_id, params, progress)
+
+    monkeypatch.setattr(ModelService, 'simulate', hanging_simulate)
+
+
+@pytest.fixture
+def make_manager():
+    managers = []
+
+    def make(timeout=60):
+        managers.append(JobManager(max_workers=1, timeout=timeout, result_ttl=60, cancel_grace=0.5))
+        return managers[-1]
+
+    yield make
+    for manager in managers:
+        manager.shutdown()
+
+
+def test_cancel_queued_job(make_manager, model):
+    manager = make_manager()
+    blocker = manager.submit('simulate', model, {'hang': True})
+    queued = [manager.submit('simulate', model, {'steps': 10}) for _ in range(3)]
+
+    # Cancelling a future that has not started runs the done-callback
+    # synchronously; this must not deadlock on the manager's lock
+    worker = threading.Thread(target=manager.cancel, args=(queued[-1]['id'],))
+    worker.start()
+    worker.join(5)
+    assert not worker.is_alive()
+    assert wait_for(manager, queued[-1]['id'], ('cancelled',))['error'] is None
+
+    manager.cancel(blocker['id'])
+    assert wait_for(manager, blocker['id'], ('cancelled',))['status'] == 'cancelled'
+
+
+def test_unresponsive_job_is_killed_and_others_resubmitted(make_manager, model):
+    manager = make_manager()
+    stuck = manager.submit('simulate', model, {'hang': True})
+    wait_for(manager, stuck['id'], ('running',))
+    behind = manager.submit('simulate', model, {'steps': 10})
+    manager.cancel(stuck['id'])
+
+    # The worker never checks the cancel flag; the watchdog kills it
+    assert wait_for(manager, stuck['id'], ('cancelled', 'failed'))['status'] == 'cancelled'
+    job = wait_for(manager, behind['id'], ('completed', 'failed', 'cancelled'))
+    assert job['status'] == 'completed'
+    assert job['result']['success']
+
+
+def test_timeout_reports_timeout(make_manager, model):
+    manager = make_manager(timeout=0.5)
+    job = manager.submit('simulate', model, {'hang': True})
+    job = wait_for(manager, job['id'], ('timeout', 'failed', 'cancelled'))
+    assert job['status'] == 'timeout'
+    assert job['error'] == 'Job exceeded 0.5s'
+
+
+def test_events_go_only_to_the_submitter(make_manager, model):
+    manager = make_manager()
+    events = []
+    manager.on_event = lambda event, payload, room: events.append((event, payload['job_id'], room))
+    mine = manager.submit('simulate', model, {'steps': 10}, room='sid-1')
+    anonymous = manager.submit('simulate', model, {'steps': 10})
+    wait_for(manager, anonymous['id'], ('completed',))
+    wait_for(manager, mine['id'], ('completed',))
+
+    deadline = time.time() + 5
+    while ('job_complete', mine['id'], 'sid-1') not in events and time.time() < deadline:
+        time.sleep(0.05)
+    assert ('job_complete', mine['id'], 'sid-1') in events
+    assert all(job_id == mine['id'] and room == 'sid-1' for _, job_id, room in events)
@@ -0,0 +1,91 @@
+"""The attractor landscape must match a brute-force walk of every state."""
+import random
+from collections import Counter
+
+import pytest
+
+from benchmarks.synthetic import random_network, random_rule_network
+from engines import PythonEngine
+from landscape import compute_landscape
+from model_service import ModelService
+from network import CompiledNetwork
+from rule_engine import import_cell_collective
+
+
+def brute_force(network, base):
+    """Map each attractor (as a frozenset of states) to its basin size."""
+    free = [i for i in range(network.size) if not network.external[i]]
+    engine = PythonEngine(network)
+    basins = Counter()
+    for index in range(1 << len(free)):
+        vector = list(base)
+        for bit, node in enumerate(free):
+            vector[node] = (index >> bit) & 1
+        engine.reset(vector)
+        seen = []
+        while tuple(engine.vector()) not in seen:
+            seen.append(tuple(engine.vector()))
+            engine.step()
+        cycle = seen[seen.index(tuple(engine.vector())):]
+        basins[frozenset(cycle)] += 1
+    return basins
+
+
+@pytest.mark.parametrize('chunk_size', [7, 1 << 16])
+@pytest.mark.parametrize('seed', range(12))
+def test_landscape_matches_brute_force(seed, chunk_size):
+    rng = random.Random(seed)
+    network = CompiledNetwork(random_network(rng.randint(1, 10), mean_in_degree=rng.uniform(0.5, 3),
+                                             external_fraction=0.2, seed=seed))
+    base = [rng.randint(0, 1) for _ in range(network.size)]
+    landscape = compute_landscape(network, base, chunk_size=chunk_size, workers=1,
+                                  max_reported=1 << 10)
+
+    found = Counter()
+    for attractor in landscape['attractors']:
+        cycle = frozenset(tuple(network.state_vector(state)) for state in attractor['states'])
+        assert attractor['period'] == len(cycle)
+        found[cycle] = attractor['basin_size']
+    assert found == brute_force(network, base)
+    assert landscape['attractor_count'] == len(found)
+
+
+def test_landscape_cache_is_bounded_and_invalidated(monkeypatch):
+    monkeypatch.setattr('config.Config.ATTRACTOR_CACHE_MAX_ENTRIES', 2)
+    service = ModelService()
+    model = service.create_model(random_network(8, external_fraction=0.4, seed=1))['model']
+    externals = [node['id'] for node in model['nodes'] if node.get('type') == 'external']
+    for value in (0, 1):
+        for node_id in externals:
+            service.attractors(model['id'], {'inputs': {node_id: value}})
+    assert service._landscapes.stats()['entries'] <= 2
+
+    first = service.attractors(model['id'], {})
+    assert service.attractors(model['id'], {}) is first
+    service.update_model(model['id'], {'name': 'renamed'})
+    assert service._landscapes.stats()['entries'] == 0
+
+
+def test_rule_network_landscape_uses_the_pool():
+    model = import_cell_collective(random_rule_network(9, seed=4))
+    network = CompiledNetwork(model)
+    base = [0] * network.size
+    sequential = compute_landscape(network, base, chunk_size=64, workers=1, max_reported=1 << 10)
+    pooled = compute_landscape(network, base, chunk_size=64, workers=2, max_reported=1 << 10,
+                               model=model)
+    assert pooled == sequential
+
+
+def test_progress_goes_only_to_the_requesting_client(monkeypatch):
+    import app
+    emitted = []
+    monkeypatch.setattr(app.socketio, 'emit', lambda event, payload, to=None: emitted.append((event, to)))
+    model = app.model_service.create_model(random_network(8, seed=5))['model']
+    client = app.app.test_client()
+
+    assert client.get(f"/api/models/{model['id']}/attractors?socket_id=sid-1").status_code == 200
+    assert emitted and set(emitted) == {('attractors_progress', 'sid-1')}
+    emitted.clear()
+    other = app.model_service.create_model(random_network(8, seed=6))['model']
+    assert client.get(f"/api/models/{other['id']}/attractors").status_code == 200
+    assert emitted == []
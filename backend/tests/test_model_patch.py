@@ -0,0 +1,107 @@
+"""Patched models must compile and index exactly like a full rebuild."""
+import random
+
+import pytest
+
+from benchmarks.synthetic import random_network, random_rule_network
+from model_patch import apply_operations
+from network import CompiledNetwork
+from rule_engine import import_cell_collective
+from structure import StructuralIndex
+
+EDGE_TYPES = ('activation', 'inhibition')
+NODE_TYPES = ('internal', 'external')
+
+
+def random_operation(model, rng):
+    """One operation against ``model``; may be invalid (e.g. a dangling edge)."""
+    ids = [node['id'] for node in model['nodes']] + ['ghost']
+    edges = model['edges']
+    choice = rng.random()
+    if choice < 0.15:
+        return {'op': 'add', 'node': {'id': f'x{rng.randrange(10 ** 9)}', 'type': rng.choice(NODE_TYPES)}}
+    if choice < 0.45:
+        return {'op': 'add', 'edge': {'source': rng.choice(ids), 'target': rng.choice(ids),
+                                      'type': rng.choice(EDGE_TYPES)}}
+    if choice < 0.6:
+        return {'op': 'modify', 'node': rng.choice(ids), 'changes': {'type': rng.choice(NODE_TYPES)}}
+    if choice < 0.7:
+        return {'op': 'remove', 'node': rng.choice(ids)}
+    if not edges:
+        return None
+    edge = rng.choice(edges)
+    selector = {'source': edge['source'], 'target': edge['target'], 'type': edge.get('type')}
+    if choice < 0.85:
+        return {'op': 'remove', 'edge': selector}
+    changes = rng.choice([{'type': rng.choice(EDGE_TYPES)}, {'target': rng.choice(ids)}])
+    return {'op': 'modify', 'edge': selector, 'changes': changes}
+
+
+def random_operations(model, rng):
+    """A few operations that apply cleanly, in order."""
+    operations = []
+    current = model
+    for _ in range(rng.randint(1, 6)):
+        operation = random_operation(current, rng)
+        try:
+            nodes, edges, _ = apply_operations(current, [operation])
+        except ValueError:
+            continue
+        current = {'nodes': nodes, 'edges': edges}
+        operations.append(operation)
+    return operations
+
+
+def assert_same_network(derived, fresh):
+    for attr in ('node_ids', 'index', 'external', 'regulated', 'update_order',
+                 'activator_masks', 'inhibitor_masks', 'fixed_mask', '_in_edges'):
+        assert getattr(derived, attr) == getattr(fresh, attr), attr
+    for attr in ('activators', 'inhibitors', 'successors'):
+        assert [sorted(x) for x in getattr(derived, attr)] == \
+            [sorted(x) for x in getattr(fresh, attr)], attr
+    if fresh.rules is not None:
+        assert derived.rule_inputs == fresh.rule_inputs
+        rng = random.Random(1)
+        for _ in range(50):
+            state = rng.getrandbits(max(1, fresh.size))
+            assert [bool(derived.rules[i](state)) for i in fresh.update_order] == \
+                [bool(fresh.rules[i](state)) for i in fresh.update_order]
+        for max_inputs, tables in derived._truth_tables.items():
+            assert tables == fresh.truth_tables(max_inputs)
+
+
+def assert_same_index(index, fresh):
+    assert (index.node_count, index.edge_count, index._node_ids) == \
+        (fresh.node_count, fresh.edge_count, fresh._node_ids)
+    assert +index.node_types == +fresh.node_types
+    assert +index.edge_types == +fresh.edge_types
+    assert {k: v for k, v in index._successors.items() if v} == \
+        {k: v for k, v in fresh._successors.items() if v}
+
+
+@pytest.mark.parametrize('rules', [False, True])
+@pytest.mark.parametrize('seed', range(30))
+def test_patches_match_full_rebuild(seed, rules):
+    rng = random.Random(seed)
+    if rules:
+        model = import_cell_collective(random_rule_network(20, seed=seed))
+    else:
+        model = random_network(30, seed=seed)
+    model = {**model, 'id': 'm', 'version': 1}
+    network = CompiledNetwork(model)
+    if rules:
+        network.truth_tables(6)
+    index = StructuralIndex(model)
+
+    for version in range(2, 8):
+        operations = random_operations(model, rng)
+        if not operations:
+            continue
+        nodes, edges, changes = apply_operations(model, operations)
+        model = {**model, 'nodes': nodes, 'edges': edges, 'version': version}
+
+        network = network.derive(model, changes)
+        assert_same_network(network, CompiledNetwork(model))
+        index.apply_changes(changes, version)
+        assert_same_index(index, StructuralIndex(model))
+        assert index.version == version
@@ -0,0 +1,93 @@
+"""Each screened variant must match a plain simulation with its node held fixed."""
+import copy
+import random
+
+import pytest
+
+from benchmarks.synthetic import random_network
+from model_service import ModelService
+
+
+@pytest.fixture(scope='module')
+def service():
+    return ModelService()
+
+
+def forced(model, node_id, value):
+    """A copy of ``model`` with one node fixed as an external input."""
+    variant = copy.deepcopy(model)
+    variant.pop('id')
+    for node in variant['nodes']:
+        if node['id'] == node_id:
+            node.update(type='external', state=value)
+    return variant
+
+
+def outcome(result):
+    """Final state and attractor (as a set of states) of a simulate call."""
+    attractor = result['attractor']
+    return result['final_state'], attractor and {tuple(sorted(s.items())) for s in attractor}
+
+
+def attractor_of(screen, attractor_id):
+    if attractor_id is None:
+        return None
+    return {tuple(sorted(s.items())) for s in screen['attractors'][attractor_id]['states']}
+
+
+@pytest.mark.parametrize('seed', range(15))
+def test_variants_match_simulate_with_forced_node(service, seed):
+    rng = random.Random(seed)
+    model = service.create_model(random_network(rng.randint(2, 10), mean_in_degree=rng.uniform(1, 3),
+                                                external_fraction=0.2, seed=seed))['model']
+    initial = {node['id']: rng.randint(0, 1) for node in model['nodes']}
+    steps = rng.randint(1, 40)
+    screen = service.perturbation_screen(model['id'], {'steps': steps, 'initial_conditions': initial})
+
+    wild = service.simulate(model['id'], {'steps': steps, 'initial_conditions': initial})
+    assert screen['wild_type']['final_state'] == wild['final_state']
+    assert screen['wild_type']['steps_taken'] == wild['steps_taken']
+    assert attractor_of(screen, screen['wild_type']['attractor_id']) == outcome(wild)[1]
+
+    values = {'knockout': 0, 'overexpression': 1}
+    for result in screen['results']:
+        node_id, value = result['node_id'], values[result['perturbation']]
+        variant = service.create_model(forced(model, node_id, value))['model']
+        expected = service.simulate(variant['id'], {
+            'steps': steps, 'initial_conditions': {**initial, node_id: value}
+        })
+        final_state, attractor = outcome(expected)
+        assert result['steps_taken'] == expected['steps_taken']
+        assert attractor_of(screen, result['attractor_id']) == attractor
+        assert result['final_state_diff'] == {
+            n: v for n, v in final_state.items() if v != screen['wild_type']['final_state'][n]
+        }
+        assert result['attractor_changed'] == (result['attractor_id'] != screen['wild_type']['attractor_id'])
+
+
+def test_results_follow_requested_order(service):
+    model = service.create_model(random_network(8, seed=3))['model']
+    nodes = ['n5', 'n1', 'n7']
+    screen = service.perturbation_screen(model['id'], {
+        'nodes': nodes, 'perturbations': ['overexpression', 'knockout'], 'steps': 30
+    })
+    assert screen['run_count'] == 7
+    assert [(r['node_id'], r['perturbation']) for r in screen['results']] == [
+        (node_id, kind) for node_id in nodes for kind in ('overexpression', 'knockout')
+    ]
+    # Attractors are numbered by the first run (wild type first) that reaches them
+    seen = []
+    for attractor_id in [screen['wild_type']['attractor_id']] + [r['attractor_id'] for r in screen['results']]:
+        if attractor_id is not None and attractor_id not in seen:
+            seen.append(attractor_id)
+    assert seen == list(range(len(screen['attractors'])))
+
+
+def test_worker_pool_matches_in_process(service, monkeypatch):
+    model = service.create_model(random_network(12, external_fraction=0.2, seed=4))['model']
+    params = {'steps': 50}
+    monkeypatch.setattr('config.Config.SCREEN_WORKERS', 1)
+    in_process = service.perturbation_screen(model['id'], params)
+    monkeypatch.setattr('config.Config.SCREEN_WORKERS', 3)
+    monkeypatch.setattr('config.Config.SCREEN_CHUNK_RUNS', 4)
+    assert service.perturbation_screen(model['id'], params) == in_process
@@ -0,0 +1,84 @@
+"""Result cache bounds and invalidation."""
+import json
+
+import pytest
+
+from benchmarks.synthetic import random_network
+from model_service import ModelService
+from result_cache import ResultCache
+
+
+def test_evicts_least_recently_used_by_count():
+    cache = ResultCache(max_entries=3, max_bytes=1000)
+    for key in 'abc':
+        cache.put(('m', key), key, 10)
+    assert cache.get(('m', 'a')) == 'a'  # 'b' is now least recently used
+    cache.put(('m', 'd'), 'd', 10)
+    assert cache.get(('m', 'b')) is None
+    assert [cache.get(('m', key)) for key in 'acd'] == ['a', 'c', 'd']
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['entries'] == 3
+
+
+def test_evicts_by_byte_budget():
+    cache = ResultCache(max_entries=100, max_bytes=100)
+    cache.put(('m', 1), 1, 40)
+    cache.put(('m', 2), 2, 40)
+    cache.put(('m', 3), 3, 40)
+    assert cache.get(('m', 1)) is None
+    assert cache.stats()['bytes'] == 80
+
+    cache.put(('m', 2), 'replaced', 10)
+    assert cache.stats()['bytes'] == 50
+    cache.put(('m', 'huge'), 'huge', 101)  # larger than the whole budget
+    assert cache.get(('m', 'huge')) is None
+    assert cache.stats()['entries'] == 2
+
+
+def test_invalidate_model_drops_only_its_entries():
+    cache = ResultCache(max_entries=10, max_bytes=1000)
+    cache.put(('m1', 1), 'a', 10)
+    cache.put(('m1', 2), 'b', 10)
+    cache.put(('m2', 1), 'c', 10)
+    cache.invalidate_model('m1')
+    assert cache.stats()['entries'] == 1 and cache.stats()['bytes'] == 10
+    assert cache.get(('m2', 1)) == 'c'
+
+
+@pytest.mark.parametrize('change', ['update', 'patch', 'delete'])
+def test_model_changes_invalidate_results(change):
+    service = ModelService()
+    model = service.create_model(random_network(6, seed=1))['model']
+    other = service.create_model(random_network(6, seed=2))['model']
+    params = {'steps': 10}
+    first = service.simulate(model['id'], params)
+    assert service.simulate(model['id'], params) is first
+    service.simulate(other['id'], params)
+    assert service.result_cache.stats()['entries'] == 2
+
+    if change == 'update':
+        service.update_model(model['id'], {'name': 'renamed'})
+    elif change == 'patch':
+        operation = {'op': 'modify', 'node': model['nodes'][0]['id'], 'changes': {'label': 'x'}}
+        service.patch_model(model['id'], {'version': model['version'], 'operations': [operation]})
+    else:
+        service.delete_model(model['id'])
+    assert service.result_cache.stats()['entries'] == 1
+    if change != 'delete':
+        assert service.simulate(model['id'], params) is not first
+
+
+@pytest.mark.parametrize('timeline_format', ['full', 'delta', 'columnar'])
+@pytest.mark.parametrize('size,steps', [(5, 3), (20, 40), (60, 200)])
+def test_estimated_size_tracks_the_serialized_result(size, steps, timeline_format):
+    service = ModelService()
+    model = service.create_model(random_network(size, mean_in_degree=1, seed=size))['model']
+    result = service.simulate(model['id'], {'steps': steps, 'timeline_format': timeline_format})
+
+    estimated = service.result_cache.stats()['bytes']
+    actual = len(json.dumps(result, separators=(',', ':')))
+    if timeline_format == 'full':
+        assert actual / 2 <= estimated <= actual * 2
+    else:
+        # Compact timelines are sized as if they were full ones
+        assert estimated >= actual
@@ -0,0 +1,230 @@
+"""RuleEngine must follow a direct reading of the Cell Collective rules.
+
+The reference below interprets the imported document itself (component
+dicts, relationship and condition objects) on an id -> 0/1 state, with
+none of the compilation, bit masks or truth tables of ``rule_engine``.
+"""
+import random
+
+import pytest
+
+from config import Config
+from network import CompiledNetwork
+from rule_engine import RuleEngine, import_cell_collective
+from scheduling import AsynchronousScheduler
+
+STEPS = 25
+TABLE_LIMIT = Config.TRUTH_TABLE_MAX_INPUTS
+
+
+# Reference interpreter
+
+def holds(condition, state):
+    want = 1 if condition.get('state', 'ON') == 'ON' else 0
+    matches = [state[c] == want for c in condition.get('components', [])]
+    test = all(matches) if condition.get('relation', 'AND') == 'AND' else any(matches)
+    subconditions = condition.get('subConditions', [])
+    if subconditions:
+        combine = all if condition.get('subConditionRelation', 'AND') == 'AND' else any
+        sub_test = combine(holds(sub, state) for sub in subconditions)
+        test = test and sub_test if condition.get('components') else sub_test
+    return not test if condition.get('type', 'IF') == 'UNLESS' else test
+
+
+def next_value(relationships, state):
+    """Value of a component under its regulators (Cell Collective logic)."""
+    active = {
+        r['id']: state[r['regulator']] == 1 and all(holds(c, state) for c in r.get('conditions', []))
+        for r in relationships
+    }
+    dominated = {d for r in relationships if active[r['id']] for d in r.get('dominates', [])}
+    effective = [r for r in relationships if active[r['id']] and r['id'] not in dominated]
+    if any(r['type'] == 'NEGATIVE' for r in effective):
+        return 0
+    if any(r['type'] == 'POSITIVE' for r in relationships):
+        return int(any(r['type'] == 'POSITIVE' for r in effective))
+    return 1
+
+
+class Reference:
+    def __init__(self, document):
+        external = {c['id'] for c in document.get('externalComponentSet', [])}
+        self.regulators = {}
+        for relationship in document['relationshipSet']:
+            if relationship['target'] not in external:
+                self.regulators.setdefault(relationship['target'], []).append(relationship)
+
+    def step(self, state):
+        return {node: next_value(self.regulators[node], state) if node in self.regulators else value
+                for node, value in state.items()}
+
+
+class ReferenceAsynchronous(AsynchronousScheduler):
+    """The reference rules under the shared asynchronous scheduling.
+
+    Every updatable node is treated as a dependent of every flip, so a
+    dependency the rule engine misses shows up as a different trajectory.
+    """
+
+    def __init__(self, reference, network, mode, seed):
+        self.reference = reference
+        self.network = network
+        self.mode = mode
+        self._rng = random.Random(seed)
+        self._updatable = [node_id in reference.regulators for node_id in network.node_ids]
+
+    def run(self, state, steps):
+        self.state = dict(state)
+        self._reset_unstable()
+        states = [dict(self.state)]
+        for _ in range(steps):
+            self._asynchronous_step()
+            states.append(dict(self.state))
+        return states
+
+    def _disagrees(self, i):
+        node_id = self.network.node_ids[i]
+        return next_value(self.reference.regulators[node_id], self.state) != self.state[node_id]
+
+    def _flip(self, i):
+        node_id = self.network.node_ids[i]
+        self.state[node_id] = 1 - self.state[node_id]
+        self._refresh(i)
+        return [j for j in range(self.network.size) if j != i and self._refresh(j)]
+
+
+# Random documents with nested conditions and dominance
+
+def random_condition(rng, ids, depth):
+    condition = {
+        'type': rng.choice(['IF', 'UNLESS']),
+        'state': rng.choice(['ON', 'OFF']),
+        'relation': rng.choice(['AND', 'OR']),
+        'components': rng.sample(ids, rng.randint(0, 3)),
+    }
+    if depth and rng.random() < 0.5:
+        condition['subConditionRelation'] = rng.choice(['AND', 'OR'])
+        condition['subConditions'] = [random_condition(rng, ids, depth - 1)
+                                      for _ in range(rng.randint(1, 2))]
+    return condition
+
+
+def random_document(seed, size=9):
+    rng = random.Random(seed)
+    ids = [f'c{i}' for i in range(size)]
+    external = [node_id for node_id in ids if rng.random() < 0.15]
+    relationships = []
+    for target in ids:
+        siblings = [{
+            'id': f'{target}.{k}',
+            'target': target,
+            'regulator': rng.choice(ids),
+            'type': rng.choice(['POSITIVE', 'POSITIVE', 'NEGATIVE']),
+            'conditions': [random_condition(rng, ids, 2)
+                           for _ in range(rng.random() < 0.5 and rng.randint(1, 2))],
+        } for k in range(rng.randint(0, 4))]
+        for relationship in siblings:
+            others = [s['id'] for s in siblings if s is not relationship]
+            if others and rng.random() < 0.35:
+                relationship['dominates'] = rng.sample(others, rng.randint(1, len(others)))
+        relationships.extend(siblings)
+    return {
+        'externalComponentSet': [{'id': node_id} for node_id in external],
+        'componentSet': [{'id': node_id} for node_id in ids if node_id not in external],
+        'relationshipSet': relationships,
+    }
+
+
+def compiled(document):
+    model = import_cell_collective(document)
+    return CompiledNetwork(model)
+
+
+def engine_timeline(engine, network, initial):
+    engine.reset(network.state_vector(initial))
+    states = [network.state_dict(engine.vector())]
+    for _ in range(STEPS):
+        engine.step()
+        states.append(network.state_dict(engine.vector()))
+    return states
+
+
+def random_initial(network, seed):
+    rng = random.Random(seed)
+    return {node_id: rng.randint(0, 1) for node_id in network.node_ids}
+
+
+# Tests
+
+def test_dominance_overrides_an_inhibitor():
+    document = {
+        'componentSet': [{'id': 'A'}, {'id': 'B'}, {'id': 'T'}],
+        'relationshipSet': [
+            {'id': 'up', 'target': 'T', 'regulator': 'A', 'type': 'POSITIVE', 'dominates': ['down']},
+            {'id': 'down', 'target': 'T', 'regulator': 'B', 'type': 'NEGATIVE'},
+        ],
+    }
+    network = compiled(document)
+    engine = RuleEngine(network)
+    for a, b, expected in [(1, 1, 1), (0, 1, 0), (1, 0, 1), (0, 0, 0)]:
+        engine.reset(network.state_vector({'A': a, 'B': b, 'T': 0}))
+        engine.step()
+        assert network.state_dict(engine.vector())['T'] == expected
+
+
+def test_nested_unless_condition():
+    # T follows A unless (B is ON and (C or D is OFF))
+    document = {
+        'componentSet': [{'id': n} for n in 'ABCDT'],
+        'relationshipSet': [{
+            'id': 'r', 'target': 'T', 'regulator': 'A', 'type': 'POSITIVE',
+            'conditions': [{
+                'type': 'UNLESS', 'state': 'ON', 'components': ['B'],
+                'subConditionRelation': 'AND',
+                'subConditions': [{'state': 'OFF', 'relation': 'OR', 'components': ['C', 'D']}],
+            }],
+        }],
+    }
+    network = compiled(document)
+    engine = RuleEngine(network)
+    for bits in range(16):
+        state = {'A': 1, 'B': bits & 1, 'C': bits >> 1 & 1, 'D': bits >> 2 & 1, 'T': bits >> 3}
+        engine.reset(network.state_vector(state))
+        engine.step()
+        blocked = state['B'] and not (state['C'] and state['D'])
+        assert network.state_dict(engine.vector())['T'] == int(not blocked)
+
+
+@pytest.mark.parametrize('table_inputs', [0, 2, TABLE_LIMIT, 16])
+@pytest.mark.parametrize('seed', range(40))
+def test_synchronous_matches_reference(seed, table_inputs):
+    document = random_document(seed)
+    network = compiled(document)
+    reference = Reference(document)
+    initial = random_initial(network, seed)
+
+    expected = [initial]
+    for _ in range(STEPS):
+        expected.append(reference.step(expected[-1]))
+    engine = RuleEngine(network, table_inputs=table_inputs)
+    assert engine_timeline(engine, network, initial) == expected
+
+
+@pytest.mark.parametrize('table_inputs', [0, TABLE_LIMIT, 16])
+@pytest.mark.parametrize('mode', RuleEngine.MODES)
+@pytest.mark.parametrize('seed', range(25))
+def test_seeded_asynchronous_matches_reference(seed, mode, table_inputs):
+    document = random_document(seed)
+    network = compiled(document)
+    initial = random_initial(network, seed)
+
+    expected = ReferenceAsynchronous(Reference(document), network, mode, seed).run(initial, STEPS)
+    engine = RuleEngine(network, asynchronous=True, mode=mode, seed=seed, table_inputs=table_inputs)
+    assert engine_timeline(engine, network, initial) == expected
+
+
+def test_tables_and_closures_both_exercised():
+    """The random documents put nodes on both sides of the table limit."""
+    inputs = [len(compiled(random_document(seed)).rule_inputs[i])
+              for seed in range(40) for i in range(9)]
+    assert min(inputs) <= 2 < TABLE_LIMIT < max(inputs) <= 16
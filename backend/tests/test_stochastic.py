@@ -0,0 +1,87 @@
+"""Activity levels of stochastic replicate runs."""
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import random_network
+from engines import PythonEngine
+from network import CompiledNetwork
+from stochastic import run_activity
+
+
+def network_and_states(seed, rows):
+    network = CompiledNetwork(random_network(10, external_fraction=0.2, seed=seed))
+    rng = np.random.default_rng(seed)
+    return network, rng.integers(0, 2, (rows, network.size), dtype=np.uint8)
+
+
+def trajectory(network, initial, steps):
+    """(steps + 1) x nodes states of one deterministic run."""
+    engine = PythonEngine(network)
+    engine.reset([int(bit) for bit in initial])
+    states = [engine.vector()]
+    for _ in range(steps):
+        engine.step()
+        states.append(engine.vector())
+    return np.array(states, dtype=np.float64)
+
+
+def run(network, states, groups, noise, seed, steps=30, window=8, stride=3, inputs=(), levels=None):
+    if levels is None:
+        levels = np.zeros((states.shape[0], len(inputs)))
+    return run_activity(network, states, groups, list(inputs), levels, noise, steps, window, stride,
+                        np.random.default_rng(seed))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_fixed_seed_is_reproducible(seed):
+    network, states = network_and_states(seed, 12)
+    noise = np.full(network.size, 0.1)
+    first = run(network, states, 3, noise, seed)
+    second = run(network, states, 3, noise, seed)
+    assert np.array_equal(first['activity'], second['activity'])
+    assert np.array_equal(first['final_states'], second['final_states'])
+    assert [step for step, _ in first['trace']] == [step for step, _ in second['trace']]
+    assert all(np.array_equal(a, b) for (_, a), (_, b) in zip(first['trace'], second['trace']))
+    assert not np.array_equal(run(network, states, 3, noise, seed + 100)['final_states'],
+                              first['final_states'])
+
+
+@pytest.mark.parametrize('steps', [0, 5, 8, 30])
+@pytest.mark.parametrize('seed', range(5))
+def test_zero_noise_averages_deterministic_runs(seed, steps):
+    groups, replicates, window, stride = 3, 4, 8, 3
+    network, states = network_and_states(seed, groups * replicates)
+    result = run(network, states, groups, np.zeros(network.size), seed, steps, window, stride)
+
+    runs = np.array([trajectory(network, row, steps) for row in states])
+    assert np.array_equal(result['final_states'], runs[:, -1])
+
+    by_group = runs.reshape(groups, replicates, steps + 1, -1)
+    if steps == 0:
+        expected = by_group[:, :, 0].mean(axis=1)
+    else:
+        expected = by_group[:, :, max(1, steps - window + 1):].mean(axis=(1, 2))
+    assert np.allclose(result['activity'], expected)
+
+    ends = list(range(window, steps + 1, stride))
+    assert [step for step, _ in result['trace']] == ends
+    for end, activity in result['trace']:
+        assert np.allclose(activity, by_group[:, :, end - window + 1:end + 1].mean(axis=(1, 2)))
+
+
+def test_activity_is_a_fraction_and_tracks_input_levels():
+    network, _ = network_and_states(1, 1)
+    driven = [i for i in range(network.size) if network.external[i]]
+    assert driven
+    groups, replicates = 2, 400
+    states = np.zeros((groups * replicates, network.size), dtype=np.uint8)
+    levels = np.repeat(np.array([[0.2], [0.7]]), replicates, axis=0).repeat(len(driven), axis=1)
+    result = run(network, states, groups, np.full(network.size, 0.05), 3,
+                 steps=40, window=20, inputs=driven, levels=levels)
+
+    activity = result['activity']
+    assert activity.shape == (groups, network.size)
+    assert ((activity >= 0) & (activity <= 1)).all()
+    for _, trace in result['trace']:
+        assert ((trace >= 0) & (trace <= 1)).all()
+    assert np.allclose(activity[:, driven], [[0.2], [0.7]], atol=0.02)
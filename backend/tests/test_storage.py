@@ -0,0 +1,172 @@
+"""Model store selection, lazy creation and the SQLite backend."""
+import json
+import os
+import zlib
+
+import pytest
+
+from benchmarks.synthetic import random_network
+from model_service import ModelService
+from storage import MemoryModelStore, ModelStore, SQLiteModelStore
+
+
+def test_store_is_created_on_first_use(tmp_path):
+    path = str(tmp_path / 'models.db')
+    created = []
+
+    def factory():
+        created.append(SQLiteModelStore(path, 8))
+        return created[-1]
+
+    service = ModelService(store_factory=factory)
+    assert not created and not os.path.exists(path)
+
+    model = service.create_model(random_network(5, seed=1))['model']
+    assert service.get_model(model['id'])['nodes'] == model['nodes']
+    assert service.store is created[0]
+    assert len(created) == 1 and os.path.exists(path)
+
+
+
+def make_model(model_id, version=1, **changes):
+    model = {
+        'id': model_id, 'name': 'Model', 'owner': 'ana', 'version': version,
+        'updated_at': f'2024-01-01T00:00:{version:02d}',
+        'nodes': [{'id': 'a', 'label': 'α → β'}, {'id': 'b', 'state': 1}],
+        'edges': [{'source': 'a', 'target': 'b', 'type': 'activation'}],
+    }
+    model.update(changes)
+    return model
+
+
+def part_count(store):
+    return store._connection().execute('SELECT COUNT(*) FROM model_parts').fetchone()[0]
+
+
+def test_blob_round_trip(tmp_path):
+    path = str(tmp_path / 'models.db')
+    model = make_model('m1', extra={'nested': [1, 2.5, None, True, 'ü']})
+    SQLiteModelStore(path).insert(model)
+
+    other = SQLiteModelStore(path)
+    assert other.get('m1') == model
+    blob = other._connection().execute('SELECT data FROM models').fetchone()[0]
+    assert json.loads(zlib.decompress(blob)) == model
+
+
+def test_compare_and_set_race_between_connections(tmp_path):
+    path = str(tmp_path / 'models.db')
+    first, second = SQLiteModelStore(path), SQLiteModelStore(path)
+    first.insert(make_model('m1'))
+    assert first.get('m1')['version'] == second.get('m1')['version'] == 1
+
+    winner = make_model('m1', 2, name='winner')
+    assert first.update(winner, expected_version=1)
+    assert not second.update(make_model('m1', 2, name='loser'), expected_version=1)
+    assert second.get('m1') == winner
+    assert first.get('m1') == winner
+
+
+def test_read_cache_sees_other_connections(tmp_path):
+    path = str(tmp_path / 'models.db')
+    writer, reader = SQLiteModelStore(path), SQLiteModelStore(path)
+    writer.insert(make_model('m1'))
+    assert reader.get('m1')['name'] == 'Model'
+
+    writer.update(make_model('m1', 2, name='renamed'), expected_version=1)
+    assert reader.get('m1')['name'] == 'renamed'
+    writer.delete('m1')
+    assert reader.get('m1') is None
+
+
+def test_versions_share_unchanged_parts(tmp_path):
+    store = SQLiteModelStore(str(tmp_path / 'models.db'))
+    first = make_model('m1')
+    store.insert(first)
+    assert part_count(store) == 2
+
+    renamed = make_model('m1', 2, name='renamed')
+    store.update(renamed, expected_version=1)
+    assert part_count(store) == 2
+    rewired = make_model('m1', 3, edges=[])
+    store.update(rewired, expected_version=2)
+    assert part_count(store) == 3
+
+    assert store.get_version('m1', 1) == first
+    assert store.get_version('m1', 2) == renamed
+    assert store.get_version('m1', 3) == rewired
+    assert store.get_version('m1', 4) is None
+
+
+def test_delete_collects_parts_not_used_by_other_models(tmp_path):
+    store = SQLiteModelStore(str(tmp_path / 'models.db'))
+    store.insert(make_model('m1'))
+    store.update(make_model('m1', 2, edges=[]), expected_version=1)
+    store.insert(make_model('copy'))
+    assert part_count(store) == 3
+
+    assert store.delete('m1')
+    assert part_count(store) == 2
+    assert store.get('copy') == make_model('copy')
+    assert store.get_version('m1', 1) is None
+    assert store.delete('copy')
+    assert part_count(store) == 0
+
+
+def test_store_interface_is_abstract():
+    class Partial(ModelStore):
+        def get(self, model_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def open_store(kind, tmp_path, retention=0):
+    if kind == 'memory':
+        return MemoryModelStore(retention)
+    return SQLiteModelStore(str(tmp_path / 'models.db'), 8, retention)
+
+
+@pytest.mark.parametrize('kind', ['memory', 'sqlite'])
+def test_old_versions_read_back_unchanged_after_patches(tmp_path, kind):
+    service = ModelService(store_factory=lambda: open_store(kind, tmp_path))
+    model = service.create_model(random_network(6, seed=2))['model']
+    snapshots = {1: json.dumps(service.get_model(model['id']), sort_keys=True)}
+    node_ids = [node['id'] for node in model['nodes']]
+    for version in range(1, 6):
+        operation = {'op': 'modify', 'node': node_ids[version], 'changes': {'label': f'v{version}'}}
+        service.patch_model(model['id'], {'version': version, 'operations': [operation]})
+        snapshots[version + 1] = json.dumps(service.get_model(model['id']), sort_keys=True)
+
+    for version, snapshot in snapshots.items():
+        assert json.dumps(service.get_model_version(model['id'], version), sort_keys=True) == snapshot
+    assert service.get_model_version(model['id'], 7) is None
+
+
+def test_unchanged_parts_are_stored_once(tmp_path):
+    store = SQLiteModelStore(str(tmp_path / 'models.db'))
+    service = ModelService(store_factory=lambda: store)
+    model = service.create_model(random_network(6, seed=3))['model']
+    edges = model['edges']
+    for version in range(1, 4):
+        operation = {'op': 'modify', 'node': model['nodes'][0]['id'], 'changes': {'label': str(version)}}
+        service.patch_model(model['id'], {'version': version, 'operations': [operation]})
+    # One edge list shared by all four versions, one node list each
+    assert part_count(store) == 5
+    assert service.get_model_version(model['id'], 1)['edges'] == edges
+
+
+@pytest.mark.parametrize('kind', ['memory', 'sqlite'])
+def test_versions_beyond_retention_are_pruned(tmp_path, kind):
+    store = open_store(kind, tmp_path, retention=3)
+    store.insert(make_model('m1'))
+    store.insert(make_model('copy'))
+    for version in range(2, 7):
+        store.update(make_model('m1', version, nodes=[{'id': f'n{version}'}]), version - 1)
+
+    assert [v for v in range(1, 7) if store.get_version('m1', v) is not None] == [4, 5, 6]
+    assert store.get_version('copy', 1) == make_model('copy')
+    if kind == 'sqlite':
+        # Nodes of versions 4-6, plus the nodes and edges still used by 'copy'
+        assert part_count(store) == 5
@@ -0,0 +1,83 @@
+"""Streamed simulations must report the attractor simulate finds."""
+import random
+
+import pytest
+
+from benchmarks.synthetic import random_network
+from model_service import ModelService
+
+ATTRACTOR_FIELDS = ('reached_attractor', 'transient_length', 'cycle_period', 'attractor')
+
+
+@pytest.fixture(scope='module')
+def service():
+    return ModelService()
+
+
+@pytest.mark.parametrize('confirm_cycle', [False, True])
+@pytest.mark.parametrize('seed', range(60))
+def test_stream_summary_matches_simulate(service, seed, confirm_cycle):
+    rng = random.Random(seed)
+    model = service.create_model(random_network(rng.randint(2, 14), mean_in_degree=rng.uniform(1, 3),
+                                                seed=seed))['model']
+    for _ in range(10):
+        params = {
+            'steps': rng.randint(0, 40),
+            'initial_conditions': {node['id']: rng.randint(0, 1) for node in model['nodes']},
+            'block_size': rng.randint(1, 8),
+            'confirm_cycle': confirm_cycle
+        }
+        expected = service.simulate(model['id'], params)
+        records = list(service.simulate_stream(model['id'], params)['records'])
+        summary = records[-1]
+        if summary['reached_attractor'] is None:
+            assert not confirm_cycle
+            assert summary['steps_checked'] == summary['steps_taken'] == params['steps']
+            assert summary['transient_length'] is summary['attractor'] is None
+        else:
+            assert {field: summary[field] for field in ATTRACTOR_FIELDS} == \
+                {field: expected[field] for field in ATTRACTOR_FIELDS}
+
+        streamed = sum(len(record['states']) for record in records if record['type'] == 'steps')
+        assert streamed == summary['steps_taken'] + 1
+        assert summary['steps_taken'] >= expected['steps_taken']
+        assert summary['steps_checked'] >= summary['steps_taken']
+
+
+def ring(size):
+    """A single ON bit moving around ``size`` nodes: one cycle of period ``size``."""
+    return {
+        'name': f'Ring of {size}',
+        'nodes': [{'id': f'r{i}', 'type': 'internal', 'state': int(i == 0)} for i in range(size)],
+        'edges': [{'source': f'r{i}', 'target': f'r{(i + 1) % size}', 'type': 'activation'}
+                  for i in range(size)]
+    }
+
+
+def test_ring_longer_than_steps(service):
+    model = service.create_model(ring(12))['model']
+    params = {'steps': 8}
+    assert not service.simulate(model['id'], params)['reached_attractor']
+
+    summary = list(service.simulate_stream(model['id'], params)['records'])[-1]
+    assert summary['reached_attractor'] is None
+    assert summary['steps_checked'] == summary['steps_taken'] == 8
+
+    params['confirm_cycle'] = True
+    summary = list(service.simulate_stream(model['id'], params)['records'])[-1]
+    assert summary['reached_attractor'] is False
+    assert summary['steps_checked'] == 24
+    assert summary['cycle_period'] is None
+
+
+def test_confirm_cycle_finds_a_cycle_brent_missed(service):
+    model = service.create_model(ring(6))['model']
+    params = {'steps': 7}
+    expected = service.simulate(model['id'], params)
+    assert expected['cycle_period'] == 6
+
+    summary = list(service.simulate_stream(model['id'], params)['records'])[-1]
+    assert summary['reached_attractor'] is None
+    summary = list(service.simulate_stream(model['id'], {**params, 'confirm_cycle': True})['records'])[-1]
+    assert summary['reached_attractor'] and summary['cycle_period'] == 6
+    assert summary['transient_length'] == expected['transient_length'] == 0
@@ -0,0 +1,109 @@
+"""Dose-response sweeps: grid layout, window averages and parameter checks."""
+from itertools import product
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import random_network
+from engines import PythonEngine
+from model_service import ModelService
+
+SWEEP = {'replicates': 3, 'warmup': 6, 'settle': 4, 'window': 5}
+
+
+@pytest.fixture(scope='module')
+def service():
+    return ModelService()
+
+
+def swept_model(service, seed):
+    model = service.create_model(random_network(10, external_fraction=0.3, seed=seed))['model']
+    externals = [node['id'] for node in model['nodes'] if node['type'] == 'external']
+    assert len(externals) >= 2
+    return model, externals
+
+
+def expected_activity(service, model, values, outputs):
+    """Noise-free reference: warm up, hold the swept inputs, average the window."""
+    network = service.get_network(model)
+    engine = PythonEngine(network)
+    engine.reset(network.state_vector(service._initialize_state(model, {})))
+    for _ in range(SWEEP['warmup']):
+        engine.step()
+    vector = engine.vector()
+    for node_id, value in values.items():
+        vector[network.index[node_id]] = value
+    engine.reset(vector)
+    window = []
+    for step in range(SWEEP['settle'] + SWEEP['window']):
+        engine.step()
+        if step >= SWEEP['settle']:
+            window.append(engine.vector())
+    columns = [network.index[node_id] for node_id in outputs]
+    return np.round(np.array(window, dtype=np.float64)[:, columns].mean(axis=0), 4).tolist()
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_one_input_grid(service, seed):
+    model, externals = swept_model(service, seed)
+    result = service.sweep(model['id'], {**SWEEP, 'inputs': externals[:1], 'levels': [1, 0]})
+    assert result['levels'] == [1, 0]
+    assert result['outputs'] == [node['id'] for node in model['nodes'] if node['type'] != 'external']
+    assert result['activity'] == [
+        expected_activity(service, model, {externals[0]: level}, result['outputs'])
+        for level in (1, 0)
+    ]
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_two_input_grid(service, seed):
+    model, externals = swept_model(service, seed)
+    outputs = [model['nodes'][i]['id'] for i in (0, 4, 9)]
+    result = service.sweep(model['id'], {
+        **SWEEP, 'inputs': externals[:2], 'levels': [0, 1], 'outputs': outputs
+    })
+    for i, j in product(range(2), repeat=2):
+        assert result['activity'][i][j] == expected_activity(
+            service, model, {externals[0]: i, externals[1]: j}, outputs)
+
+
+def test_default_levels(service):
+    model, externals = swept_model(service, 0)
+    result = service.sweep(model['id'], {**SWEEP, 'inputs': externals[:2], 'outputs': ['n0']})
+    assert result['levels'] == pytest.approx([i / 10 for i in range(11)])
+    assert np.array(result['activity']).shape == (11, 11, 1)
+    assert all(0 <= value <= 1 for value in np.ravel(result['activity']))
+
+
+@pytest.mark.parametrize('params', [
+    {'inputs': []},
+    {'inputs': 'n0'},
+    {'inputs': [['n0']]},
+    {'inputs': ['n0', 'n0']},
+    {'inputs': ['not-a-node']},
+    {'levels': 1},
+    {'levels': 1.5},
+    {'levels': []},
+    {'levels': 'abc'},
+    {'levels': [0.5, 2]},
+    {'outputs': [['n0']]},
+    {'outputs': ['missing']},
+    {'replicates': 0},
+    {'replicates': None},
+    {'replicates': 'x'},
+    {'window': 0},
+    {'window': None},
+    {'settle': -1},
+    {'warmup': -1},
+    {'noise': 2},
+    {'input_levels': [1]},
+    {'seed': 'x'},
+    {'replicates': 1 << 20},
+])
+def test_invalid_parameters_return_400(params):
+    import app
+    model, externals = swept_model(app.model_service, 1)
+    body = {**SWEEP, 'inputs': externals[:1], **params}
+    response = app.app.test_client().post(f"/api/models/{model['id']}/sweep", json=body)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
@@ -0,0 +1,114 @@
+"""Compact timeline formats must decode back to the simulated states.
+
+``fixtures/timeline_codec.json`` holds encoded timelines and the states
+they decode to; the GUI decoder (gui/src/utils/timelineCodec.ts) is
+tested against the same file by gui/tests/timeline-codec.spec.ts.
+Regenerate it with ``python tests/test_timeline_codec.py``.
+"""
+import json
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.synthetic import random_network  # noqa: E402
+from network import CompiledNetwork  # noqa: E402
+from timeline_codec import encode_timeline  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'timeline_codec.json')
+
+
+def decode_delta(encoded):
+    if encoded['initial'] is None:
+        return []
+    values = [int(bit) for bit in encoded['initial']]
+    states = [tuple(values)]
+    for flipped in encoded['flips']:
+        for i in flipped:
+            values[i] ^= 1
+        states.append(tuple(values))
+    return states
+
+
+def decode_columnar(encoded):
+    columns = []
+    for first, *runs in encoded['series']:
+        assert sum(runs) == encoded['length']
+        column, value = [], first
+        for run in runs:
+            column.extend([value] * run)
+            value ^= 1
+        columns.append(column)
+    return list(zip(*columns)) if columns else [()] * encoded['length']
+
+
+def random_timeline(seed):
+    """A network and packed timeline: random jumps mixed with sparse flips."""
+    rng = random.Random(seed)
+    network = CompiledNetwork(random_network(rng.choice([1, 5, 63, 64, 65, 130]), seed=seed))
+    timeline = []
+    for _ in range(rng.choice([0, 1, 2, 30])):
+        if not timeline or rng.random() < 0.2:
+            timeline.append(rng.getrandbits(network.size))
+        else:
+            flipped = {rng.randrange(network.size) for _ in range(rng.randint(0, 3))}
+            flips = sum(1 << i for i in flipped)
+            timeline.append(timeline[-1] ^ flips)
+    return network, timeline
+
+
+@pytest.mark.parametrize('seed', range(60))
+def test_round_trip(seed):
+    network, timeline = random_timeline(seed)
+    expected = [tuple(network.unpack(packed)) for packed in timeline]
+
+    full = encode_timeline(network, timeline, 'full')
+    assert [tuple(state[node_id] for node_id in network.node_ids) for state in full] == expected
+    delta = json.loads(json.dumps(encode_timeline(network, timeline, 'delta')))
+    assert delta['node_ids'] == list(network.node_ids)
+    assert decode_delta(delta) == expected
+    columnar = json.loads(json.dumps(encode_timeline(network, timeline, 'columnar')))
+    assert columnar['node_ids'] == list(network.node_ids)
+    assert decode_columnar(columnar) == expected
+
+
+def test_empty_timeline():
+    network = CompiledNetwork(random_network(4, seed=1))
+    assert encode_timeline(network, [], 'full') == []
+    assert decode_delta(encode_timeline(network, [], 'delta')) == []
+    assert decode_columnar(encode_timeline(network, [], 'columnar')) == []
+
+
+def fixture_cases():
+    cases = []
+    for name, size, length, seed in [('small', 3, 6, 1), ('empty', 2, 0, 2),
+                                     ('single state', 4, 1, 3), ('wide', 70, 8, 4)]:
+        rng = random.Random(seed)
+        network = CompiledNetwork(random_network(size, seed=seed))
+        timeline = [rng.getrandbits(size) for _ in range(length)]
+        cases.append({
+            'name': name,
+            'states': [''.join(map(str, network.unpack(packed))) for packed in timeline],
+            'delta': encode_timeline(network, timeline, 'delta'),
+            'columnar': encode_timeline(network, timeline, 'columnar'),
+        })
+    return cases
+
+
+def test_shared_fixture_is_current():
+    with open(FIXTURE) as f:
+        cases = json.load(f)
+    assert cases == fixture_cases()
+    for case in cases:
+        expected = [tuple(int(bit) for bit in state) for state in case['states']]
+        assert decode_delta(case['delta']) == expected
+        assert decode_columnar(case['columnar']) == expected
+
+
+if __name__ == '__main__':
+    with open(FIXTURE, 'w') as f:
+        json.dump(fixture_cases(), f, indent=1)
+        f.write('\n')
@@ -0,0 +1,92 @@
+"""Encoders for simulation timelines held as packed states.
+
+Formats:
+    full: list of ``{node_id: 0|1}`` dicts, one per step (default)
+    delta: node ids once, the initial state as a bitstring (character i
+        is node i; null for an empty timeline), then per step the indices
+        of the nodes that flipped
+    columnar: node ids once, then per node a run-length series
+        ``[first_value, run_length, run_length, ...]``; runs alternate
+        between the two values and their lengths sum to the step count
+"""
+from typing import Dict, List
+
+from network import CompiledNetwork
+
+TIMELINE_FORMATS = ('full', 'delta', 'columnar')
+
+
+def check_format(timeline_format: str) -> None:
+    """Raise ValueError if ``timeline_format`` is not supported."""
+    if timeline_format not in TIMELINE_FORMATS:
+        raise ValueError(
+            f"Unknown timeline_format '{timeline_format}'. "
+            f"Choose from: {', '.join(TIMELINE_FORMATS)}"
+        )
+
+
+def encode_timeline(network: CompiledNetwork, timeline: List[int], timeline_format: str):
+    """Encode a packed timeline in the requested format.
+
+    Args:
+        network: Network the states belong to
+        timeline: Packed states, one per step
+        timeline_format: One of TIMELINE_FORMATS
+
+    Returns:
+        Encoded timeline
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    check_format(timeline_format)
+    if timeline_format == 'full':
+        return [network.state_dict(network.unpack(packed)) for packed in timeline]
+    if timeline_format == 'delta':
+        return encode_delta(network, timeline)
+    return encode_columnar(network, timeline)
+
+
+def encode_delta(network: CompiledNetwork, timeline: List[int]) -> Dict:
+    """Encode as an initial bitstring plus per-step flipped node indices."""
+    flips = []
+    for previous, current in zip(timeline, timeline[1:]):
+        flips.append(set_bits(previous ^ current))
+
+    return {
+        'format': 'delta',
+        'node_ids': list(network.node_ids),
+        'initial': ''.join(str(bit) for bit in network.unpack(timeline[0])) if timeline else None,
+        'flips': flips
+    }
+
+
+def encode_columnar(network: CompiledNetwork, timeline: List[int]) -> Dict:
+    """Encode as one run-length series per node."""
+    change_steps = [[] for _ in range(network.size)]
+    for step, (previous, current) in enumerate(zip(timeline, timeline[1:]), start=1):
+        for i in set_bits(previous ^ current):
+            change_steps[i].append(step)
+
+    series = []
+    first = network.unpack(timeline[0]) if timeline else [0] * network.size
+    for value, changes in zip(first, change_steps):
+        boundaries = [0] + changes + [len(timeline)]
+        series.append([value] + [b - a for a, b in zip(boundaries, boundaries[1:])])
+
+    return {
+        'format': 'columnar',
+        'node_ids': list(network.node_ids),
+        'length': len(timeline),
+        'series': series
+    }
+
+
+def set_bits(value: int) -> List[int]:
+    """Indices of the set bits of ``value``, ascending."""
+    bits = []
+    while value:
+        low = value & -value
+        bits.append(low.bit_length() - 1)
+        value ^= low
+    return bits
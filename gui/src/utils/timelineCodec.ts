@@ -0,0 +1,75 @@
+/**
+ * Timeline Codec
+ *
+ * Decodes the compact timeline formats returned by
+ * POST /api/models/<id>/simulate with `timeline_format`:
+ * - 'full': list of { nodeId: 0|1 } states (returned as-is)
+ * - 'delta': node ids, initial bitstring (null if empty), per-step flipped node indices
+ * - 'columnar': node ids, per-node run-length series [first, run, run, ...]
+ */
+
+export type NodeState = Record<string, number>
+
+export interface DeltaTimeline {
+  format: 'delta'
+  node_ids: string[]
+  initial: string | null
+  flips: number[][]
+}
+
+export interface ColumnarTimeline {
+  format: 'columnar'
+  node_ids: string[]
+  length: number
+  series: number[][]
+}
+
+export type EncodedTimeline = NodeState[] | DeltaTimeline | ColumnarTimeline
+
+/**
+ * Expand a delta-encoded timeline into one state object per step
+ */
+export function decodeDelta(timeline: DeltaTimeline): NodeState[] {
+  if (timeline.initial === null) return []
+  const values = Array.from(timeline.initial, (bit) => (bit === '1' ? 1 : 0))
+  const toState = (): NodeState =>
+    Object.fromEntries(timeline.node_ids.map((id, i) => [id, values[i]]))
+
+  const states = [toState()]
+  for (const flipped of timeline.flips) {
+    for (const index of flipped) {
+      values[index] ^= 1
+    }
+    states.push(toState())
+  }
+  return states
+}
+
+/**
+ * Expand a columnar (run-length) timeline into one state object per step
+ */
+export function decodeColumnar(timeline: ColumnarTimeline): NodeState[] {
+  const states: NodeState[] = Array.from({ length: timeline.length }, () => ({}))
+
+  timeline.node_ids.forEach((id, i) => {
+    const [first, ...runs] = timeline.series[i]
+    let value = first
+    let step = 0
+    for (const run of runs) {
+      for (let end = step + run; step < end; step++) {
+        states[step][id] = value
+      }
+      value ^= 1
+    }
+  })
+  return states
+}
+
+/**
+ * Decode any timeline format returned by the simulate endpoint
+ */
+export function decodeTimeline(timeline: EncodedTimeline): NodeState[] {
+  if (Array.isArray(timeline)) return timeline
+  if (timeline.format === 'delta') return decodeDelta(timeline)
+  return decodeColumnar(timeline)
+}
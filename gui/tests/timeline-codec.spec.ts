@@ -0,0 +1,33 @@
+import { test, expect } from '@playwright/test';
+import fs from 'fs';
+import path from 'path';
+import { fileURLToPath } from 'url';
+
+import { decodeTimeline, type ColumnarTimeline, type DeltaTimeline } from '../src/utils/timelineCodec';
+
+/**
+ * Decodes the timelines the backend encoded in its codec fixture
+ * (backend/tests/fixtures/timeline_codec.json, regenerated by
+ * `python tests/test_timeline_codec.py`) and compares the states.
+ */
+
+interface FixtureCase {
+  name: string
+  states: string[]
+  delta: DeltaTimeline
+  columnar: ColumnarTimeline
+}
+
+const __dirname = path.dirname(fileURLToPath(import.meta.url));
+const fixture = path.join(__dirname, '..', '..', 'backend', 'tests', 'fixtures', 'timeline_codec.json');
+const cases: FixtureCase[] = JSON.parse(fs.readFileSync(fixture, 'utf-8'));
+
+for (const fixtureCase of cases) {
+  test(`decodes the ${fixtureCase.name} timeline`, () => {
+    const expected = fixtureCase.states.map((bits) =>
+      Object.fromEntries(fixtureCase.delta.node_ids.map((id, i) => [id, bits[i] === '1' ? 1 : 0]))
+    );
+    expect(decodeTimeline(fixtureCase.delta)).toEqual(expected);
+    expect(decodeTimeline(fixtureCase.columnar)).toEqual(expected);
+  });
+}